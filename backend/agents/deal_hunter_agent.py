@@ -17,6 +17,7 @@ sys.path.append(backend_dir)
 from jumia_scraper import scraper_jumia_best_sellers
 from alibaba_scraper import scraper_alibaba_recherche
 from marketplace_db import DB_PATH
+from catalogue import regrouper_par_produit
 
 class DealHunterAgent:
     """
@@ -57,8 +58,11 @@ class DealHunterAgent:
              
         opportunities = []
         
+        # Une seule recherche Alibaba par produit, même s'il apparaît plusieurs fois (catalogue)
+        distinct_products = [copies[0] for copies in regrouper_par_produit(jumia_products, "jumia").values()]
+        
         # 2. Scanner Alibaba (Source Market) pour chaque produit
-        for jp in jumia_products:
+        for jp in distinct_products:
             try:
                 name = jp.get('nom', 'Inconnu')
                 price_local = float(jp.get('prix', 0))
@@ -89,6 +93,7 @@ class DealHunterAgent:
                          elif margin_percent > 50: status = "GOOD"
                          
                          opportunities.append({
+                             "canonical_id": jp.get('canonical_id'),
                              "product_name": name,
                              "local_price": price_local,
                              "source_price": price_source,
@@ -109,6 +114,7 @@ class DealHunterAgent:
         return {
             "status": "success",
             "scanned_count": len(jumia_products),
+            "distinct_count": len(distinct_products),
             "opportunities_found": len(opportunities),
             "top_opportunities": opportunities
         }
@@ -16,7 +16,9 @@ backend_dir = os.path.dirname(current_dir)
 sys.path.append(backend_dir)
 
 from jumia_scraper import scraper_jumia_recherche
+from dashboard_metrics import metrics
 from marketplace_db import DB_PATH, mettre_a_jour_produit
+from catalogue import regrouper_par_produit
 
 class PriceAgent:
     """
@@ -48,16 +50,23 @@ class PriceAgent:
         processed_count = 0
         results = []
         
+        # Copies d'un même produit (catalogue) : une seule recherche Jumia pour toutes
+        regrouper_par_produit(products, "marketplace")
+        competitors_par_produit = {}
+        
         for product in products:
             try:
                 logger.info(f"🔎 Analyse prix pour: {product['nom']}")
                 
                 # 1. Rechercher sur Jumia
-                competitors = scraper_jumia_recherche(
-                    terme=product['nom'],
-                    limit=3,
-                    use_fuzzy=True
-                )
+                canonical_id = product.get('canonical_id') or product['product_id']
+                if canonical_id not in competitors_par_produit:
+                    competitors_par_produit[canonical_id] = scraper_jumia_recherche(
+                        terme=product['nom'],
+                        limit=3,
+                        use_fuzzy=True
+                    )
+                competitors = competitors_par_produit[canonical_id]
                 
                 competitor_data = None
                 if competitors:
@@ -78,6 +87,7 @@ class PriceAgent:
                     if isinstance(features, str):
                          try: features = json.loads(features)
                          except: features = {}
+                    etait_en_alerte = (features.get('competitor_analysis') or {}).get('status') == "expensive"
                     
                     features['competitor_analysis'] = competitor_data
                     
@@ -114,6 +124,8 @@ class PriceAgent:
                     # si on ne l'a pas.
                     
                     self._update_product_features(product['product_id'], features)
+                    est_en_alerte = features['competitor_analysis'].get('status') == "expensive"
+                    metrics.alertes_modifiees(int(est_en_alerte) - int(etait_en_alerte))
                     
                     processed_count += 1
                     results.append({
@@ -3,9 +3,10 @@ import sys
 import logging
 import csv
 import json
-import random
-from typing import List, Dict
-import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -17,157 +18,223 @@ backend_dir = os.path.dirname(current_dir)
 sys.path.append(backend_dir)
 
 from jumia_scraper import scraper_jumia_recherche
+from google_trends import get_keyword_scores
+from dashboard_metrics import metrics
 from marketplace_db import DB_PATH
 import sqlite3
 
+MIN_TRENDS_SCORE = 20  # Intérêt vs le mot-clé d'ancrage (100 = autant recherché) ; en dessous, non retenu
+MAX_PRODUITS_RAPPORT = 100  # Nombre de drafts détaillés dans le rapport
+
+
+def _par_lots(iterable: Iterable, taille: int) -> Iterator[List]:
+    """Découpe un flux en listes de `taille` éléments sans le matérialiser."""
+    iterator = iter(iterable)
+    while True:
+        lot = list(islice(iterator, taille))
+        if not lot:
+            return
+        yield lot
+
+
+def _statut_tendance(score: Optional[int]) -> str:
+    if score is None:
+        return "Inconnu"
+    if score > 70:
+        return "Très Populaire"
+    if score > 40:
+        return "Moyen"
+    return "Faible"
+
+
 class SourcingAgent:
     """
     Agent Sourcing (BoumMarket Replica / Sales History).
-    1. Lit les produits "Gagnants" depuis un CSV d'historique.
-    2. Cherche des équivalents sur Jumia.
-    3. Vérifie la tendance (Google Trends - Simulation).
-    4. Enregistre en 'draft' pour validation humaine.
+    Pipeline en flux, traité par lots pour rester en mémoire constante :
+    1. Lecture en streaming des produits "Gagnants" depuis un CSV d'historique.
+    2. Score Google Trends par lots, sur l'échelle commune du mot-clé d'ancrage (cache trends_cache).
+    3. Recherche concurrente des équivalents sur Jumia.
+    4. Insertion en masse des 'draft' du lot (transaction courte, une par lot) pour validation humaine.
     """
-    
-    def __init__(self, csv_path: str = None):
+
+    def __init__(self, csv_path: str = None, batch_size: int = 50, jumia_workers: int = 4):
         if csv_path:
             self.csv_path = csv_path
         else:
             # Par défaut cherche le fichier wordpress détecté
             self.csv_path = os.path.join(os.path.dirname(backend_dir), "produits_wordpress.csv")
-            
-    def _get_history_best_sellers(self, limit: int = 5) -> List[Dict]:
-        """Lit le CSV et retourne les produits prioritaires."""
-        products = []
+        self.batch_size = batch_size
+        self.jumia_workers = jumia_workers
+
+    def _iter_history_rows(self, limit: Optional[int] = None) -> Iterator[Dict]:
+        """Lit le CSV ligne par ligne (jamais en entier) et produit les cibles de sourcing."""
         if not os.path.exists(self.csv_path):
             logger.error(f"Fichier CSV introuvable: {self.csv_path}")
-            return []
-            
+            return
+
+        count = 0
         try:
-            with open(self.csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
+            with open(self.csv_path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
                     # Nettoyage et normalisation
-                    name = row.get('Name', row.get('nom', ''))
-                    if name:
-                        products.append({
-                            "name": name,
-                            "target_price": row.get('Regular price', row.get('prix', 0))
-                        })
-                        if len(products) >= limit:
-                            break
+                    name = (row.get('Name') or row.get('nom') or '').strip()
+                    if not name:
+                        continue
+                    yield {
+                        "name": name,
+                        "target_price": row.get('Regular price', row.get('prix', 0))
+                    }
+                    count += 1
+                    if limit and count >= limit:
+                        return
         except Exception as e:
             logger.error(f"Erreur lecture CSV: {e}")
-            
-        return products
+
+    def _get_history_best_sellers(self, limit: int = 5) -> List[Dict]:
+        """Lit le CSV et retourne les produits prioritaires."""
+        return list(self._iter_history_rows(limit))
 
     def _check_google_trends(self, keyword: str) -> Dict:
         """
-        Simule une vérification Google Trends.
-        Retourne un score de 0 à 100.
+        Vérification Google Trends d'un mot-clé (via le cache partagé).
+        Retourne un score rapporté au mot-clé d'ancrage (100 = autant recherché),
+        ou None si Google Trends est indisponible.
         """
-        # Simulation (Mock) pour l'instant
-        # Dans un vrai cas, on utiliserait pytrends
-        score = random.randint(10, 100)
-        status = "Faible"
-        if score > 70: status = "Très Populaire"
-        elif score > 40: status = "Moyen"
-        
-        return {"score": score, "status": status}
-
-    def _save_draft_product(self, product_data: Dict) -> bool:
-        """Sauvegarde le produit en statut 'draft' dans la base SQLite."""
+        return self._score_trends_batch([keyword])[keyword.strip().lower()]
+
+    def _score_trends_batch(self, keywords: List[str]) -> Dict[str, Dict]:
+        """Score Google Trends d'un lot de mots-clés en un minimum de requêtes."""
+        try:
+            scores = get_keyword_scores(keywords)
+        except Exception as e:
+            logger.warning(f"⚠️ Google Trends indisponible: {e}")
+            scores = {}
+        resultat = {}
+        for kw in keywords:
+            score = scores.get(kw.strip().lower())
+            resultat[kw.strip().lower()] = {"score": score, "status": _statut_tendance(score)}
+        return resultat
+
+    def _lookup_jumia(self, target: Dict) -> Optional[Dict]:
+        """Recherche le meilleur équivalent Jumia d'une cible (appelé en parallèle)."""
+        term = target['name']
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
-            # Vérifier si existe déjà (par nom approximatif ou id)
-            # Ici on simplifie en insérant un nouveau
-            
+            jumia_hits = scraper_jumia_recherche(terme=term, limit=1)
+        except Exception as e:
+            logger.error(f"Erreur recherche Jumia pour {term}: {e}")
+            return None
+        if not jumia_hits:
+            logger.info(f"❌ Aucun résultat Jumia pour {term}")
+            return None
+        hit = jumia_hits[0]
+        return {
+            "name": hit['nom'],
+            "price": hit['prix'],
+            "image": hit['image'],
+            "link": hit['lien'],
+            "search_term": term,
+            "trends": target['trends'],
+            "competitor": "Jumia"
+        }
+
+    def _save_drafts(self, drafts: List[Dict]) -> int:
+        """
+        Insère un lot de drafts avec executemany, dans sa propre transaction.
+        Appelé une fois le travail réseau du lot terminé : le verrou d'écriture de la base
+        marketplace n'est tenu que le temps de l'insertion, pas pendant les attentes
+        Google Trends / Jumia (les autres écrivains ne sont pas bloqués).
+        """
+        rows = []
+        for product_data in drafts:
             features = {
                 "sourcing_source": "History CSV",
                 "original_search_term": product_data.get('search_term'),
                 "google_trends": product_data.get('trends'),
                 "competitor_data": product_data.get('competitor')
             }
-            
-            product_id = f"draft_{int(asyncio.get_event_loop().time() * 1000)}_{random.randint(100,999)}"
-            
-            cursor.execute("""
-                INSERT INTO produits_marketplace (
-                    product_id, nom, prix, image, lien, source, 
-                    status, features_json, validation_score, description_seo
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                product_id,
+            # uuid4: pas de collision entre runs parallèles (contrairement à un horodatage)
+            product_data['product_id'] = f"draft_{uuid.uuid4().hex}"
+            rows.append((
+                product_data['product_id'],
                 product_data['name'],
                 product_data['price'],
                 product_data['image'],
                 product_data['link'],
                 "Sourcing Agent - Jumia",
-                "draft", # STATUT IMPORTANT
+                "draft",  # STATUT IMPORTANT
                 json.dumps(features),
                 product_data['trends']['score'],
                 "Description en attente de validation..."
             ))
-            
-            conn.commit()
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        try:
+            with conn:
+                conn.executemany("""
+                    INSERT INTO produits_marketplace (
+                        product_id, nom, prix, image, lien, source,
+                        status, features_json, validation_score, description_seo
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+        finally:
             conn.close()
-            return True
-        except Exception as e:
-            logger.error(f"Erreur sauvegarde draft: {e}")
-            return False
+        metrics.produits_ajoutes("draft", len(rows))
+        return len(rows)
 
-    def run(self, limit: int = 5) -> Dict:
-        """Exécute le pipeline de sourcing."""
+    def run(self, limit: Optional[int] = 5) -> Dict:
+        """
+        Exécute le pipeline de sourcing.
+
+        Args:
+            limit: Nombre de lignes du CSV à traiter (None ou 0 = tout le fichier)
+        """
         logger.info(f"🚀 Démarrage Sourcing Agent (Source: {self.csv_path})")
-        
-        # 1. Lire historique
-        targets = self._get_history_best_sellers(limit=limit)
-        if not targets:
-            return {"status": "error", "message": "Aucun produit trouvé dans l'historique CSV."}
-            
+
+        scanned = 0
+        drafts_created = 0
+        weak_trends = 0
         results = []
-        
-        # 2. Processus Sourcing
-        for target in targets:
-            term = target['name']
-            logger.info(f"🔎 Recherche sourcing pour : {term}")
-            
-            # Recherche Jumia
-            jumia_hits = scraper_jumia_recherche(terme=term, limit=1)
-            
-            if jumia_hits:
-                hit = jumia_hits[0]
-                
-                # Check Trends
-                trends = self._check_google_trends(term)
-                
-                if trends['score'] < 20:
-                    logger.warning(f"⚠️ Tendance faible pour {term} ({trends['score']}), ignoré.")
-                    continue
-                    
-                product_data = {
-                    "name": hit['nom'],
-                    "price": hit['prix'],
-                    "image": hit['image'],
-                    "link": hit['lien'],
-                    "search_term": term,
-                    "trends": trends,
-                    "competitor": "Jumia"
-                }
-                
-                # Sauvegarde Draft
-                if self._save_draft_product(product_data):
-                    results.append(product_data)
-                    logger.info(f"✅ Draft créé pour : {hit['nom']}")
-            else:
-                logger.info(f"❌ Aucun résultat Jumia pour {term}")
-                
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.jumia_workers) as executor:
+                # 1. Lecture en flux de l'historique, par lots
+                for lot in _par_lots(self._iter_history_rows(limit or None), self.batch_size):
+                    scanned += len(lot)
+
+                    # 2. Score Google Trends du lot
+                    trends = self._score_trends_batch([t['name'] for t in lot])
+                    retenus = []
+                    for target in lot:
+                        target['trends'] = trends[target['name'].lower()]
+                        score = target['trends']['score']
+                        if score is not None and score < MIN_TRENDS_SCORE:
+                            logger.warning(f"⚠️ Tendance faible pour {target['name']} ({score}), ignoré.")
+                            weak_trends += 1
+                            continue
+                        retenus.append(target)
+
+                    # 3. Recherche Jumia concurrente
+                    drafts = [d for d in executor.map(self._lookup_jumia, retenus) if d]
+
+                    # 4. Insertion en masse du lot (transaction courte)
+                    if drafts:
+                        drafts_created += self._save_drafts(drafts)
+                        for d in drafts:
+                            logger.info(f"✅ Draft créé pour : {d['name']}")
+                        results.extend(drafts[:MAX_PRODUITS_RAPPORT - len(results)])
+        except Exception as e:
+            # Les lots déjà insérés restent en base (drafts_created)
+            logger.error(f"Erreur pipeline sourcing: {e}")
+            return {"status": "error", "message": f"Erreur pipeline sourcing: {e}",
+                    "scanned": scanned, "drafts_created": drafts_created}
+
+        if scanned == 0:
+            return {"status": "error", "message": "Aucun produit trouvé dans l'historique CSV."}
+
         return {
             "status": "success",
-            "scanned": len(targets),
-            "drafts_created": len(results),
+            "scanned": scanned,
+            "weak_trends_skipped": weak_trends,
+            "drafts_created": drafts_created,
             "products": results
         }
 
@@ -2,29 +2,217 @@
 Intégration avec Apify pour scraper Alibaba
 Scraper Apify: https://apify.com/piotrv1001/alibaba-listings-scraper
 Documentation: https://docs.apify.com/
+
+Gestion des runs :
+- lancer_run() démarre un run de l'acteur et rend la main tout de suite
+- attendre_run() suit un run par long-poll (waitForFinish : l'API ne répond qu'à la fin
+  du run ou après WAIT_FOR_FINISH secondes) ; si le serveur répond plus tôt sans que
+  le run soit fini, on réinterroge avec un délai croissant (POLL_MIN -> POLL_MAX)
+- iter_pages_dataset() lit le dataset du run page par page, seulement les colonnes utiles
+- executer_recherches() lance toutes les recherches d'un coup et les suit en parallèle,
+  chaque page de produits est transmise à un callback dès qu'elle arrive
 """
 import requests
+import threading
 import time
 import re
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Dict, Optional
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Configuration Apify
-APIFY_API_BASE_URL = "https://api.apify.com/v2"
+APIFY_API_BASE_URL = os.getenv("APIFY_API_BASE_URL", "https://api.apify.com/v2")
 APIFY_TOKEN = os.getenv("APIFY_TOKEN", "")
 APIFY_ACTOR_ID = "piotrv1001/alibaba-listings-scraper"  # ID du scraper Alibaba sur Apify
 
+MAX_WAIT_TIME = 300  # Durée maximale d'un run (secondes)
+WAIT_FOR_FINISH = 60  # Long-poll : l'API attend la fin du run au plus 60 s par requête
+POLL_MIN = 0.5  # Délai initial entre deux vérifications si le serveur répond avant la fin
+POLL_MAX = 10  # Délai maximal entre deux vérifications
+DATASET_PAGE_SIZE = 100  # Items lus par requête sur le dataset
+RUNS_PARALLELES = 10  # Runs suivis simultanément par executer_recherches
 
-def search_products_apify(
-    keyword: str = "",
-    category: str = "",
-    limit: int = 20
-) -> List[Dict]:
+_session_locale = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """Une session HTTP (keep-alive) par thread du pool."""
+    if not hasattr(_session_locale, "session"):
+        _session_locale.session = requests.Session()
+    return _session_locale.session
+
+
+def _headers() -> Dict:
+    if not APIFY_TOKEN:
+        raise ValueError(
+            "Token Apify non configuré. "
+            "Veuillez définir APIFY_TOKEN dans le fichier .env"
+        )
+    return {
+        "Authorization": f"Bearer {APIFY_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+
+# Clés lues par convertir_item pour chaque champ, par ordre de préférence
+# (Apify peut retourner différentes structures selon la version de l'acteur)
+CLES_APIFY = {
+    "nom": ("title", "name", "productName", "productTitle", "subject"),
+    "prix": ("price", "priceText", "priceRange"),
+    "lien": ("url", "productUrl", "link", "href"),
+    "image": ("imageUrl", "image", "images"),
+    "marque": ("brand", "brandName", "manufacturer", "vendor"),
+    "categorie": ("category", "categoryName", "productCategory"),
+    "note": ("rating", "ratingValue", "score"),
+    "moq": ("moq", "minOrderQuantity", "minimumOrder", "minOrder"),
+    "supplier": ("supplierName", "supplier", "vendorName", "companyName"),
+    "discount": ("discount", "discountText", "sale"),
+    "product_id": ("productId", "id"),
+}
+
+# Seules ces colonnes sont demandées au dataset (paramètre fields) : description,
+# fiche technique, avis... de l'acteur ne sont ni transférés ni décodés
+CHAMPS_DATASET = ",".join(cle for cles in CLES_APIFY.values() for cle in cles)
+
+
+def convertir_item(item: Dict) -> Dict:
     """
-    Recherche de produits Alibaba via Apify.
+    Convertit un item du dataset Apify au format produit attendu.
+    Apify peut retourner différentes structures, on essaie plusieurs clés possibles
+    (à garder en phase avec CLES_APIFY).
+    
+    Args:
+        item: Item brut du dataset
+        
+    Returns:
+        Dictionnaire produit
+    """
+    # Nom du produit - essayer plusieurs clés possibles
+    nom = (
+        item.get("title") or 
+        item.get("name") or 
+        item.get("productName") or 
+        item.get("productTitle") or
+        item.get("subject") or
+        "Produit sans nom"
+    )
+
+    # Prix - gérer différents formats
+    prix = 0.0
+    prix_texte = "Prix sur demande"
+
+    price_data = item.get("price")
+    if price_data:
+        if isinstance(price_data, dict):
+            prix = float(price_data.get("value", 0) or price_data.get("amount", 0) or 0)
+            prix_texte = price_data.get("text") or price_data.get("priceText") or f"${prix:.2f}"
+        elif isinstance(price_data, (int, float)):
+            prix = float(price_data)
+            prix_texte = f"${prix:.2f}"
+        elif isinstance(price_data, str):
+            prix_texte = price_data
+            # Essayer d'extraire un nombre
+            prix_match = re.search(r'[\d.]+', price_data.replace(',', ''))
+            if prix_match:
+                prix = float(prix_match.group())
+
+    # Si pas de prix trouvé, essayer priceText directement
+    if not prix_texte or prix_texte == "Prix sur demande":
+        prix_texte = item.get("priceText") or item.get("priceRange") or "Prix sur demande"
+
+    # Lien/URL
+    lien = (
+        item.get("url") or 
+        item.get("productUrl") or 
+        item.get("link") or
+        item.get("href") or
+        ""
+    )
+
+    # Image - peut être une liste ou une string
+    image = ""
+    image_data = item.get("imageUrl") or item.get("image") or item.get("images")
+    if isinstance(image_data, list) and len(image_data) > 0:
+        image = image_data[0]
+    elif isinstance(image_data, str):
+        image = image_data
+
+    # Marque/Brand
+    marque = (
+        item.get("brand") or 
+        item.get("brandName") or 
+        item.get("manufacturer") or
+        item.get("vendor") or
+        ""
+    )
+
+    # Catégorie
+    categorie = (
+        item.get("category") or 
+        item.get("categoryName") or 
+        item.get("productCategory") or
+        ""
+    )
+
+    # Note/Rating
+    note = "N/A"
+    rating_data = item.get("rating") or item.get("ratingValue") or item.get("score")
+    if rating_data:
+        if isinstance(rating_data, (int, float)):
+            note = str(rating_data)
+        else:
+            note = str(rating_data)
+
+    # MOQ (Minimum Order Quantity)
+    moq = (
+        item.get("moq") or 
+        item.get("minOrderQuantity") or 
+        item.get("minimumOrder") or
+        item.get("minOrder") or
+        "N/A"
+    )
+
+    # Supplier
+    supplier = (
+        item.get("supplierName") or 
+        item.get("supplier") or 
+        item.get("vendorName") or
+        item.get("companyName") or
+        ""
+    )
+
+    # Discount
+    discount = (
+        item.get("discount") or 
+        item.get("discountText") or 
+        item.get("sale") or
+        ""
+    )
+
+    produit = {
+        "nom": nom,
+        "prix": prix,
+        "prix_texte": prix_texte,
+        "lien": lien,
+        "image": image,
+        "marque": marque,
+        "categorie": categorie,
+        "note": note,
+        "moq": moq,
+        "source": "Alibaba (Apify)",
+        "supplier": supplier,
+        "discount": discount,
+        "product_id": item.get("productId") or item.get("id") or "",
+    }
+    return produit
+
+
+def lancer_run(keyword: str = "", category: str = "", limit: int = 20) -> Dict:
+    """
+    Lance un run de l'acteur Alibaba sans attendre sa fin.
     
     Args:
         keyword: Mot-clé de recherche
@@ -32,213 +220,208 @@ def search_products_apify(
         limit: Nombre maximum de résultats
         
     Returns:
-        Liste de produits
+        Données du run (id, status, defaultDatasetId...)
     """
-    if not APIFY_TOKEN:
-        raise ValueError(
-            "Token Apify non configuré. "
-            "Veuillez définir APIFY_TOKEN dans le fichier .env"
-        )
+    headers = _headers()
     
-    produits = []
+    # Paramètres pour le scraper
+    input_data = {
+        "maxItems": limit,
+    }
     
-    try:
-        # 1. Lancer l'acteur Apify
-        run_url = f"{APIFY_API_BASE_URL}/acts/{APIFY_ACTOR_ID}/runs"
+    if keyword:
+        input_data["searchQuery"] = keyword
+    if category:
+        input_data["category"] = category
+    
+    response = _get_session().post(
+        f"{APIFY_API_BASE_URL}/acts/{APIFY_ACTOR_ID}/runs",
+        json=input_data,
+        headers=headers,
+        timeout=30
+    )
+    response.raise_for_status()
+    run = response.json()["data"]
+    print(f"🚀 Run Apify lancé: {run['id']} ({keyword or category or 'Général'}, limite: {limit})")
+    return run
+
+
+def attendre_run(run_id: str, max_wait_time: int = MAX_WAIT_TIME) -> Dict:
+    """
+    Attend la fin d'un run (long-poll waitForFinish, puis délai croissant si besoin).
+    
+    Args:
+        run_id: Identifiant du run
+        max_wait_time: Durée maximale d'attente (secondes)
         
-        # Paramètres pour le scraper
-        input_data = {
-            "maxItems": limit,
-        }
+    Returns:
+        Données du run terminé avec succès
+        
+    Raises:
+        Exception: Run échoué, annulé, expiré ou trop long
+    """
+    headers = _headers()
+    status_url = f"{APIFY_API_BASE_URL}/actor-runs/{run_id}"
+    start_time = time.time()
+    delai = POLL_MIN
+    
+    while True:
+        restant = max_wait_time - (time.time() - start_time)
+        if restant <= 0:
+            raise Exception("Timeout: Le scraping prend trop de temps")
         
-        if keyword:
-            input_data["searchQuery"] = keyword
-        if category:
-            input_data["category"] = category
+        attente = int(min(WAIT_FOR_FINISH, restant))
+        debut_requete = time.time()
+        status_response = _get_session().get(
+            status_url, params={"waitForFinish": attente}, headers=headers, timeout=attente + 30
+        )
+        status_response.raise_for_status()
+        status_data = status_response.json()["data"]
         
-        headers = {
-            "Authorization": f"Bearer {APIFY_TOKEN}",
-            "Content-Type": "application/json"
-        }
+        status = status_data["status"]
         
-        print(f"🚀 Lancement du scraper Apify pour Alibaba...")
-        print(f"   Recherche: {keyword or category or 'Général'}")
-        print(f"   Limite: {limit}")
+        if status == "SUCCEEDED":
+            return status_data
+        elif status == "FAILED":
+            error = status_data.get("statusMessage", "Erreur inconnue")
+            raise Exception(f"Le run Apify a échoué: {error}")
+        elif status in ["ABORTED", "TIMED-OUT"]:
+            raise Exception(f"Le run Apify a été {status.lower()}")
         
-        # Lancer le run
-        response = requests.post(
-            run_url,
-            json=input_data,
+        # Le serveur a répondu avant la fin du long-poll : ne pas le réinterroger en boucle
+        if time.time() - debut_requete < attente:
+            time.sleep(min(delai, max(0, max_wait_time - (time.time() - start_time))))
+            delai = min(delai * 2, POLL_MAX)
+
+
+def iter_pages_dataset(dataset_id: str, limit: Optional[int] = None,
+                       page_size: Optional[int] = None) -> Iterator[List[Dict]]:
+    """
+    Lit le dataset d'un run page par page : seuls les `limit` premiers items et les
+    colonnes de CHAMPS_DATASET sont transférés, chaque page est convertie dès sa réception.
+    
+    Args:
+        dataset_id: Identifiant du dataset (defaultDatasetId du run)
+        limit: Nombre maximum d'items lus
+        page_size: Items par requête (défaut: DATASET_PAGE_SIZE)
+        
+    Returns:
+        Itérateur de pages de produits convertis
+    """
+    headers = _headers()
+    dataset_url = f"{APIFY_API_BASE_URL}/datasets/{dataset_id}/items"
+    page_size = page_size or DATASET_PAGE_SIZE
+    offset = 0
+    
+    while limit is None or offset < limit:
+        taille = page_size if limit is None else min(page_size, limit - offset)
+        response = _get_session().get(
+            dataset_url,
+            params={"offset": offset, "limit": taille, "clean": 1, "format": "json", "fields": CHAMPS_DATASET},
             headers=headers,
             timeout=30
         )
         response.raise_for_status()
+        items = response.json()
+        if items:
+            yield [convertir_item(item) for item in items]
+        if len(items) < taille:
+            return
+        offset += len(items)
+
+
+def _suivre_run(recherche: Dict, run: Dict,
+                sur_page: Optional[Callable[[Dict, List[Dict], int], None]]) -> List[Dict]:
+    # Attente du run puis lecture du dataset, chaque page est transmise dès son arrivée
+    if run.get("status") != "SUCCEEDED":
+        run = attendre_run(run["id"])
+    produits = []
+    for numero, page in enumerate(iter_pages_dataset(run["defaultDatasetId"], recherche.get("limit", 20))):
+        if sur_page:
+            sur_page(recherche, page, numero)
+        produits.extend(page)
+    return produits
+
+
+def executer_recherches(
+    recherches: List[Dict],
+    sur_page: Optional[Callable[[Dict, List[Dict], int], None]] = None,
+    max_workers: int = RUNS_PARALLELES
+) -> List[Dict]:
+    """
+    Lance toutes les recherches sur Apify d'un coup puis suit les runs en parallèle.
+    
+    Args:
+        recherches: Liste de {"type": 'keyword'|'category'|'general', "valeur": ..., "limit": ...}
+        sur_page: Callback (recherche, produits de la page, numéro de page à partir de 0)
+            appelé depuis un thread du pool dès qu'une page du dataset est lue
+        max_workers: Nombre de runs suivis simultanément
         
-        run_data = response.json()
-        run_id = run_data["data"]["id"]
+    Returns:
+        Un résultat par recherche, dans l'ordre : {"recherche", "produits", "erreur"}
+        (erreur: None ou l'exception levée pour cette recherche)
+    """
+    resultats = [{"recherche": recherche, "produits": [], "erreur": None} for recherche in recherches]
+    
+    # 1. Lancer tous les runs (quelques requêtes courtes)
+    runs = {}
+    for i, recherche in enumerate(recherches):
+        valeur = recherche.get("valeur", "")
+        try:
+            if recherche.get("type") == "category":
+                runs[i] = lancer_run(category=valeur, limit=recherche.get("limit", 20))
+            else:  # keyword, general
+                runs[i] = lancer_run(keyword=valeur, limit=recherche.get("limit", 20))
+        except Exception as e:
+            resultats[i]["erreur"] = e
+    
+    if not runs:
+        return resultats
+    
+    # 2. Suivre les runs en parallèle : le premier terminé est lu en premier
+    print(f"⏳ {len(runs)} runs Apify en cours...")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(runs)))) as executor:
+        futures = {
+            executor.submit(_suivre_run, recherches[i], run, sur_page): i for i, run in runs.items()
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                resultats[i]["produits"] = future.result()
+            except Exception as e:
+                resultats[i]["erreur"] = e
+    
+    return resultats
+
+
+def search_products_apify(
+    keyword: str = "",
+    category: str = "",
+    limit: int = 20
+) -> List[Dict]:
+    """
+    Recherche de produits Alibaba via Apify.
+    
+    Args:
+        keyword: Mot-clé de recherche
+        category: Catégorie (optionnel)
+        limit: Nombre maximum de résultats
         
-        print(f"✅ Run Apify lancé: {run_id}")
+    Returns:
+        Liste de produits
+    """
+    _headers()  # ValueError si le token n'est pas configuré
+    
+    produits = []
+    
+    try:
+        run = lancer_run(keyword, category, limit)
         print(f"⏳ Attente des résultats...")
+        run = attendre_run(run["id"])
+        print("✅ Scraping terminé avec succès")
         
-        # 2. Attendre que le run se termine
-        status_url = f"{APIFY_API_BASE_URL}/actor-runs/{run_id}"
-        max_wait_time = 300  # 5 minutes max
-        start_time = time.time()
-        
-        while True:
-            status_response = requests.get(status_url, headers=headers, timeout=30)
-            status_response.raise_for_status()
-            status_data = status_response.json()["data"]
-            
-            status = status_data["status"]
-            
-            if status == "SUCCEEDED":
-                print("✅ Scraping terminé avec succès")
-                break
-            elif status == "FAILED":
-                error = status_data.get("statusMessage", "Erreur inconnue")
-                raise Exception(f"Le run Apify a échoué: {error}")
-            elif status in ["ABORTED", "TIMED-OUT"]:
-                raise Exception(f"Le run Apify a été {status.lower()}")
-            
-            # Vérifier le timeout
-            if time.time() - start_time > max_wait_time:
-                raise Exception("Timeout: Le scraping prend trop de temps")
-            
-            # Attendre avant de re-vérifier
-            time.sleep(2)
-        
-        # 3. Récupérer les résultats
-        dataset_id = status_data["defaultDatasetId"]
-        dataset_url = f"{APIFY_API_BASE_URL}/datasets/{dataset_id}/items"
-        
-        results_response = requests.get(dataset_url, headers=headers, timeout=30)
-        results_response.raise_for_status()
-        results = results_response.json()
-        
-        print(f"📦 {len(results)} résultats récupérés depuis Apify")
-        
-        # 4. Convertir les résultats au format attendu
-        # Apify peut retourner différentes structures, on essaie plusieurs clés possibles
-        for item in results[:limit]:
-            # Nom du produit - essayer plusieurs clés possibles
-            nom = (
-                item.get("title") or 
-                item.get("name") or 
-                item.get("productName") or 
-                item.get("productTitle") or
-                item.get("subject") or
-                "Produit sans nom"
-            )
-            
-            # Prix - gérer différents formats
-            prix = 0.0
-            prix_texte = "Prix sur demande"
-            
-            price_data = item.get("price")
-            if price_data:
-                if isinstance(price_data, dict):
-                    prix = float(price_data.get("value", 0) or price_data.get("amount", 0) or 0)
-                    prix_texte = price_data.get("text") or price_data.get("priceText") or f"${prix:.2f}"
-                elif isinstance(price_data, (int, float)):
-                    prix = float(price_data)
-                    prix_texte = f"${prix:.2f}"
-                elif isinstance(price_data, str):
-                    prix_texte = price_data
-                    # Essayer d'extraire un nombre
-                    prix_match = re.search(r'[\d.]+', price_data.replace(',', ''))
-                    if prix_match:
-                        prix = float(prix_match.group())
-            
-            # Si pas de prix trouvé, essayer priceText directement
-            if not prix_texte or prix_texte == "Prix sur demande":
-                prix_texte = item.get("priceText") or item.get("priceRange") or "Prix sur demande"
-            
-            # Lien/URL
-            lien = (
-                item.get("url") or 
-                item.get("productUrl") or 
-                item.get("link") or
-                item.get("href") or
-                ""
-            )
-            
-            # Image - peut être une liste ou une string
-            image = ""
-            image_data = item.get("imageUrl") or item.get("image") or item.get("images")
-            if isinstance(image_data, list) and len(image_data) > 0:
-                image = image_data[0]
-            elif isinstance(image_data, str):
-                image = image_data
-            
-            # Marque/Brand
-            marque = (
-                item.get("brand") or 
-                item.get("brandName") or 
-                item.get("manufacturer") or
-                item.get("vendor") or
-                ""
-            )
-            
-            # Catégorie
-            categorie = (
-                item.get("category") or 
-                item.get("categoryName") or 
-                item.get("productCategory") or
-                ""
-            )
-            
-            # Note/Rating
-            note = "N/A"
-            rating_data = item.get("rating") or item.get("ratingValue") or item.get("score")
-            if rating_data:
-                if isinstance(rating_data, (int, float)):
-                    note = str(rating_data)
-                else:
-                    note = str(rating_data)
-            
-            # MOQ (Minimum Order Quantity)
-            moq = (
-                item.get("moq") or 
-                item.get("minOrderQuantity") or 
-                item.get("minimumOrder") or
-                item.get("minOrder") or
-                "N/A"
-            )
-            
-            # Supplier
-            supplier = (
-                item.get("supplierName") or 
-                item.get("supplier") or 
-                item.get("vendorName") or
-                item.get("companyName") or
-                ""
-            )
-            
-            # Discount
-            discount = (
-                item.get("discount") or 
-                item.get("discountText") or 
-                item.get("sale") or
-                ""
-            )
-            
-            produit = {
-                "nom": nom,
-                "prix": prix,
-                "prix_texte": prix_texte,
-                "lien": lien,
-                "image": image,
-                "marque": marque,
-                "categorie": categorie,
-                "note": note,
-                "moq": moq,
-                "source": "Alibaba (Apify)",
-                "supplier": supplier,
-                "discount": discount,
-                "product_id": item.get("productId") or item.get("id") or "",
-            }
-            produits.append(produit)
+        for page in iter_pages_dataset(run["defaultDatasetId"], limit):
+            produits.extend(page)
         
         print(f"✅ {len(produits)} produits convertis et prêts")
         
@@ -7,6 +7,9 @@ from typing import List, Dict, Optional
 import time
 import re
 
+from catalogue import indexer_sans_erreur
+from http_cache import fragment_sans_scripts, get_produits
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -195,55 +198,9 @@ def scraper_alibaba_recherche(terme: str = "", categorie: str = "", limit: int =
         
         print(f"Scraping Alibaba: {url}")
         
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Sélecteurs possibles pour les produits Alibaba
-        # Alibaba utilise différents sélecteurs selon la page - améliorés
-        product_selectors = [
-            '.gallery-offer-outter',
-            '.gallery-offer',
-            '.organic-gallery-offer',
-            '.list-item',
-            '.item-main',
-            '.product-item',
-            '.offer-item',
-            '[data-content-name="product"]',
-            'div[data-product-id]',
-            '.card-item',
-            '.search-card-item'
-        ]
-        
-        product_elements = []
-        for selector in product_selectors:
-            elements = soup.select(selector)
-            if elements:
-                product_elements = elements
-                print(f"Trouvé {len(elements)} produits avec le sélecteur: {selector}")
-                break
-        
-        if not product_elements:
-            # Fallback: chercher tous les éléments avec des liens vers des produits
-            product_links = soup.select('a[href*="/product-detail/"], a[href*="/offer/"], a[href*="/product/"]')
-            print(f"Liens produits trouvés: {len(product_links)}")
-            
-            # Prendre les parents pour avoir le conteneur complet
-            seen = set()
-            for link in product_links:
-                parent = link.find_parent(['div', 'li', 'article', 'section'])
-                if parent and id(parent) not in seen:
-                    product_elements.append(parent)
-                    seen.add(id(parent))
-        
-        print(f"Total éléments trouvés: {len(product_elements)}")
-        
-        for element in product_elements[:limit]:
-            produit = extraire_donnees_produit(element)
-            if produit:
-                produits.append(produit)
-        
+        # Requête conditionnelle ; la page n'est analysée que si elle a changé (voir http_cache)
+        produits = get_produits(url, _extraire_page, fragment=fragment_sans_scripts,
+                                headers=HEADERS, timeout=15)[:limit]
         print(f"Produits extraits avec succès: {len(produits)}")
         
         # Si aucun produit trouvé, retourner des données de démonstration
@@ -271,6 +228,62 @@ def scraper_alibaba_recherche(terme: str = "", categorie: str = "", limit: int =
     return produits
 
 
+def _extraire_page(response: requests.Response) -> List[Dict]:
+    """
+    Extrait tous les produits d'une page de recherche Alibaba.
+    
+    Args:
+        response: Réponse HTTP de la page
+        
+    Returns:
+        Liste de produits (vide si aucun sélecteur ne correspond)
+    """
+    soup = BeautifulSoup(response.content, 'html.parser')
+    
+    # Sélecteurs possibles pour les produits Alibaba
+    # Alibaba utilise différents sélecteurs selon la page - améliorés
+    product_selectors = [
+        '.gallery-offer-outter',
+        '.gallery-offer',
+        '.organic-gallery-offer',
+        '.list-item',
+        '.item-main',
+        '.product-item',
+        '.offer-item',
+        '[data-content-name="product"]',
+        'div[data-product-id]',
+        '.card-item',
+        '.search-card-item'
+    ]
+    
+    product_elements = []
+    for selector in product_selectors:
+        elements = soup.select(selector)
+        if elements:
+            product_elements = elements
+            print(f"Trouvé {len(elements)} produits avec le sélecteur: {selector}")
+            break
+    
+    if not product_elements:
+        # Fallback: chercher tous les éléments avec des liens vers des produits
+        product_links = soup.select('a[href*="/product-detail/"], a[href*="/offer/"], a[href*="/product/"]')
+        print(f"Liens produits trouvés: {len(product_links)}")
+        
+        # Prendre les parents pour avoir le conteneur complet
+        seen = set()
+        for link in product_links:
+            parent = link.find_parent(['div', 'li', 'article', 'section'])
+            if parent and id(parent) not in seen:
+                product_elements.append(parent)
+                seen.add(id(parent))
+    
+    print(f"Total éléments trouvés: {len(product_elements)}")
+    
+    # Tous les éléments sont extraits : le cache sert ensuite n'importe quel `limit`
+    produits = [produit for produit in map(extraire_donnees_produit, product_elements) if produit]
+    return indexer_sans_erreur(produits, "alibaba")  # Rattachés au catalogue (une fois par page analysée)
+
+
 def get_demo_data(limit: int = 5) -> List[Dict]:
     """
     Retourne des données de démonstration pour tester l'interface.
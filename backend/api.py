@@ -1,9 +1,10 @@
 """
 API FastAPI pour l'analyse de produits e-commerce
 """
-from fastapi import FastAPI, HTTPException, APIRouter
+from fastapi import FastAPI, HTTPException, APIRouter, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from datetime import datetime
@@ -12,75 +13,124 @@ import os
 import re
 import sqlite3
 import json
+import io
+import csv
+import tempfile
 import logging
+import importlib.util
+import threading
+import anyio.to_thread
 
 # Ajouter le répertoire parent au path pour importer les modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai import analyse_produit
-from csv_generator import generate_csv
-from jumia_scraper import scraper_jumia_best_sellers, scraper_jumia_categorie, scraper_jumia_recherche
-import logging
+from log_config import configurer_logging
+configurer_logging()  # Logs via une file + thread d'écriture, avant les basicConfig des modules importés
+
+import instrumentation
+instrumentation.installer()  # Chronométrage de requests / httpx (OpenAI) / sqlite3 avant tout usage
+
+from lazy_loader import (
+    fonctions_paresseuses, module_paresseux, objet_paresseux, prechauffer, rapport_chargement
+)
+from csv_generator import iter_csv_produits
 
 logger = logging.getLogger(__name__)
 
-# Import Alibaba - Essayer Apify d'abord, sinon fallback sur scraper
-from alibaba_scraper import scraper_alibaba_best_sellers, scraper_alibaba_categorie, scraper_alibaba_recherche
+# Modules lourds (OpenAI, pyarrow/pandas, pytrends, BeautifulSoup, Pillow, WooCommerce, holidays)
+# chargés au premier usage ou par le préchauffage en arrière-plan (voir lazy_loader)
+analyse_produit, = fonctions_paresseuses("ai", "analyse_produit")
+scraper_jumia_best_sellers, scraper_jumia_categorie, scraper_jumia_recherche = fonctions_paresseuses(
+    "jumia_scraper", "scraper_jumia_best_sellers", "scraper_jumia_categorie", "scraper_jumia_recherche"
+)
 
-# Import système de cache DB
-from database import get_products_from_db, save_products_to_db, init_database
+# Import Alibaba - Essayer Apify d'abord, sinon fallback sur scraper
+scraper_alibaba_best_sellers, scraper_alibaba_categorie, scraper_alibaba_recherche = fonctions_paresseuses(
+    "alibaba_scraper", "scraper_alibaba_best_sellers", "scraper_alibaba_categorie", "scraper_alibaba_recherche"
+)
 
-try:
-    from alibaba_apify import search_products_apify
-    ALIBABA_APIFY_AVAILABLE = True
-except ImportError:
-    ALIBABA_APIFY_AVAILABLE = False
-    print("⚠️ Module alibaba_apify non disponible, utilisation du scraper uniquement")
+# Import système de cache DB (la base est initialisée à l'import du module)
+get_products_from_db, save_products_to_db = fonctions_paresseuses(
+    "database", "get_products_from_db", "save_products_to_db"
+)
 
-# Initialiser les DBs au démarrage
-init_database()  # Alibaba cache
+# Une dépendance manquante lève ImportError à l'appel : la route bascule alors sur le scraper
+ALIBABA_APIFY_AVAILABLE = importlib.util.find_spec("alibaba_apify") is not None
+search_products_apify, = fonctions_paresseuses("alibaba_apify", "search_products_apify")
 
 # Import depuis le même répertoire (backend)
-from boutique_csv import generate_boutique_csv_wordpress, generate_boutique_csv_shopify
-from marketing import generer_descriptif_marketing, generer_descriptifs_batch, sauvegarder_campagne, get_campagnes
-from boutique_descriptions import generer_description_seo, generer_descriptions_batch_boutique, generer_description_seo_simple
+from boutique_csv import iter_boutique_csv
+image_variants = module_paresseux("image_variants")
+generer_descriptif_marketing, generer_descriptifs_batch, sauvegarder_campagne, get_campagnes = fonctions_paresseuses(
+    "marketing", "generer_descriptif_marketing", "generer_descriptifs_batch", "sauvegarder_campagne", "get_campagnes"
+)
+generer_description_seo, generer_descriptions_batch_boutique, generer_description_seo_simple = fonctions_paresseuses(
+    "boutique_descriptions",
+    "generer_description_seo", "generer_descriptions_batch_boutique", "generer_description_seo_simple"
+)
 # Marketplace déplacé vers marketplace-backend séparé
-from marketing_seo import generer_description_seo_marketing
-from journal_vente import (
-    init_journal_db, ajouter_vente, get_ventes, get_vente_par_id,
+generer_description_seo_marketing, = fonctions_paresseuses("marketing_seo", "generer_description_seo_marketing")
+# Journal des ventes (tables + agrégats journaliers créés au premier usage)
+(
+    ajouter_vente, get_ventes, get_vente_par_id,
     modifier_vente, supprimer_vente, get_statistiques, get_ventes_par_periode,
+    get_statistiques_mensuelles, reconstruire_agregats,
+    importer_ventes, lire_lignes_csv, lire_lignes_jsonl, encoder_curseur,
     creer_boutique, get_boutiques, get_boutique_par_id,
     modifier_boutique, supprimer_boutique
+) = fonctions_paresseuses(
+    "journal_vente",
+    "ajouter_vente", "get_ventes", "get_vente_par_id",
+    "modifier_vente", "supprimer_vente", "get_statistiques", "get_ventes_par_periode",
+    "get_statistiques_mensuelles", "reconstruire_agregats",
+    "importer_ventes", "lire_lignes_csv", "lire_lignes_jsonl", "encoder_curseur",
+    "creer_boutique", "get_boutiques", "get_boutique_par_id",
+    "modifier_boutique", "supprimer_boutique",
+    init=lambda module: module.init_journal_db()
 )
-from google_trends import (
-    get_trends_data, compare_keywords, get_seasonal_trends, get_related_topics
+exporter_historique, = fonctions_paresseuses("export_colonnes", "exporter_historique")
+generer_rapport, = fonctions_paresseuses("rapports_ventes", "generer_rapport")
+get_trends_data, compare_keywords, get_seasonal_trends, get_related_topics = fonctions_paresseuses(
+    "google_trends", "get_trends_data", "compare_keywords", "get_seasonal_trends", "get_related_topics"
 )
-from trends_validator import (
-    validate_product_trend, validate_multiple_products, compare_jumia_vs_trends
+validate_product_trend, validate_multiple_products, compare_jumia_vs_trends = fonctions_paresseuses(
+    "trends_validator", "validate_product_trend", "validate_multiple_products", "compare_jumia_vs_trends"
+)
+analyser_niche, = fonctions_paresseuses("niche_validator", "analyser_niche")
+# Catalogue dédoublonné (Jumia, Alibaba, marketplace)
+get_catalogue, get_produit_canonique, reindexer_sources_existantes = fonctions_paresseuses(
+    "catalogue", "get_catalogue", "get_produit_canonique", "reindexer_sources_existantes"
 )
-from niche_validator import analyser_niche
 # Import marketplace_db pour les routes marketplace restantes (compatibilité)
 from marketplace_db import (
+    DB_PATH,
+    enregistrer_publications_woocommerce,
     get_produit_by_id,
     get_produits_marketplace,
     get_produits_par_categorie,
+    iter_produits_marketplace,
     mettre_a_jour_statut_produit,
     supprimer_produit,
     enregistrer_evenement
 )
-from connectors.wp_connector import WooCommerceConnector
+from connectors.wc_sync import construire_produit_wc, hash_produit_wc, synchroniser_woocommerce
+from dashboard_metrics import SQL_ALERTE_PRIX, metrics as dashboard_metrics
 
 app = FastAPI(title="E-commerce Recommender API", version="1.0.0")
 
-# Initialiser le connecteur WooCommerce et l'Orchestrateur IA
-wc_connector = WooCommerceConnector()
-from brain.orchestrator import AIOrchestrator
-from brain.memory import DecisionMemory
-from agents.meta_ads_agent import MetaAdsAgent
+# Nombre maximum de routes bloquantes exécutées en parallèle (voir configurer_pool_threads)
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "40"))
+
+# Initialiser le connecteur WooCommerce et l'Orchestrateur IA (construits au premier usage)
+WooCommerceConnector, = fonctions_paresseuses("connectors.wp_connector", "WooCommerceConnector")
+AIOrchestrator, = fonctions_paresseuses("brain.orchestrator", "AIOrchestrator")
+DecisionMemory, = fonctions_paresseuses("brain.memory", "DecisionMemory")
+MetaAdsAgent, = fonctions_paresseuses("agents.meta_ads_agent", "MetaAdsAgent")
 
-orchestrator = AIOrchestrator()
-memory = DecisionMemory()
-meta_agent = MetaAdsAgent()
+wc_connector = objet_paresseux("wc_connector", WooCommerceConnector)
+orchestrator = objet_paresseux("orchestrator", AIOrchestrator)
+memory = objet_paresseux("memory", DecisionMemory)
+meta_agent = objet_paresseux("meta_agent", MetaAdsAgent)
 
 # Router séparé pour les routes avec {product_id} - Force l'enregistrement correct
 # Pas de prefix pour éviter les conflits avec la route générale
@@ -95,6 +145,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latence par route (GET /metrics) et profilage des requêtes lentes (PROFILER_SEUIL_MS)
+instrumentation.installer_middleware(app)
+
 # IMPORTANT: Inclure le router IMMÉDIATEMENT après la configuration CORS
 # pour s'assurer qu'il est enregistré avant toutes les autres routes
 # (sera inclus plus tard après la définition des routes du router)
@@ -104,28 +157,77 @@ app.add_middleware(
 # ENDPOINTS DASHBOARD / AI CONTEXT
 # =========================
 
+@app.on_event("startup")
+async def configurer_pool_threads():
+    """
+    Les routes synchrones (SQLite, requests, OpenAI, pytrends) sont exécutées
+    dans le pool de threads d'AnyIO et ne bloquent pas la boucle d'événements ;
+    sa taille borne le nombre d'appels bloquants simultanés.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+
+
+@app.on_event("startup")
+def demarrer_arriere_plan():
+    """
+    Hors du chemin de démarrage (le port est ouvert sans attendre) : charge les
+    compteurs du tableau de bord, lance leur réconciliation périodique, puis
+    préchauffe les modules paresseux.
+    """
+    def demarrer():
+        try:
+            dashboard_metrics.demarrer_reconciliation()
+        except Exception as e:
+            logger.error("Erreur chargement des compteurs du tableau de bord: %s", e)
+        prechauffer(en_arriere_plan=False)
+
+    threading.Thread(target=demarrer, name="demarrage", daemon=True).start()
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Histogrammes de latence (routes et dépendances externes) au format texte Prometheus."""
+    return PlainTextResponse(instrumentation.registre.exporter(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/debug/chargement")
+def get_rapport_chargement():
+    """Modules lourds chargés à la demande : état, déclencheur et durée d'import."""
+    return rapport_chargement()
+
+
+@app.on_event("shutdown")
+def arreter_compteurs_dashboard():
+    dashboard_metrics.arreter_reconciliation()
+
+
 @app.get("/api/dashboard/stats")
 def get_dashboard_stats():
-    """Returns general stats and AI market context."""
-    from brain.calendar import SenegalContext
-    sn = SenegalContext()
+    """Returns general stats (in-memory counters) and AI market context."""
+    from brain.calendar import get_senegal_context
+    sn = get_senegal_context()
     
-    # En situation réelle, on compterait en DB
     return {
-        "products_total": 124, 
-        "products_draft": 5, 
-        "jumia_alerts": 12,
-        "campaigns_active": 2,
+        **dashboard_metrics.snapshot(),
         "market_context": sn.get_current_context(),
         "marketing_boost": sn.get_marketing_boost_factor()
     }
 
+
+@app.post("/api/dashboard/stats/reconcile")
+def reconcilier_stats_dashboard():
+    """Recalcule immédiatement les compteurs depuis les bases et renvoie les écarts corrigés."""
+    try:
+        ecarts = dashboard_metrics.reconcilier()
+        return {"success": True, "drift": ecarts, "stats": dashboard_metrics.snapshot()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur réconciliation: {str(e)}")
+
 @app.get("/api/brain/decisions")
-def get_ai_decisions(limit: int = 5):
-    """Returns recent AI decisions from memory."""
-    from brain.memory import DecisionMemory
-    mem = DecisionMemory()
-    decisions = mem.get_recent_decisions(limit=limit)
+def get_ai_decisions(limit: int = 5, action: Optional[str] = None, trend_id: Optional[str] = None,
+                     before_id: Optional[int] = None):
+    """Returns recent AI decisions from memory (filter by action / trend_id, page with before_id)."""
+    decisions = memory.get_recent_decisions(limit=limit, action=action, trend_id=trend_id, before_id=before_id)
     
     formatted = []
     for d in decisions:
@@ -140,6 +242,45 @@ def get_ai_decisions(limit: int = 5):
         })
     return formatted
 
+
+class BatchEvaluationRequest(BaseModel):
+    trend_ids: List[str]
+    base_scores: List[float]
+    persist: bool = True
+
+
+@app.post("/api/brain/evaluate-batch")
+def evaluate_trends_batch(request: BatchEvaluationRequest):
+    """Scores many trends at once against the market context (NumPy) and logs them in one write."""
+    try:
+        decisions, reasoning, context = orchestrator.evaluate_batch(
+            request.trend_ids, request.base_scores, memory=memory if request.persist else None
+        )
+        return {
+            "count": len(decisions),
+            "reasoning": reasoning,
+            "context": json.loads(context),
+            "trend_ids": decisions["trend_id"].tolist(),
+            "final_scores": decisions["final_score"].tolist(),
+            "publish": decisions["publish"].tolist(),
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur évaluation: {str(e)}")
+
+
+@app.post("/api/brain/decisions/compact")
+def compact_ai_decisions(retention_days: int = 90):
+    """Rolls decisions older than retention_days into daily summaries and deletes them."""
+    try:
+        removed = memory.compact(retention_days=retention_days)
+        return {"success": True, "removed": removed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur compaction: {str(e)}")
+
 # =========================
 # MODÈLES PYDANTIC
 # =========================
@@ -170,6 +311,7 @@ class CSVRequest(BaseModel):
 class BoutiqueCSVRequest(BaseModel):
     produits: List[Dict]
     export_type: str = "wordpress"  # "wordpress" ou "shopify"
+    gzip: bool = False
 
 
 class MarketingDescriptionRequest(BaseModel):
@@ -340,6 +482,17 @@ def analyser_produit(request: AnalyseRequest):
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analyse: {str(e)}")
 
 
+def _reponse_csv(flux, prefixe: str, gzip: bool = False) -> StreamingResponse:
+    """Enveloppe un flux CSV dans une réponse téléchargeable (les octets partent dès la première ligne)."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{prefixe}_{timestamp}.csv" + (".gz" if gzip else "")
+    return StreamingResponse(
+        flux,
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
 @app.post("/api/generate-csv")
 def generer_csv(request: CSVRequest):
     """
@@ -349,26 +502,16 @@ def generer_csv(request: CSVRequest):
         request: Requête contenant la liste des produits
         
     Returns:
-        Fichier CSV téléchargeable
+        Fichier CSV téléchargeable (diffusé en flux)
     """
     try:
-        csv_file = generate_csv(request.produits)
-        
-        if not os.path.exists(csv_file):
-            raise HTTPException(status_code=404, detail="Fichier CSV non trouvé")
-        
-        return FileResponse(
-            csv_file,
-            media_type="text/csv",
-            filename=csv_file,
-            headers={"Content-Disposition": f"attachment; filename={csv_file}"}
-        )
+        return _reponse_csv(iter_csv_produits(request.produits), "produits_wordpress")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération du CSV: {str(e)}")
 
 
 @app.get("/api/categories")
-async def get_categories():
+def get_categories():
     """
     Retourne la liste des catégories disponibles sur Jumia Sénégal.
     
@@ -392,7 +535,7 @@ async def get_categories():
 
 
 @app.get("/api/categories-alibaba")
-async def get_categories_alibaba():
+def get_categories_alibaba():
     """
     Retourne la liste des catégories disponibles sur Alibaba.
     
@@ -519,7 +662,7 @@ def veille_alibaba(categorie: Optional[str] = None, terme: Optional[str] = None,
         
         # 2. Si pas de cache, utiliser Apify ou scraper
         if not produits:
-            print(f"💾 Cache vide, lancement d'un nouveau scraping...")
+            logger.info("Cache vide, lancement d'un nouveau scraping...")
             
             if ALIBABA_APIFY_AVAILABLE:
                 try:
@@ -533,12 +676,11 @@ def veille_alibaba(categorie: Optional[str] = None, terme: Optional[str] = None,
                     # Sauvegarder dans le cache pour la prochaine fois
                     if produits:
                         save_products_to_db(produits, recherche_type, recherche_valeur)
-                        print(f"💾 {len(produits)} produits sauvegardés dans le cache")
+                        logger.info("%d produits sauvegardés dans le cache", len(produits))
                     
                 except ValueError as e:
                     # Token Apify non configuré, utiliser le scraper
-                    print(f"⚠️ Apify non configuré: {e}")
-                    print("💡 Utilisation du scraper en fallback")
+                    logger.warning("Apify non configuré (%s), utilisation du scraper en fallback", e)
                     if categorie and categorie.strip():
                         produits = scraper_alibaba_categorie(categorie.strip(), limit)
                     elif terme and terme.strip():
@@ -547,8 +689,7 @@ def veille_alibaba(categorie: Optional[str] = None, terme: Optional[str] = None,
                         produits = scraper_alibaba_best_sellers(limit=limit)
                 except Exception as e:
                     # Erreur Apify, utiliser le scraper en fallback
-                    print(f"⚠️ Erreur Apify: {e}")
-                    print("💡 Utilisation du scraper en fallback")
+                    logger.warning("Erreur Apify (%s), utilisation du scraper en fallback", e)
                     if categorie and categorie.strip():
                         produits = scraper_alibaba_categorie(categorie.strip(), limit)
                     elif terme and terme.strip():
@@ -564,7 +705,7 @@ def veille_alibaba(categorie: Optional[str] = None, terme: Optional[str] = None,
                 else:
                     produits = scraper_alibaba_best_sellers(limit=limit)
         else:
-            print(f"✅ Utilisation du cache (économise un appel Apify)")
+            logger.debug("Utilisation du cache (économise un appel Apify)")
         
         # Tri des produits selon le paramètre
         if tri == "prix":
@@ -607,46 +748,57 @@ def veille_alibaba(categorie: Optional[str] = None, terme: Optional[str] = None,
 
 
 @app.post("/api/generate-boutique-csv")
-async def generer_boutique_csv(request: BoutiqueCSVRequest):
+def generer_boutique_csv(request: BoutiqueCSVRequest):
     """
     Génère un fichier CSV pour créer une boutique (WordPress/WooCommerce ou Shopify).
     
     Args:
-        request: Requête contenant la liste des produits et le type d'export
+        request: Requête contenant la liste des produits, le type d'export et l'option gzip
         
     Returns:
-        Fichier CSV téléchargeable
+        Fichier CSV téléchargeable (diffusé en flux)
     """
     try:
         if not request.produits or len(request.produits) == 0:
             raise HTTPException(status_code=400, detail="Aucun produit à exporter")
         
-        # Générer le CSV selon le type
-        if request.export_type == "shopify":
-            csv_file = generate_boutique_csv_shopify(request.produits)
-        else:  # wordpress par défaut
-            csv_file = generate_boutique_csv_wordpress(request.produits)
-        
-        if not os.path.exists(csv_file):
-            raise HTTPException(status_code=404, detail="Fichier CSV non trouvé")
-        
-        return FileResponse(
-            csv_file,
-            media_type="text/csv",
-            filename=csv_file,
-            headers={"Content-Disposition": f"attachment; filename={csv_file}"}
-        )
+        export_type = "shopify" if request.export_type == "shopify" else "wordpress"
+        flux = iter_boutique_csv(request.produits, export_type, gzip=request.gzip)
+        return _reponse_csv(flux, f"boutique_{export_type}", gzip=request.gzip)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération du CSV: {str(e)}")
 
 
+@app.get("/api/export-boutique-csv")
+def exporter_boutique_csv(
+    export_type: str = "wordpress",
+    status: Optional[str] = "active",
+    categorie: Optional[str] = None,
+    gzip: bool = False
+):
+    """
+    Exporte le catalogue du marketplace en CSV boutique, directement depuis la base.
+    Les produits sont lus par lots et les lignes diffusées au fil de l'eau :
+    la mémoire reste constante quelle que soit la taille du catalogue.
+    
+    Args:
+        export_type: "wordpress" (défaut) ou "shopify"
+        status: Statut des produits à exporter (défaut: active)
+        categorie: Filtrer par catégorie
+        gzip: Compresser le fichier à la volée
+    """
+    export_type = "shopify" if export_type == "shopify" else "wordpress"
+    produits = iter_produits_marketplace(status=status, categorie=categorie)
+    return _reponse_csv(iter_boutique_csv(produits, export_type, gzip=gzip), f"boutique_{export_type}", gzip=gzip)
+
+
 # =========================
 # ENDPOINTS MARKETING
 # =========================
 @app.post("/api/marketing/generate-description")
-async def generate_marketing_description(request: MarketingDescriptionRequest):
+def generate_marketing_description(request: MarketingDescriptionRequest):
     """
     Génère un descriptif marketing attractif pour un produit.
     Utilise le cache pour éviter les appels API répétés.
@@ -669,7 +821,7 @@ async def generate_marketing_description(request: MarketingDescriptionRequest):
 
 
 @app.post("/api/marketing/generate-batch")
-async def generate_marketing_batch(request: MarketingBatchRequest):
+def generate_marketing_batch(request: MarketingBatchRequest):
     """
     Génère des descriptifs marketing pour plusieurs produits en batch.
     Optimisé pour utiliser le cache au maximum.
@@ -692,7 +844,7 @@ async def generate_marketing_batch(request: MarketingBatchRequest):
 
 
 @app.post("/api/marketing/campaign")
-async def save_campaign(request: CampaignRequest):
+def save_campaign(request: CampaignRequest):
     """
     Sauvegarde une campagne Facebook dans la base de données.
     
@@ -721,7 +873,7 @@ async def save_campaign(request: CampaignRequest):
 
 
 @app.get("/api/marketing/campaigns")
-async def get_all_campaigns():
+def get_all_campaigns():
     """
     Récupère toutes les campagnes sauvegardées.
     
@@ -743,7 +895,7 @@ async def get_all_campaigns():
 # ENDPOINTS DESCRIPTIONS BOUTIQUE
 # =========================
 @app.post("/api/boutique/generate-description")
-async def generate_boutique_description(request: BoutiqueDescriptionRequest):
+def generate_boutique_description(request: BoutiqueDescriptionRequest):
     """
     Génère une description SEO-friendly pour un produit de boutique.
     Utilise le cache pour éviter les appels API répétés.
@@ -766,7 +918,7 @@ async def generate_boutique_description(request: BoutiqueDescriptionRequest):
 
 
 @app.post("/api/boutique/generate-descriptions-batch")
-async def generate_boutique_descriptions_batch(request: BoutiqueDescriptionBatchRequest):
+def generate_boutique_descriptions_batch(request: BoutiqueDescriptionBatchRequest):
     """
     Génère des descriptions SEO-friendly pour plusieurs produits en batch.
     Optimisé pour utiliser le cache au maximum.
@@ -789,7 +941,7 @@ async def generate_boutique_descriptions_batch(request: BoutiqueDescriptionBatch
 
 
 @app.post("/api/marketing/generate-seo")
-async def generate_seo_description(request: SEODescriptionRequest):
+def generate_seo_description(request: SEODescriptionRequest):
     """
     Génère une description SEO-friendly à partir d'un texte simple (nom ou description de produit).
     Améliore le texte pour le rendre unique et optimisé pour le SEO.
@@ -820,7 +972,7 @@ async def generate_seo_description(request: SEODescriptionRequest):
 # =========================
 
 @app.post("/api/journal-vente")
-async def creer_vente(request: VenteRequest):
+def creer_vente(request: VenteRequest):
     """Crée une nouvelle entrée dans le journal des ventes"""
     try:
         vente_id = ajouter_vente(
@@ -844,16 +996,64 @@ async def creer_vente(request: VenteRequest):
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'enregistrement: {str(e)}")
 
 
+@app.post("/api/journal-vente/import")
+async def importer_ventes_api(request: Request, format: Optional[str] = None, dry_run: bool = False):
+    """
+    Import en masse de ventes depuis un fichier CSV (avec en-tête) ou JSON Lines
+    envoyé comme corps de la requête.
+    Colonnes: boutique_id ou boutique (nom), date_vente, produit_nom, prix,
+    quantite, localisation, client_info, notes.
+    Le corps est lu en flux (fichier temporaire au-delà de 8 Mo), puis importé
+    par lots ; la réponse détaille les lignes rejetées.
+    Les écritures disque et l'import (chargement du module, init de la base)
+    passent par le pool de threads : la boucle d'événements ne fait que recevoir.
+    """
+    content_type = request.headers.get("content-type", "")
+    format = format or ("jsonl" if "json" in content_type else "csv")
+    if format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="Format non supporté. Utilisez csv ou jsonl")
+    
+    def importer_fichier() -> Dict:
+        fichier.seek(0)
+        texte = io.TextIOWrapper(fichier, encoding="utf-8-sig", newline="")
+        lignes = lire_lignes_csv(texte) if format == "csv" else lire_lignes_jsonl(texte)
+        return importer_ventes(lignes, dry_run=dry_run)
+    
+    fichier = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        tampon = bytearray()
+        async for chunk in request.stream():
+            tampon += chunk
+            if len(tampon) >= 1024 * 1024:  # Une écriture par Mo reçu
+                await run_in_threadpool(fichier.write, bytes(tampon))
+                tampon.clear()
+        await run_in_threadpool(fichier.write, bytes(tampon))
+        rapport = await run_in_threadpool(importer_fichier)
+        return {"success": True, **rapport}
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Le fichier doit être encodé en UTF-8")
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"CSV invalide: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'import: {str(e)}")
+    finally:
+        await run_in_threadpool(fichier.close)
+
+
 @app.get("/api/journal-vente")
-async def lister_ventes(
+def lister_ventes(
     boutique_id: Optional[int] = None,
     date_debut: Optional[str] = None,
     date_fin: Optional[str] = None,
     produit_nom: Optional[str] = None,
     localisation: Optional[str] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    curseur: Optional[str] = None
 ):
-    """Récupère la liste des ventes avec filtres optionnels"""
+    """
+    Récupère la liste des ventes avec filtres optionnels.
+    Pagination: renvoyer next_cursor dans `curseur` pour la page suivante.
+    """
     try:
         ventes = get_ventes(
             boutique_id=boutique_id,
@@ -861,19 +1061,57 @@ async def lister_ventes(
             date_fin=date_fin,
             produit_nom=produit_nom,
             localisation=localisation,
-            limit=limit
+            limit=limit,
+            curseur=curseur
         )
         return {
             "success": True,
             "ventes": ventes,
-            "nombre": len(ventes)
+            "nombre": len(ventes),
+            "next_cursor": encoder_curseur(ventes[-1]) if limit and len(ventes) == limit else None
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
 
 
+# Déclarées avant /api/journal-vente/{vente_id}, qui capturerait "statistiques"
+@app.get("/api/journal-vente/statistiques")
+def get_statistiques_ventes(
+    boutique_id: Optional[int] = None,
+    date_debut: Optional[str] = None,
+    date_fin: Optional[str] = None
+):
+    """Récupère les statistiques des ventes"""
+    try:
+        stats = get_statistiques(boutique_id=boutique_id, date_debut=date_debut, date_fin=date_fin)
+        return {"success": True, "statistiques": stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
+
+
+@app.get("/api/journal-vente/statistiques/mensuelles")
+def get_statistiques_mensuelles_ventes(annee: int, boutique_id: Optional[int] = None):
+    """Totaux mois par mois d'une année (lus dans les agrégats journaliers)"""
+    try:
+        mois = get_statistiques_mensuelles(annee=annee, boutique_id=boutique_id)
+        return {"success": True, "annee": annee, "mois": mois}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
+
+
+@app.post("/api/journal-vente/statistiques/rebuild")
+def reconstruire_statistiques_ventes():
+    """Reconstruit les agrégats journaliers à partir de toutes les ventes"""
+    try:
+        return reconstruire_agregats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la reconstruction: {str(e)}")
+
+
 @app.get("/api/journal-vente/{vente_id}")
-async def get_vente(vente_id: int):
+def get_vente(vente_id: int):
     """Récupère une vente spécifique par son ID"""
     vente = get_vente_par_id(vente_id)
     if not vente:
@@ -882,7 +1120,7 @@ async def get_vente(vente_id: int):
 
 
 @app.put("/api/journal-vente/{vente_id}")
-async def mettre_a_jour_vente(vente_id: int, request: VenteUpdateRequest):
+def mettre_a_jour_vente(vente_id: int, request: VenteUpdateRequest):
     """Met à jour une vente existante"""
     try:
         success = modifier_vente(
@@ -906,7 +1144,7 @@ async def mettre_a_jour_vente(vente_id: int, request: VenteUpdateRequest):
 
 
 @app.delete("/api/journal-vente/{vente_id}")
-async def supprimer_vente_api(vente_id: int):
+def supprimer_vente_api(vente_id: int):
     """Supprime une vente"""
     success = supprimer_vente(vente_id)
     if not success:
@@ -914,22 +1152,8 @@ async def supprimer_vente_api(vente_id: int):
     return {"success": True, "message": "Vente supprimée avec succès"}
 
 
-@app.get("/api/journal-vente/statistiques")
-async def get_statistiques_ventes(
-    boutique_id: Optional[int] = None,
-    date_debut: Optional[str] = None,
-    date_fin: Optional[str] = None
-):
-    """Récupère les statistiques des ventes"""
-    try:
-        stats = get_statistiques(boutique_id=boutique_id, date_debut=date_debut, date_fin=date_fin)
-        return {"success": True, "statistiques": stats}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
-
-
 @app.get("/api/journal-vente/periode/{annee}")
-async def get_ventes_periode(
+def get_ventes_periode(
     annee: int,
     mois: Optional[int] = None,
     boutique_id: Optional[int] = None
@@ -947,17 +1171,50 @@ async def get_ventes_periode(
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
 
 
+@app.post("/api/analytics/export")
+def exporter_analytics(format: str = "parquet", depuis: Optional[str] = None):
+    """
+    Exporte ventes et événements produits en fichiers colonnaires partitionnés par mois.
+    depuis=YYYY-MM ne réécrit que les mois à partir de cette date.
+    """
+    try:
+        return {"success": True, "export": exporter_historique(format=format, depuis=depuis)}
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'export: {str(e)}")
+
+
+@app.get("/api/analytics/rapport")
+def get_rapport_analytics(annees: Optional[str] = None, boutique_id: Optional[int] = None):
+    """
+    Rapport analytique sur l'export colonnaire des ventes :
+    évolution annuelle (YoY), moyennes mobiles, localisations, cohortes.
+    annees: liste séparée par des virgules (ex: 2023,2024)
+    """
+    try:
+        liste_annees = [int(a) for a in annees.split(",") if a.strip()] if annees else None
+        return {"success": True, "rapport": generer_rapport(annees=liste_annees, boutique_id=boutique_id)}
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul du rapport: {str(e)}")
+
+
 # =========================
 # ENDPOINTS GESTION BOUTIQUES
 # =========================
 
 @app.post("/api/boutiques")
-async def creer_boutique_api(request: BoutiqueRequest):
+def creer_boutique_api(request: BoutiqueRequest):
     """Crée une nouvelle boutique"""
     try:
-        # S'assurer que la base de données est initialisée
-        init_journal_db()
-        
         boutique_id = creer_boutique(
             nom=request.nom,
             description=request.description,
@@ -975,14 +1232,12 @@ async def creer_boutique_api(request: BoutiqueRequest):
             raise HTTPException(status_code=400, detail="Une boutique avec ce nom existe déjà")
         raise HTTPException(status_code=400, detail=f"Erreur d'intégrité: {error_msg}")
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Erreur lors de la création de boutique: {error_details}")
+        logger.exception("Erreur lors de la création de boutique")
         raise HTTPException(status_code=500, detail=f"Erreur lors de la création: {str(e)}")
 
 
 @app.get("/api/boutiques")
-async def lister_boutiques():
+def lister_boutiques():
     """Récupère toutes les boutiques"""
     try:
         boutiques = get_boutiques()
@@ -996,7 +1251,7 @@ async def lister_boutiques():
 
 
 @app.get("/api/boutiques/{boutique_id}")
-async def get_boutique_api(boutique_id: int):
+def get_boutique_api(boutique_id: int):
     """Récupère une boutique spécifique par son ID"""
     boutique = get_boutique_par_id(boutique_id)
     if not boutique:
@@ -1005,7 +1260,7 @@ async def get_boutique_api(boutique_id: int):
 
 
 @app.put("/api/boutiques/{boutique_id}")
-async def mettre_a_jour_boutique(boutique_id: int, request: BoutiqueUpdateRequest):
+def mettre_a_jour_boutique(boutique_id: int, request: BoutiqueUpdateRequest):
     """Met à jour une boutique existante"""
     try:
         success = modifier_boutique(
@@ -1023,7 +1278,7 @@ async def mettre_a_jour_boutique(boutique_id: int, request: BoutiqueUpdateReques
 
 
 @app.delete("/api/boutiques/{boutique_id}")
-async def supprimer_boutique_api(boutique_id: int):
+def supprimer_boutique_api(boutique_id: int):
     """Supprime une boutique (et toutes ses ventes)"""
     success = supprimer_boutique(boutique_id)
     if not success:
@@ -1055,7 +1310,7 @@ class SeasonalRequest(BaseModel):
 
 
 @app.post("/api/trends")
-async def get_trends(request: TrendsRequest):
+def get_trends(request: TrendsRequest):
     """Récupère les données de tendances Google Trends pour des mots-clés"""
     try:
         if len(request.keywords) > 5:
@@ -1079,7 +1334,7 @@ async def get_trends(request: TrendsRequest):
 
 
 @app.post("/api/trends/compare")
-async def compare_trends(request: CompareRequest):
+def compare_trends(request: CompareRequest):
     """Compare plusieurs mots-clés pour voir lequel est le plus recherché"""
     try:
         if len(request.keywords) > 5:
@@ -1102,7 +1357,7 @@ async def compare_trends(request: CompareRequest):
 
 
 @app.post("/api/trends/seasonal")
-async def get_seasonal(request: SeasonalRequest):
+def get_seasonal(request: SeasonalRequest):
     """Analyse les tendances saisonnières d'un mot-clé"""
     try:
         result = get_seasonal_trends(
@@ -1122,7 +1377,7 @@ async def get_seasonal(request: SeasonalRequest):
 
 
 @app.get("/api/trends/related/{keyword}")
-async def get_related(keyword: str, geo: Optional[str] = 'SN'):
+def get_related(keyword: str, geo: Optional[str] = 'SN'):
     """Récupère les sujets et requêtes liés à un mot-clé"""
     try:
         result = get_related_topics(keyword=keyword, geo=geo)
@@ -1158,7 +1413,7 @@ class NicheValidationRequest(BaseModel):
 
 
 @app.post("/api/trends/validate-product")
-async def validate_product(request: ValidateProductRequest):
+def validate_product(request: ValidateProductRequest):
     """
     Valide si un produit Jumia est aussi tendance sur Google Trends
     Utile pour confirmer qu'un produit tendance sur Jumia est un bon choix
@@ -1181,7 +1436,7 @@ async def validate_product(request: ValidateProductRequest):
 
 
 @app.post("/api/boutique/validate-niche")
-async def validate_niche(request: NicheValidationRequest):
+def validate_niche(request: NicheValidationRequest):
     """
     Valide la cohérence de niche d'une boutique
     Analyse les produits sélectionnés pour déterminer si ils forment une niche cohérente
@@ -1198,7 +1453,7 @@ async def validate_niche(request: NicheValidationRequest):
 
 
 @app.post("/api/trends/validate-products")
-async def validate_products(request: ValidateProductsRequest):
+def validate_products(request: ValidateProductsRequest):
     """
     Valide plusieurs produits Jumia en une seule fois
     Compare les produits tendance sur Jumia avec Google Trends
@@ -1223,6 +1478,37 @@ async def validate_products(request: ValidateProductsRequest):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la validation: {str(e)}")
 
 
+# =========================
+# CATALOGUE DÉDOUBLONNÉ
+# =========================
+
+@app.get("/api/catalogue")
+def get_catalogue_api(limit: int = 50, offset: int = 0, source: Optional[str] = None, multi_sources: bool = False):
+    """Produits canoniques (un par produit physique) avec leurs copies Jumia / Alibaba / marketplace."""
+    try:
+        return {"success": True, **get_catalogue(limit=limit, offset=offset, source=source, multi_sources=multi_sources)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur catalogue: {str(e)}")
+
+
+@app.post("/api/catalogue/reindex")
+def reindexer_catalogue():
+    """Rattache au catalogue les produits déjà en base (cache Alibaba, marketplace)."""
+    try:
+        return {"success": True, "indexed": reindexer_sources_existantes()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur réindexation: {str(e)}")
+
+
+@app.get("/api/catalogue/{canonical_id}")
+def get_produit_canonique_api(canonical_id: str):
+    """Un produit canonique et toutes ses copies."""
+    produit = get_produit_canonique(canonical_id)
+    if not produit:
+        raise HTTPException(status_code=404, detail="Produit non trouvé dans le catalogue")
+    return {"success": True, "produit": produit}
+
+
 # =========================
 # MARKETPLACE DÉPLACÉ VERS marketplace-backend (port 8001)
 # Toutes les routes marketplace sont maintenant dans marketplace-backend/api.py
@@ -1232,7 +1518,7 @@ async def validate_products(request: ValidateProductsRequest):
 
 
 @app.get("/api/marketplace/categories/{categorie}/produits")
-async def get_products_by_category(categorie: str, limit: Optional[int] = 4):
+def get_products_by_category(categorie: str, limit: Optional[int] = 4):
     # Récupère les produits d'une catégorie spécifique pour une catégorie donnée
     try:
         produits = get_produits_par_categorie(categorie, limit=limit or 4)
@@ -1247,7 +1533,7 @@ async def get_products_by_category(categorie: str, limit: Optional[int] = 4):
 
 
 @app.post("/api/marketplace/publish-product")
-async def publish_product_marketplace(request: Dict):
+def publish_product_marketplace(request: Dict):
     # Cette route a été migrée vers le backend marketplace (port 8001).
     # On la garde ici uniquement pour compatibilité éventuelle, mais elle ne doit plus être utilisée.
     raise HTTPException(
@@ -1260,18 +1546,15 @@ async def publish_product_marketplace(request: Dict):
 # =========================
 
 @app.get("/api/marketplace/products/{product_id}", tags=["Marketplace - Produits"])
-async def get_product_by_id(product_id: str):
+def get_product_by_id(product_id: str):
     # Récupère un produit par son ID
     # Args:
     #   product_id: ID du produit
     # Returns:
     #   Le produit avec toutes ses données
     try:
-        print(f"🔍 Récupération du produit: {product_id}")
         produit = get_produit_by_id(product_id)
-        print(f"📦 Produit trouvé: {produit is not None}")
         if not produit:
-            print(f"❌ Produit {product_id} non trouvé dans la base de données")
             raise HTTPException(status_code=404, detail="Produit non trouvé")
         return {
             "success": True,
@@ -1280,9 +1563,7 @@ async def get_product_by_id(product_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erreur récupération produit {product_id}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur récupération produit %s", product_id)
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
 
 
@@ -1290,7 +1571,7 @@ class UpdateStatusRequest(BaseModel):
     status: str
 
 @app.patch("/api/marketplace/products/{product_id}/status", tags=["Marketplace - Produits"])
-async def update_product_status(product_id: str, request: UpdateStatusRequest):
+def update_product_status(product_id: str, request: UpdateStatusRequest):
     # Modifie uniquement le statut d'un produit
     # Args:
     #   product_id: ID du produit à modifier
@@ -1298,31 +1579,23 @@ async def update_product_status(product_id: str, request: UpdateStatusRequest):
     # Returns:
     #   Confirmation de la modification
     try:
-        print(f"🔍 Backend: Modification du statut pour le produit {product_id}")
-        print(f"📝 Statut reçu: {request.status}")
-        
-        
+        logger.debug("Modification du statut pour le produit %s: %s", product_id, request.status)
         status = request.status
         if not status or status not in ['active', 'inactive', 'draft', 'archived']:
-            print(f"❌ Statut invalide: {status}")
             raise HTTPException(status_code=400, detail="Statut invalide. Doit être: active, inactive, draft ou archived")
         
         # Vérifier que le produit existe
-        print(f"🔍 Vérification de l'existence du produit {product_id}")
         existing = get_produit_by_id(product_id)
         if not existing:
-            print(f"❌ Produit {product_id} non trouvé")
             raise HTTPException(status_code=404, detail="Produit non trouvé")
         
-        print(f"✅ Produit trouvé, mise à jour du statut vers: {status}")
         # Mettre à jour le statut
         updated = mettre_a_jour_statut_produit(product_id, status)
         
         if not updated:
-            print(f"❌ Échec de la mise à jour du statut")
             raise HTTPException(status_code=500, detail="Erreur lors de la modification du statut")
         
-        print(f"✅ Statut modifié avec succès: {product_id} -> {status}")
+        logger.info("Statut modifié: %s -> %s", product_id, status)
         return {
             "success": True,
             "product_id": product_id,
@@ -1332,30 +1605,24 @@ async def update_product_status(product_id: str, request: UpdateStatusRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erreur lors de la modification du statut: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur lors de la modification du statut de %s", product_id)
         raise HTTPException(status_code=500, detail=f"Erreur lors de la modification du statut: {str(e)}")
 
 
 @app.delete("/api/marketplace/products/{product_id}", tags=["Marketplace - Produits"])
-async def delete_product_by_id(product_id: str):
+def delete_product_by_id(product_id: str):
     # Supprime un produit du marketplace
     # Args:
     #   product_id: ID du produit à supprimer
     # Returns:
     #   Confirmation de la suppression
     try:
-        print(f"🗑️ Backend: Suppression du produit {product_id}")
-        
         # Supprimer le produit
         success = supprimer_produit(product_id)
         
         if not success:
-            print(f"❌ Échec de la suppression")
             raise HTTPException(status_code=404, detail="Produit non trouvé")
         
-        print(f"✅ Produit {product_id} supprimé avec succès")
         return {
             "success": True,
             "message": "Produit supprimé"
@@ -1363,14 +1630,12 @@ async def delete_product_by_id(product_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erreur lors de la suppression du produit: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur lors de la suppression du produit %s", product_id)
         raise HTTPException(status_code=500, detail=f"Erreur lors de la suppression: {str(e)}")
 
 
 @app.put("/api/marketplace/products/{product_id}", tags=["Marketplace - Produits"])
-async def update_product_by_id(product_id: str, request: Dict):
+def update_product_by_id(product_id: str, request: Dict):
     # Cette route a été migrée vers le backend marketplace (port 8001).
     # On la garde ici uniquement pour compatibilité éventuelle, mais elle ne doit plus être utilisée.
     raise HTTPException(
@@ -1385,7 +1650,7 @@ async def update_product_by_id(product_id: str, request: Dict):
 # =========================
 
 @app.get("/api/marketplace/products")
-async def get_products_marketplace_api(
+def get_products_marketplace_api(
     status: Optional[str] = None,  # None = tous les produits (pour admin)
     limit: Optional[int] = None,
     offset: Optional[int] = None,
@@ -1431,7 +1696,7 @@ async def get_products_marketplace_api(
 
 
 @app.post("/api/marketplace/publish-products-batch")
-async def publish_products_batch_marketplace(request: List[Dict]):
+def publish_products_batch_marketplace(request: List[Dict]):
     # Cette route a été migrée vers le backend marketplace (port 8001).
     # On la garde ici uniquement pour compatibilité éventuelle, mais elle ne doit plus être utilisée.
     raise HTTPException(
@@ -1442,7 +1707,7 @@ async def publish_products_batch_marketplace(request: List[Dict]):
 
 
 @app.post("/api/marketplace/track-event")
-async def track_event_marketplace(request: Dict):
+def track_event_marketplace(request: Dict):
     # Cette route a été migrée vers le backend marketplace (port 8001).
     # On la garde ici uniquement pour compatibilité éventuelle, mais elle ne doit plus être utilisée.
     raise HTTPException(
@@ -1462,7 +1727,7 @@ if __name__ == "__main__":
 # ENDPOINTS AGENTS (AUTOMATION)
 # =========================
 
-from agents.seo_agent import SEOAgent
+SEOAgent, = fonctions_paresseuses("agents.seo_agent", "SEOAgent")
 
 @app.post("/api/agents/seo/run")
 def run_seo_agent(limit: int = 5):
@@ -1477,7 +1742,7 @@ def run_seo_agent(limit: int = 5):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur Agent SEO: {str(e)}")
 
-from agents.price_agent import PriceAgent
+PriceAgent, = fonctions_paresseuses("agents.price_agent", "PriceAgent")
 
 @app.post("/api/agents/price/run")
 def run_price_agent(limit: int = 5):
@@ -1492,7 +1757,7 @@ def run_price_agent(limit: int = 5):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur Agent Price: {str(e)}")
 
-from agents.marketing_agent import MarketingAgent
+MarketingAgent, = fonctions_paresseuses("agents.marketing_agent", "MarketingAgent")
 
 @app.post("/api/agents/marketing/run")
 def run_marketing_agent():
@@ -1507,7 +1772,7 @@ def run_marketing_agent():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur Agent Marketing: {str(e)}")
 
-from agents.deal_hunter_agent import DealHunterAgent
+DealHunterAgent, = fonctions_paresseuses("agents.deal_hunter_agent", "DealHunterAgent")
 
 @app.post("/api/agents/deal-hunter/run")
 def run_deal_hunter_agent(category: str = "toutes", limit: int = 5):
@@ -1523,13 +1788,14 @@ def run_deal_hunter_agent(category: str = "toutes", limit: int = 5):
         raise HTTPException(status_code=500, detail=f"Erreur Agent Deal Hunter: {str(e)}")
 
 # --- SOURCING AGENT ---
-from agents.sourcing_agent import SourcingAgent
+SourcingAgent, = fonctions_paresseuses("agents.sourcing_agent", "SourcingAgent")
 
 @app.post("/api/agents/sourcing/run")
 def run_sourcing_agent(limit: int = 5):
     """
     Déclenche l'Agent Sourcing.
-    Lit le CSV -> Cherche Jumia -> Vérifie Trends -> Crée Drafts.
+    Lit le CSV -> Vérifie Trends -> Cherche Jumia -> Crée Drafts.
+    limit=0 traite tout le fichier d'historique (lecture en flux).
     """
     try:
         agent = SourcingAgent()
@@ -1539,7 +1805,7 @@ def run_sourcing_agent(limit: int = 5):
         raise HTTPException(status_code=500, detail=f"Erreur Agent Sourcing: {str(e)}")
 
 @app.get("/api/products/drafts")
-async def get_draft_products():
+def get_draft_products():
     """Récupère tous les produits en statut 'draft'."""
     try:
         conn = sqlite3.connect(DB_PATH)
@@ -1553,25 +1819,77 @@ async def get_draft_products():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur récupération drafts: {str(e)}")
 
+SEPARATEUR_ANALYSE_IA = "\n\n---\n💡 Analyse Tafa IA : "
+
+
+def _publier_produit_valide(product_id: str, trend_eval: Dict):
+    """
+    Publie (tâche de fond) un produit validé via products/batch : mise à jour si le produit
+    a déjà un wc_id, création sinon. L'ID et l'empreinte des données envoyées sont enregistrés
+    ensemble : la synchronisation suivante ne renvoie pas le produit. En cas d'échec, le produit
+    reste actif sans wc_id et sera créé par la prochaine synchronisation.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute(
+        "SELECT product_id, nom, prix, image, description_seo, meta_description, wc_id FROM produits_marketplace WHERE product_id=?",
+        (product_id,)
+    ).fetchone()
+    conn.close()
+    if not row:
+        return
+    
+    wc_data = construire_produit_wc(dict(row))
+    if row["wc_id"] is None:
+        result = wc_connector.batch_products(create={product_id: wc_data})
+    else:
+        result = wc_connector.batch_products(update={product_id: dict(wc_data, id=row["wc_id"])})
+    wc_id = result["created"].get(product_id) or result["updated"].get(product_id)
+    if not wc_id:
+        logger.warning("Échec du push WooCommerce pour %s (%s), reprise à la prochaine synchronisation.",
+                       product_id, result["failed"].get(product_id))
+        return
+    
+    enregistrer_publications_woocommerce({product_id: wc_id}, {product_id: hash_produit_wc(wc_data)})
+    logger.info("Produit poussé vers WooCommerce : %s", wc_id)
+    
+    # Générer un brouillon Meta Ads (Phase 5) et le sauvegarder dans la mémoire pour l'admin
+    ad_draft = meta_agent.generate_ad_draft(
+        product_data={"nom": row["nom"], "image": row["image"]},
+        evaluation_context=trend_eval
+    )
+    memory.log_decision(
+        trend_id=f"ADS_{product_id}",
+        score=trend_eval["final_score"],
+        reasoning=f"Ad Draft Generated: {ad_draft['campaign_name']}",
+        action="ad_draft",
+        context=ad_draft
+    )
+
+
 @app.post("/api/products/{product_id}/validate")
-async def validate_product(product_id: str, action: str = "publish"):
+def validate_product(product_id: str, background_tasks: BackgroundTasks, action: str = "publish"):
     """
     Valide ou rejette un produit brouillon.
     Action: 'publish' (active) ou 'reject' (delete/archive).
+    La publication WooCommerce part en tâche de fond (products/batch), après la réponse.
     """
     try:
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT coalesce(status, 'active'), {SQL_ALERTE_PRIX}
+            FROM produits_marketplace WHERE product_id=?
+        """, (product_id,))
+        avant = cursor.fetchone()
+        trend_eval = None
         
         if action == "publish":
-            # 1. Récupérer les données du produit pour WooCommerce
-            cursor.execute("SELECT nom, prix, image, description_seo FROM produits_marketplace WHERE product_id=?", (product_id,))
+            cursor.execute("SELECT description_seo FROM produits_marketplace WHERE product_id=?", (product_id,))
             product = cursor.fetchone()
             
             if product:
-                nom, prix, image, desc = product
-                
-                # 2. Évaluation contextuelle par l'IA (Phase 4)
+                # Évaluation contextuelle par l'IA (Phase 4)
                 trend_eval = orchestrator.evaluate_trend({"id": str(product_id), "base_score": 75})
                 memory.log_decision(
                     trend_id=str(product_id),
@@ -1581,42 +1899,16 @@ async def validate_product(product_id: str, action: str = "publish"):
                     context=json.loads(trend_eval["timestamp"])
                 )
                 
-                # 3. Préparer les données pour WooCommerce (enrichies par l'IA si besoin)
-                description_finale = f"{desc}\n\n---\n💡 Analyse Tafa IA : {trend_eval['reasoning']}"
-                
-                wc_data = {
-                    "name": nom,
-                    "type": "simple",
-                    "regular_price": str(prix),
-                    "description": description_finale,
-                    "images": [{"src": image}] if image else []
-                }
-                
-                # 4. Push vers WooCommerce
-                wc_result = wc_connector.publish_product(wc_data)
-                
-                if wc_result:
-                    print(f"✅ Produit poussé vers WooCommerce : {wc_result.get('id')}")
-                    
-                    # 5. Générer un brouillon Meta Ads (Phase 5)
-                    ad_draft = meta_agent.generate_ad_draft(
-                        product_data={"nom": nom, "image": image},
-                        evaluation_context=trend_eval
-                    )
-                    # Sauvegarder dans la mémoire pour l'admin
-                    memory.log_decision(
-                        trend_id=f"ADS_{product_id}",
-                        score=trend_eval["final_score"],
-                        reasoning=f"Ad Draft Generated: {ad_draft['campaign_name']}",
-                        action="ad_draft",
-                        context=ad_draft
-                    )
-                    
-                    # Mettre à jour avec l'ID WooCommerce si nécessaire (features_json)
-                    cursor.execute("UPDATE produits_marketplace SET status='active', validated=1, published_at=CURRENT_TIMESTAMP WHERE product_id=?", (product_id,))
-                else:
-                    print(f"⚠️ Échec du push WooCommerce pour {product_id}, mais validation locale maintenue.")
-                    cursor.execute("UPDATE produits_marketplace SET status='active', validated=1, published_at=CURRENT_TIMESTAMP WHERE product_id=?", (product_id,))
+                # Description enrichie par l'IA, enregistrée en base : c'est elle que publient
+                # la tâche de fond et les synchronisations suivantes (analyse précédente remplacée)
+                description = (product[0] or "").split(SEPARATEUR_ANALYSE_IA)[0]
+                description_finale = f"{description}{SEPARATEUR_ANALYSE_IA}{trend_eval['reasoning']}"
+                cursor.execute("""
+                    UPDATE produits_marketplace
+                    SET status='active', validated=1, description_seo=?,
+                        published_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP
+                    WHERE product_id=?
+                """, (description_finale, product_id))
             else:
                 cursor.execute("UPDATE produits_marketplace SET status='active', validated=1, published_at=CURRENT_TIMESTAMP WHERE product_id=?", (product_id,))
         
@@ -1629,7 +1921,138 @@ async def validate_product(product_id: str, action: str = "publish"):
         
         if changes == 0:
             raise HTTPException(status_code=404, detail="Produit non trouvé")
+        if trend_eval is not None:
+            background_tasks.add_task(_publier_produit_valide, product_id, trend_eval)
+        if avant and action == "publish":
+            dashboard_metrics.statut_modifie(avant[0], "active")
+        elif avant and action == "reject":
+            dashboard_metrics.produit_supprime(avant[0], alerte=avant[1])
             
-        return {"status": "success", "action": action, "product_id": product_id}
+        return {"status": "success", "action": action, "product_id": product_id,
+                "woocommerce": "en_cours" if trend_eval is not None else None}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur validation: {str(e)}")
+
+
+class PublishBatchRequest(BaseModel):
+    product_ids: Optional[List[str]] = None  # None = tous les drafts
+    batch_size: int = 100
+    max_workers: int = 4
+
+
+@app.post("/api/products/publish-batch")
+def publish_products_batch(request: PublishBatchRequest):
+    """
+    Publie en masse des produits brouillons sur WooCommerce via products/batch.
+    Les produits déjà publiés (wc_id connu) sont mis à jour au lieu d'être recréés.
+    Les lots sont envoyés en parallèle, les échecs partiels repris produit par produit,
+    puis les IDs WooCommerce enregistrés en une seule transaction.
+    """
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        colonnes = "product_id, nom, prix, image, description_seo, meta_description, wc_id"
+        if request.product_ids:
+            product_ids = list(dict.fromkeys(request.product_ids))
+            rows = []
+            for i in range(0, len(product_ids), 500):  # Limite de variables SQLite
+                lot = product_ids[i:i + 500]
+                cursor.execute(
+                    f"SELECT {colonnes} FROM produits_marketplace WHERE product_id IN ({','.join('?' * len(lot))})", lot
+                )
+                rows.extend(dict(row) for row in cursor.fetchall())
+        else:
+            cursor.execute(f"SELECT {colonnes} FROM produits_marketplace WHERE status = 'draft'")
+            rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        if not rows:
+            raise HTTPException(status_code=404, detail="Aucun produit à publier")
+        
+        wc_products = {row["product_id"]: construire_produit_wc(row) for row in rows}
+        a_creer = {row["product_id"]: wc_products[row["product_id"]] for row in rows if row["wc_id"] is None}
+        a_mettre_a_jour = {row["product_id"]: dict(wc_products[row["product_id"]], id=row["wc_id"])
+                           for row in rows if row["wc_id"] is not None}
+        
+        result = wc_connector.batch_products(
+            create=a_creer,
+            update=a_mettre_a_jour,
+            batch_size=request.batch_size,
+            max_workers=request.max_workers
+        )
+        publies = {**result["created"], **result["updated"]}
+        enregistrer_publications_woocommerce(
+            publies,
+            {pid: hash_produit_wc(wc_products[pid]) for pid in publies}
+        )
+        
+        return {
+            "status": "success",
+            "requested": len(wc_products),
+            "published": len(publies),
+            "created": len(result["created"]),
+            "updated": len(result["updated"]),
+            "wc_ids": publies,
+            "failed": result["failed"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur publication WooCommerce: {str(e)}")
+
+
+@app.post("/api/woocommerce/sync")
+def sync_woocommerce(dry_run: bool = False, full: bool = False):
+    """
+    Synchronisation incrémentale du marketplace vers WooCommerce.
+    N'envoie que les créations / modifications / suppressions depuis le dernier run.
+    dry_run=true calcule le delta sans l'envoyer, full=true ignore le watermark.
+    """
+    try:
+        return synchroniser_woocommerce(wc_connector, dry_run=dry_run, full=full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur synchronisation WooCommerce: {str(e)}")
+
+
+# =========================
+# IMAGES PRODUITS (VARIANTES)
+# =========================
+
+CACHE_IMAGES_IMMUABLES = "public, max-age=31536000, immutable"  # Contenu adressé par son hash
+
+
+@app.get("/api/images/{sha256}")
+def servir_image_variante(sha256: str, request: Request, w: int = 320):
+    """
+    Sert la plus petite variante d'une image au moins large de `w` pixels,
+    en AVIF si le navigateur l'accepte, sinon en WebP.
+    L'URL dépend du contenu : le cache navigateur/CDN peut la garder un an.
+    """
+    if not image_variants.SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="Identifiant d'image invalide")
+    
+    accept = request.headers.get("accept", "")
+    formats = ["webp"] + (["avif"] if "image/avif" in accept else [])
+    chemin = image_variants.choisir_variante(sha256, w, formats)
+    if not chemin:
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    
+    return FileResponse(
+        chemin,
+        media_type=f"image/{chemin.suffix[1:]}",
+        headers={"Cache-Control": CACHE_IMAGES_IMMUABLES, "Vary": "Accept"}
+    )
+
+
+@app.get("/api/images/{sha256}/variants")
+def lister_variantes_image(sha256: str):
+    """Liste les variantes d'une image (largeur, format, poids) pour construire un srcset."""
+    if not image_variants.SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="Identifiant d'image invalide")
+    variantes = image_variants.get_variantes(sha256)
+    if not variantes:
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    return {"sha256": sha256, "variants": variantes}
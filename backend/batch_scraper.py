@@ -4,13 +4,14 @@ Permet de lancer des scrapings en masse pour économiser sur Apify
 """
 import sys
 import os
+import threading
 from typing import List, Dict
 
 # Ajouter le répertoire parent au path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from alibaba_apify import search_products_apify
-from database import save_products_to_db, init_database, get_all_cached_searches, clear_expired_cache
+from alibaba_apify import executer_recherches
+from database import save_products_to_db, append_products_to_db, init_database, get_all_cached_searches, clear_expired_cache
 
 # Liste des recherches à effectuer
 SEARCHES = [
@@ -55,42 +56,45 @@ def run_batch_scraping():
     total_scraped = 0
     total_saved = 0
     errors = []
+    verrou_db = threading.Lock()
     
-    for i, search in enumerate(SEARCHES, 1):
+    def sauvegarder_page(search: Dict, produits: List[Dict], numero: int):
+        # Appelé depuis les threads de suivi des runs, dès qu'une page du dataset est lue
+        nonlocal total_saved
+        with verrou_db:
+            if numero == 0:
+                save_products_to_db(produits, search["type"], search["valeur"])
+            else:
+                append_products_to_db(produits, search["type"], search["valeur"])
+            total_saved += len(produits)
+    
+    # Tous les runs sont lancés d'un coup puis suivis en parallèle
+    print(f"🚀 Lancement de {len(SEARCHES)} recherches sur Apify...")
+    print("-" * 60)
+    resultats = executer_recherches(SEARCHES, sur_page=sauvegarder_page)
+    print()
+    
+    for i, resultat in enumerate(resultats, 1):
+        search = resultat["recherche"]
         search_type = search["type"]
         search_value = search["valeur"]
-        limit = search["limit"]
+        e = resultat["erreur"]
         
-        print(f"[{i}/{len(SEARCHES)}] Scraping: {search_type}={search_value} (limit: {limit})")
-        print("-" * 60)
+        print(f"[{i}/{len(SEARCHES)}] {search_type}={search_value} (limit: {search['limit']})")
         
-        try:
-            # Lancer le scraping Apify
-            if search_type == "keyword":
-                produits = search_products_apify(keyword=search_value, limit=limit)
-            elif search_type == "category":
-                produits = search_products_apify(category=search_value, limit=limit)
-            else:  # general
-                produits = search_products_apify(keyword="", limit=limit)
-            
-            # Sauvegarder dans la DB
-            save_products_to_db(produits, search_type, search_value)
-            
-            total_scraped += len(produits)
-            total_saved += len(produits)
-            
-            print(f"✅ {len(produits)} produits scrapés et sauvegardés")
-            
-        except ValueError as e:
+        if e is None:
+            total_scraped += len(resultat["produits"])
+            print(f"✅ {len(resultat['produits'])} produits scrapés et sauvegardés")
+        elif isinstance(e, ValueError):
             error_msg = f"Token Apify non configuré: {e}"
             print(f"❌ {error_msg}")
             errors.append(f"{search_type}={search_value}: {error_msg}")
-        except Exception as e:
+        else:
             error_msg = f"Erreur: {e}"
             print(f"❌ {error_msg}")
             errors.append(f"{search_type}={search_value}: {error_msg}")
-        
-        print()
+    
+    print()
     
     # Résumé
     print("=" * 60)
@@ -0,0 +1,127 @@
+"""
+Benchmark de la lecture du dataset Apify (alibaba_apify)
+Un serveur local sert un dataset de NB_ITEMS items au format de l'acteur Alibaba
+(avec description, fiche technique, galerie d'images... que nous n'utilisons pas)
+et gère offset / limit / fields comme l'API Apify. On lit LIMIT produits :
+- avant : tout le dataset en une requête, puis results[:limit] (ancien search_products_apify)
+- après : iter_pages_dataset (pages limit/offset, colonnes utiles seulement)
+et vérifie que les produits sont identiques. On mesure aussi la conversion seule
+(convertir_item) sur les items complets et sur les items réduits par fields.
+
+Usage: python benchmarks/bench_apify_dataset.py [limit]
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alibaba_apify
+
+LIMIT = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+NB_ITEMS = 600  # Items dans le dataset (l'acteur dépasse souvent maxItems)
+REPETITIONS = 5
+octets = []
+
+
+def item_alibaba(n):
+    return {
+        "productId": f"16000{n}", "title": f"Wireless earbuds model {n}", "subject": "", "name": None,
+        "url": f"https://www.alibaba.com/product-detail/earbuds_{n}.html",
+        "price": {"value": 3.5 + n % 40, "text": f"${3.5 + n % 40:.2f} - ${9 + n % 40:.2f}"},
+        "priceRange": "", "imageUrl": "", "images": [f"https://s.alicdn.com/img/{n}_{i}.jpg" for i in range(12)],
+        "brand": "", "brandName": "OEM" if n % 3 else "", "category": "Consumer Electronics",
+        "rating": 4.0 + (n % 10) / 10 if n % 4 else None, "moq": f"{10 * (1 + n % 5)} pieces",
+        "supplierName": f"Shenzhen Supplier {n % 37} Co., Ltd.", "discount": "",
+        "description": "Bluetooth 5.3 TWS earbuds with charging case. " * 40,
+        "specifications": {f"spec_{i}": f"value {i} for item {n}" for i in range(30)},
+        "reviews": [{"user": f"buyer{i}", "text": "Good quality, fast shipping " * 3} for i in range(5)],
+        "supplierYears": 1 + n % 12, "responseRate": "95.2%", "tradeAssurance": True,
+    }
+
+
+DATASET = [item_alibaba(n) for n in range(NB_ITEMS)]
+
+
+class DatasetApify(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = parse_qs(urlsplit(self.path).query)
+        offset = int(params.get("offset", ["0"])[0])
+        limit = int(params.get("limit", [str(NB_ITEMS)])[0])
+        items = DATASET[offset:offset + limit]
+        if "fields" in params:
+            champs = params["fields"][0].split(",")
+            items = [{c: item[c] for c in champs if c in item} for item in items]
+        corps = json.dumps(items).encode()
+        octets.append(len(corps))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+
+def lecture_ancienne():
+    results = requests.get(f"{alibaba_apify.APIFY_API_BASE_URL}/datasets/d/items", timeout=30).json()
+    return [alibaba_apify.convertir_item(item) for item in results[:LIMIT]]
+
+
+def lecture_nouvelle():
+    return [p for page in alibaba_apify.iter_pages_dataset("d", LIMIT) for p in page]
+
+
+def mesurer(nom, fonction):
+    meilleur = float("inf")
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    octets.clear()
+    tracemalloc.start()
+    produits = fonction()
+    pic = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{nom:<42}{sum(octets) / 1024:>10.0f}{len(octets):>10}{meilleur * 1000:>10.1f}{pic / 1024:>12.0f}")
+    return produits
+
+
+def mesurer_conversion(nom, items):
+    meilleur = float("inf")
+    for _ in range(REPETITIONS * 20):
+        debut = time.perf_counter()
+        for item in items:
+            alibaba_apify.convertir_item(item)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    print(f"{nom:<42}{meilleur / len(items) * 1e6:>10.2f} µs/item")
+
+
+if __name__ == "__main__":
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), DatasetApify)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    alibaba_apify.APIFY_API_BASE_URL = f"http://127.0.0.1:{serveur.server_address[1]}"
+    alibaba_apify.APIFY_TOKEN = "test"
+
+    print(f"limit={LIMIT}, dataset de {NB_ITEMS} items\n")
+    print(f"{'Lecture':<42}{'Ko reçus':>10}{'requêtes':>10}{'ms':>10}{'pic Ko':>12}")
+    reference = mesurer("avant: dataset entier puis [:limit]", lecture_ancienne)
+    produits = mesurer("après: pages + fields", lecture_nouvelle)
+    assert produits == reference, "Produits différents"
+
+    # Conversion seule, sur les items complets et sur les items réduits par fields
+    champs = alibaba_apify.CHAMPS_DATASET.split(",")
+    reduits = [{c: item[c] for c in champs if c in item} for item in DATASET[:LIMIT]]
+    print()
+    mesurer_conversion("conversion: items complets", DATASET[:LIMIT])
+    mesurer_conversion("conversion: items réduits par fields", reduits)
+    serveur.shutdown()
+    print("\n✅ Produits identiques")
@@ -0,0 +1,163 @@
+"""
+Benchmark du suivi des runs Apify (batch_scraper)
+Un faux serveur Apify local (APIFY_API_BASE_URL) simule l'acteur Alibaba : chaque
+run dure entre DUREE_MIN et DUREE_MAX secondes, son dataset est servi page par page
+(LATENCE par requête). On lance les SEARCHES de batch_scraper et on compare :
+- avant : une recherche après l'autre, vérification du run toutes les 2 s, dataset en une requête
+  (copie de l'ancien search_products_apify ci-dessous)
+- après : run_batch_scraping (tous les runs lancés d'un coup, long-poll waitForFinish,
+  chaque page sauvegardée dès son arrivée)
+- après, serveur sans long-poll : même chose, le serveur répond tout de suite (délai croissant)
+et vérifie que le cache (database) contient les mêmes produits.
+
+Usage: python benchmarks/bench_apify_runs.py
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alibaba_apify
+import batch_scraper
+import database
+
+DUREE_MIN, DUREE_MAX = 1.0, 3.0  # Durée d'un run (secondes)
+LATENCE = 0.05  # Secondes par requête HTTP
+etat = {"long_poll": True, "requetes_statut": 0}
+runs = {}
+verrou = threading.Lock()
+
+
+def items_recherche(entree, nombre):
+    """Items bruts déterministes pour une recherche."""
+    terme = entree.get("searchQuery") or entree.get("category") or "general"
+    return [{"title": f"{terme} {n}", "price": {"value": n + 0.5, "text": f"${n}.50"},
+             "url": f"https://www.alibaba.com/product/{terme}-{n}.html", "productId": f"{terme}-{n}",
+             "supplierName": f"Supplier {n % 7}", "moq": f"{n + 1} pieces"} for n in range(nombre)]
+
+
+class FauxApify(BaseHTTPRequestHandler):
+    def _json(self, donnees, code=200):
+        corps = json.dumps(donnees).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _run(self, run_id):
+        run = runs[run_id]
+        fini = time.time() >= run["fin"]
+        return {"id": run_id, "status": "SUCCEEDED" if fini else "RUNNING", "defaultDatasetId": run_id}
+
+    def do_POST(self):
+        time.sleep(LATENCE)
+        entree = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with verrou:
+            run_id = f"run{len(runs)}"
+            runs[run_id] = {"fin": time.time() + random.uniform(DUREE_MIN, DUREE_MAX),
+                            "items": items_recherche(entree, entree["maxItems"])}
+        self._json({"data": self._run(run_id)}, 201)
+
+    def do_GET(self):
+        time.sleep(LATENCE)
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        morceaux = url.path.strip("/").split("/")
+        if morceaux[-2] == "actor-runs":
+            etat["requetes_statut"] += 1
+            run = runs[morceaux[-1]]
+            if etat["long_poll"] and "waitForFinish" in params:
+                # Répond à la fin du run ou au bout de waitForFinish secondes
+                time.sleep(max(0, min(run["fin"], time.time() + int(params["waitForFinish"][0])) - time.time()))
+            self._json({"data": self._run(morceaux[-1])})
+        elif morceaux[-1] == "items":
+            items = runs[morceaux[-2]]["items"]
+            offset = int(params.get("offset", ["0"])[0])
+            limit = int(params.get("limit", [str(len(items))])[0])
+            self._json(items[offset:offset + limit])
+
+    def log_message(self, *args):
+        pass
+
+
+def search_products_ancien(keyword="", category="", limit=20):
+    """search_products_apify d'origine : statut toutes les 2 s, dataset en une requête."""
+    base, headers = alibaba_apify.APIFY_API_BASE_URL, {"Authorization": "Bearer test"}
+    input_data = {"maxItems": limit}
+    if keyword:
+        input_data["searchQuery"] = keyword
+    if category:
+        input_data["category"] = category
+    run_id = requests.post(f"{base}/acts/x/runs", json=input_data, headers=headers, timeout=30).json()["data"]["id"]
+    while True:
+        status_data = requests.get(f"{base}/actor-runs/{run_id}", headers=headers, timeout=30).json()["data"]
+        if status_data["status"] == "SUCCEEDED":
+            break
+        time.sleep(2)
+    results = requests.get(f"{base}/datasets/{status_data['defaultDatasetId']}/items", headers=headers, timeout=30).json()
+    return [alibaba_apify.convertir_item(item) for item in results[:limit]]
+
+
+def batch_ancien():
+    for search in batch_scraper.SEARCHES:
+        if search["type"] == "category":
+            produits = search_products_ancien(category=search["valeur"], limit=search["limit"])
+        else:
+            produits = search_products_ancien(keyword=search["valeur"], limit=search["limit"])
+        batch_scraper.save_products_to_db(produits, search["type"], search["valeur"])
+
+
+def contenu_cache():
+    return {(s["type"], s["valeur"]): sorted(p["product_id"] for p in database.get_products_from_db(
+        s["type"], s["valeur"], limit=1000)) for s in batch_scraper.SEARCHES}
+
+
+def mesurer(nom, fonction, dossier):
+    database.DB_PATH = os.path.join(dossier, f"{len(os.listdir(dossier))}.db")
+    runs.clear()
+    etat["requetes_statut"] = 0
+    premiere = []
+    save = database.save_products_to_db
+    batch_scraper.save_products_to_db = lambda *args: premiere.append(time.perf_counter()) or save(*args)
+    random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_database()
+        debut = time.perf_counter()
+        fonction()
+        duree = time.perf_counter() - debut
+        contenu = contenu_cache()
+    batch_scraper.save_products_to_db = save
+    print(f"{nom:<42}{duree:>10.1f}{min(premiere) - debut:>16.1f}{etat['requetes_statut']:>10}")
+    return contenu
+
+
+if __name__ == "__main__":
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), FauxApify)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    alibaba_apify.APIFY_API_BASE_URL = f"http://127.0.0.1:{serveur.server_address[1]}"
+    alibaba_apify.APIFY_TOKEN = "test"
+    alibaba_apify.DATASET_PAGE_SIZE = 20  # Plusieurs pages par dataset
+
+    print(f"{len(batch_scraper.SEARCHES)} recherches, runs de {DUREE_MIN:.0f} à {DUREE_MAX:.0f} s\n")
+    print(f"{'Suivi des runs':<42}{'durée (s)':>10}{'1re sauvegarde':>16}{'statuts':>10}")
+    with tempfile.TemporaryDirectory() as dossier:
+        reference = mesurer("avant: séquentiel, statut toutes 2 s", batch_ancien, dossier)
+        apres = mesurer("après: long-poll waitForFinish", batch_scraper.run_batch_scraping, dossier)
+        assert apres == reference, "Cache différent"
+        etat["long_poll"] = False
+        apres = mesurer("après: sans long-poll (délai croissant)", batch_scraper.run_batch_scraping, dossier)
+        assert apres == reference, "Cache différent"
+    serveur.shutdown()
+    print("\n✅ Mêmes produits en cache")
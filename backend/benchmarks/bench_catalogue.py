@@ -0,0 +1,109 @@
+"""
+Benchmark du catalogue dédoublonné (catalogue)
+Génère NB_PRODUITS produits physiques (marque, type, modèle, capacité, prix) et leurs
+copies telles que les sources les produisent :
+- Jumia : une copie (SKU), nom reformulé (ordre des mots, "128Go" / "128 GB", couleur), prix en FCFA
+- Alibaba : une copie par recherche qui le trouve (même productId), prix en USD
+- marketplace : une ou deux publications (product_id md5 différent si les catégories changent,
+  même lien que la copie Jumia)
+Beaucoup de produits ne diffèrent que par le modèle (Galaxy A15 / A25) ou la capacité.
+On indexe toutes les copies puis on mesure, contre la vérité terrain : produits canoniques
+obtenus, précision / rappel des regroupements (par paires), comparaisons faites grâce au
+blocage contre toutes les paires, et temps par copie.
+
+Usage: python benchmarks/bench_catalogue.py [nombre_de_produits]
+"""
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catalogue
+
+NB_PRODUITS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+MARQUES = ["Samsung", "Xiaomi", "Tecno", "Infinix", "Oraimo", "Hisense", "Nasco", "Binatone", "HP", "Lenovo"]
+TYPES = ["Smartphone", "Tablette", "Écouteurs Bluetooth", "Power Bank", "Téléviseur LED", "Mixeur",
+         "Ventilateur", "Ordinateur Portable", "Montre Connectée", "Fer à repasser"]
+CAPACITES = ["", "32 Go", "64 Go", "128 Go", "256 Go", "10000 mAh", "20000 mAh", "43 pouces", "1200 W"]
+COULEURS = ["Noir", "Blanc", "Bleu", "Gris"]
+
+
+def produits_physiques(nombre):
+    produits, vus = [], set()
+    while len(produits) < nombre:
+        marque, type_ = random.choice(MARQUES), random.choice(TYPES)
+        modele = f"{random.choice('ACGKMPSX')}{random.randint(1, 60)}"
+        capacite = random.choice(CAPACITES)
+        if (marque, type_, modele, capacite) in vus:
+            continue
+        vus.add((marque, type_, modele, capacite))
+        produits.append({"id": len(produits), "marque": marque, "type": type_, "modele": modele,
+                         "capacite": capacite, "couleur": random.choice(COULEURS),
+                         "prix_usd": round(random.uniform(8, 600), 2)})
+    return produits
+
+
+def nom_variante(p):
+    capacite = p["capacite"].replace(" Go", random.choice(["Go", " GB", "GB"])) if random.random() < 0.5 else p["capacite"]
+    mots = [p["marque"] if random.random() < 0.5 else p["marque"].upper(), p["modele"], capacite]
+    if random.random() < 0.6:
+        mots.append(p["couleur"])
+    random.shuffle(mots)
+    return " ".join([p["type"]] + [m for m in mots if m]) + random.choice(["", " - Original", " Nouveau"])
+
+
+def copies(p):
+    bruit = lambda: random.uniform(0.9, 1.1)
+    lien_jumia = f"https://www.jumia.sn/produit-{p['id']}.html"
+    jumia = {"sku": f"JU{p['id']:06d}", "nom": nom_variante(p), "prix": round(p["prix_usd"] * 600 * bruit()),
+             "lien": lien_jumia, "marque": p["marque"]}
+    resultat = [("jumia", jumia)]
+    for _ in range(random.randint(0, 3)):  # Trouvé par 0 à 3 recherches Alibaba
+        resultat.append(("alibaba", {"product_id": f"16{p['id']:08d}", "nom": nom_variante(p),
+                                     "prix": round(p["prix_usd"] * bruit(), 2), "source": "Alibaba (Apify)",
+                                     "lien": f"https://www.alibaba.com/product-detail/{p['id']}.html"}))
+    for categories in random.sample([["Électronique"], ["Électronique", "Promo"], ["Maison"]], random.randint(0, 2)):
+        publie = dict(jumia, categories=categories, source="Jumia")
+        publie["product_id"] = hashlib.md5(f"{publie['nom']}_{lien_jumia}_{','.join(categories)}".encode()).hexdigest()
+        resultat.append(("marketplace", publie))
+    return [(source, p["id"], copie) for source, copie in resultat]
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    toutes = [c for p in produits_physiques(NB_PRODUITS) for c in copies(p)]
+    random.shuffle(toutes)
+
+    comparaisons = [0]
+    similarite = catalogue.similarite
+    catalogue.similarite = lambda a, b: comparaisons.__setitem__(0, comparaisons[0] + 1) or similarite(a, b)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        catalogue.DB_PATH = os.path.join(dossier, "catalogue.db")
+        catalogue.init_catalogue()
+        debut = time.perf_counter()
+        for source in catalogue.SOURCES:
+            lot = [copie for s, _, copie in toutes if s == source]
+            catalogue.indexer_produits(lot, source)
+        duree = time.perf_counter() - debut
+
+    verite = [pid for _, pid, _ in toutes]
+    predit = [copie["canonical_id"] for _, _, copie in toutes]
+    paires = lambda compte: sum(n * (n - 1) // 2 for n in compte.values())
+    vraies, predites = paires(Counter(verite)), paires(Counter(predit))
+    correctes = paires(Counter(zip(verite, predit)))
+    nb_canoniques = len(set(predit))
+
+    print(f"{len(toutes)} copies de {NB_PRODUITS} produits physiques "
+          f"({', '.join(f'{s}: {n}' for s, n in Counter(s for s, _, _ in toutes).items())})\n")
+    print(f"{'Produits canoniques':<36}{nb_canoniques:>12}   (avant: {len(toutes)} lignes à traiter)")
+    print(f"{'Précision des regroupements':<36}{correctes / predites:>12.3f}")
+    print(f"{'Rappel des regroupements':<36}{correctes / vraies:>12.3f}")
+    print(f"{'Comparaisons (blocage)':<36}{comparaisons[0]:>12}")
+    print(f"{'Comparaisons (toutes les paires)':<36}{nb_canoniques * (nb_canoniques - 1) // 2:>12}")
+    print(f"{'Temps par copie (ms)':<36}{duree / len(toutes) * 1000:>12.3f}")
@@ -0,0 +1,85 @@
+"""
+Benchmark de brain.memory.DecisionMemory
+Compare l'écriture décision par décision (une connexion SQLite par appel,
+comme avant) au writer par lots, puis mesure la lecture des décisions récentes
+sur un journal de plusieurs millions de lignes.
+
+Usage: python benchmarks/bench_decision_memory.py [nombre_de_decisions]
+"""
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brain.memory import DecisionMemory
+
+NB_DECISIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+NB_ECRITURES = 5000
+ACTIONS = ["publish", "review", "ad_draft"]
+REPETITIONS = 5
+
+
+def ecriture_ancienne(db_path, i):
+    """log_decision d'origine : une connexion et une transaction par décision."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            INSERT INTO decision_logs (trend_id, score, reasoning, action, context_json)
+            VALUES (?, ?, ?, ?, ?)
+        """, (f"t{i}", 80.0, "bench", "publish", json.dumps({"i": i})))
+
+
+def mesurer(fonction):
+    durees = []
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return min(durees) * 1000
+
+
+if __name__ == "__main__":
+    dossier = tempfile.mkdtemp()
+    memoire = DecisionMemory(os.path.join(dossier, "brain_memory.db"))
+
+    debut = time.perf_counter()
+    for i in range(NB_ECRITURES):
+        ecriture_ancienne(memoire.db_path, i)
+    avant = NB_ECRITURES / (time.perf_counter() - debut)
+
+    debut = time.perf_counter()
+    for i in range(NB_ECRITURES):
+        memoire.log_decision(f"t{i}", 80.0, "bench", "publish", {"i": i})
+    memoire.flush()
+    apres = NB_ECRITURES / (time.perf_counter() - debut)
+    print(f"✍️ Écriture: {avant:,.0f} décisions/s avant, {apres:,.0f} décisions/s après")
+
+    print(f"⏳ Remplissage du journal ({NB_DECISIONS:,} décisions)...")
+    rnd = random.Random(42)
+    lot = []
+    for i in range(NB_DECISIONS):
+        lot.append((f"t{rnd.randint(1, 50_000)}", rnd.random() * 100, "bench", rnd.choice(ACTIONS), {}))
+        if len(lot) == 50_000:
+            memoire.log_decisions(lot)
+            lot = []
+    memoire.log_decisions(lot)
+    memoire.flush()
+
+    dernier = memoire.get_recent_decisions(limit=50)[-1][0]
+    scenarios = [
+        ("50 plus récentes", {}),
+        ("Filtre action", {"action": "ad_draft"}),
+        ("Filtre trend_id", {"trend_id": "t1234"}),
+        ("Page suivante (before_id)", {"before_id": dernier}),
+    ]
+    for nom, filtres in scenarios:
+        print(f"{nom:<30}{mesurer(lambda: memoire.get_recent_decisions(limit=50, **filtres)):>8.2f} ms")
+
+    debut = time.perf_counter()
+    supprimees = memoire.compact(retention_days=0)
+    print(f"🗜️ Compaction: {supprimees:,} décisions résumées en {time.perf_counter() - debut:.1f}s")
+    memoire.close()
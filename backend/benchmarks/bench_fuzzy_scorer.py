@@ -0,0 +1,132 @@
+"""
+Benchmark du score de pertinence de fuzzy_search
+Compare l'ancien calculer_pertinence (copie ci-dessous, tout est recalculé
+pour chaque produit) au ScoreurPertinence compilé une fois par recherche,
+sur un corpus de noms générés, et vérifie que les scores sont identiques.
+
+Usage: python benchmarks/bench_fuzzy_scorer.py [nombre_de_produits]
+"""
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzy_search import ScoreurPertinence, generate_search_variants
+
+NB_PRODUITS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+TERMES = ["chargeurs téléphone", "perruque", "Montre connectée", "tv", "le parfum", "casque bluetooth", "ordi-portable"]
+MOTS = ["chargeur", "chargeurs", "téléphone", "telephone", "rapide", "usb-c", "perruque", "perruques", "cheveux",
+        "wig", "montre", "connectée", "Montre", "tv", "tvs", "smart", "parfum", "eau de toilette", "casque",
+        "bluetooth", "ordi", "portable", "ordinateur", "samsung", "iPhone", "noir", "lot de 2", "femme", "homme",
+        "pineapple", "écran", "souris", "le", "la"]
+CATEGORIES = ["", "Téléphonie", "Beauté", "Informatique", "Perruques", "Mode", None]
+
+
+def calculer_pertinence_ancienne(produit: Dict, terme: str, variantes: List[str]) -> float:
+    """calculer_pertinence d'origine (recalcule tout pour chaque produit)."""
+    score = 0.0
+    nom = (produit.get('nom') or '').lower()
+    categorie = (produit.get('categorie') or '').lower()
+    marque = (produit.get('marque') or '').lower()
+    
+    terme_lower = terme.lower()
+    terme_mots = terme_lower.split()
+    
+    # Vérifier si le terme ou une variante pertinente est présente
+    terme_present = terme_lower in nom
+    variante_presente = False
+    variante_utilisee = None
+    
+    # Vérifier les variantes pertinentes (pas toutes, seulement les principales)
+    variantes_principales = variantes[:10]  # Top 10 variantes
+    for v in variantes_principales:
+        v_lower = v.lower()
+        if v_lower in nom:
+            variante_presente = True
+            variante_utilisee = v_lower
+            break
+    
+    # Si ni le terme ni une variante n'est présente, score très bas
+    if not terme_present and not variante_presente:
+        # Vérifier si au moins un mot du terme est présent
+        mots_presents = sum(1 for mot in terme_mots if mot in nom)
+        if mots_presents == 0:
+            return 0.0  # Aucun lien, score 0
+        elif mots_presents < len(terme_mots):
+            score += 5.0  # Score très bas si seulement quelques mots
+    else:
+        # Score basé sur la présence du terme dans le nom (poids fort)
+        if terme_present:
+            score += 60.0
+        elif variante_presente:
+            score += 50.0
+        
+        # Score basé sur la position dans le nom (au début = plus pertinent)
+        if nom.startswith(terme_lower):
+            score += 25.0
+        elif variante_utilisee and nom.startswith(variante_utilisee):
+            score += 20.0
+        elif terme_lower in nom[:30]:  # Dans les 30 premiers caractères
+            score += 15.0
+        
+        # Score basé sur la catégorie
+        if terme_lower in categorie or (variante_utilisee and variante_utilisee in categorie):
+            score += 10.0
+        
+        # Bonus si le terme exact est présent comme mot complet
+        if terme_lower in nom.split():
+            score += 15.0
+    
+    # Pénalité FORTE si le produit contient des mots non liés (téléphone, ordinateur, etc.)
+    mots_non_pertinents = ['telephone', 'smartphone', 'laptop', 'ordinateur', 'tv', 'television', 
+                           'casque', 'ecouteur', 'sony', 'samsung', 'apple', 'iphone', 'ipad',
+                           'enceinte', 'bluetooth', 'ecran', 'moniteur', 'clavier', 'souris']
+    
+    mots_non_pertinents_trouves = [mot for mot in mots_non_pertinents if mot in nom]
+    if mots_non_pertinents_trouves and not terme_present and not variante_presente:
+        score = 0.0  # Score 0 si produit non pertinent ET terme absent
+    elif mots_non_pertinents_trouves:
+        score -= 40.0  # Pénalité forte même si terme présent
+    
+    # Bonus si plusieurs mots du terme sont présents
+    if terme_present or variante_presente:
+        mots_terme_presents = sum(1 for mot in terme_mots if mot in nom)
+        if mots_terme_presents == len(terme_mots):
+            score += 10.0
+    
+    return max(0.0, min(100.0, score))
+
+
+def corpus(n, graine=42):
+    aleatoire = random.Random(graine)
+    return [{"nom": " ".join(aleatoire.choices(MOTS, k=aleatoire.randint(1, 9))),
+             "categorie": aleatoire.choice(CATEGORIES),
+             "marque": aleatoire.choice(["Samsung", "Generic", None])}
+            for _ in range(n)]
+
+
+if __name__ == "__main__":
+    produits = corpus(NB_PRODUITS)
+    print(f"{NB_PRODUITS} produits par terme\n")
+    print(f"{'Terme':<24}{'avant (µs/produit)':>20}{'après (µs/produit)':>20}{'gain':>8}")
+    total_avant = total_apres = 0.0
+    for terme in TERMES:
+        variantes = generate_search_variants(terme)
+
+        debut = time.perf_counter()
+        anciens = [calculer_pertinence_ancienne(p, terme, variantes) for p in produits]
+        avant = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        nouveaux = ScoreurPertinence(terme, variantes).score_many(produits)
+        apres = time.perf_counter() - debut
+
+        differences = sum(a != b for a, b in zip(anciens, nouveaux))
+        assert differences == 0, f"{differences} scores différents pour '{terme}'"
+        total_avant += avant
+        total_apres += apres
+        print(f"{terme:<24}{avant / NB_PRODUITS * 1e6:>20.2f}{apres / NB_PRODUITS * 1e6:>20.2f}{avant / apres:>7.1f}x")
+    print(f"\n✅ Scores identiques ; gain global {total_avant / total_apres:.1f}x")
@@ -0,0 +1,143 @@
+"""
+Benchmark de journal_vente.get_ventes sur un historique de 1M de ventes
+Compare l'ancien schéma (index simples, LIKE, pagination par OFFSET) aux index
+couvrants, au test d'existence par l'index trigramme FTS5 et à la pagination par curseur.
+Les deux bases partent du même schéma (init_journal_db, triggers d'agrégats compris) ;
+seuls les index de get_ventes et l'index FTS diffèrent, et les deux côtés construisent
+les mêmes dictionnaires : l'écart mesuré vient uniquement des index et des requêtes.
+
+Usage: python benchmarks/bench_get_ventes.py [nombre_de_ventes]
+"""
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import journal_vente
+
+NB_VENTES = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+NB_BOUTIQUES = 20
+TAILLE_PAGE = 50
+PAGE_PROFONDE = 200  # Page atteinte par OFFSET vs curseur
+REPETITIONS = 5
+
+PRODUITS = ["Téléphone", "Chargeur", "Écouteurs", "Montre connectée", "Sac à main",
+            "Chaussures", "Robe wax", "Mixeur", "Ventilateur", "Parfum"]
+VILLES = ["Dakar", "Thiès", "Touba", "Saint-Louis", "Kaolack", "Ziguinchor", None]
+
+
+def generer_ventes(n):
+    rnd = random.Random(42)
+    for _ in range(n):
+        yield (
+            rnd.randint(1, NB_BOUTIQUES),
+            f"{rnd.randint(2019, 2025)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            f"{rnd.choice(PRODUITS)} modèle {rnd.randint(1, 400)}",
+            rnd.randint(1, 900) * 100,
+            rnd.randint(1, 4),
+            rnd.choice(VILLES),
+        )
+
+
+def creer_base_ancienne(source, chemin):
+    """Copie de la base optimisée ramenée aux index d'origine (mono-colonne, sans FTS)."""
+    shutil.copyfile(source, chemin)
+    conn = sqlite3.connect(chemin)
+    conn.executescript("""
+        DROP TRIGGER IF EXISTS trg_ventes_fts_insert;
+        DROP TRIGGER IF EXISTS trg_ventes_fts_delete;
+        DROP TRIGGER IF EXISTS trg_ventes_fts_update;
+        DROP TABLE IF EXISTS ventes_fts;
+        DROP INDEX idx_ventes_date_couvrant;
+        DROP INDEX idx_ventes_boutique_couvrant;
+        CREATE INDEX idx_date_vente ON ventes(date_vente);
+        CREATE INDEX idx_boutique ON ventes(boutique_id);
+        ANALYZE;
+    """)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def ancienne_requete(chemin, boutique_id=None, date_debut=None, date_fin=None, produit_nom=None,
+                     limit=TAILLE_PAGE, offset=0):
+    """get_ventes avant optimisation (LIKE + OFFSET)."""
+    query = """SELECT v.*, b.nom as boutique_nom FROM ventes v
+               LEFT JOIN boutiques b ON v.boutique_id = b.id WHERE 1=1"""
+    params = []
+    if boutique_id:
+        query += " AND v.boutique_id = ?"
+        params.append(boutique_id)
+    if date_debut:
+        query += " AND v.date_vente >= ?"
+        params.append(date_debut)
+    if date_fin:
+        query += " AND v.date_vente <= ?"
+        params.append(date_fin)
+    if produit_nom:
+        query += " AND v.produit_nom LIKE ?"
+        params.append(f"%{produit_nom}%")
+    query += " ORDER BY v.date_vente DESC LIMIT ? OFFSET ?"
+    params += [limit, offset]
+    conn = sqlite3.connect(chemin)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    return [journal_vente._vente_depuis_row(row) for row in rows]
+
+
+def mesurer(fonction):
+    durees = []
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return min(durees) * 1000
+
+
+if __name__ == "__main__":
+    dossier = tempfile.mkdtemp()
+    ancienne = os.path.join(dossier, "ventes_ancien.db")
+    journal_vente.DB_PATH = os.path.join(dossier, "ventes_optimise.db")
+
+    print(f"⏳ Génération de {NB_VENTES:,} ventes...")
+    debut = time.perf_counter()
+    journal_vente.init_journal_db()
+    conn = sqlite3.connect(journal_vente.DB_PATH)
+    conn.executemany("INSERT INTO boutiques (nom) VALUES (?)", [(f"B{i}",) for i in range(2, NB_BOUTIQUES + 1)])
+    conn.executemany("""
+        INSERT INTO ventes (boutique_id, date_vente, produit_nom, prix, quantite, localisation)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, generer_ventes(NB_VENTES))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    creer_base_ancienne(journal_vente.DB_PATH, ancienne)
+    print(f"✅ Bases prêtes en {time.perf_counter() - debut:.0f}s\n")
+
+    scenarios = [
+        ("Période (1 mois)", {"date_debut": "2024-03-01", "date_fin": "2024-03-31"}),
+        ("Boutique + période", {"boutique_id": 7, "date_debut": "2024-01-01", "date_fin": "2024-06-30"}),
+        ("Produit fréquent", {"produit_nom": "chargeur"}),
+        ("Produit sélectif", {"produit_nom": "montre connectée modèle 12"}),
+        ("Produit absent", {"produit_nom": "ordinateur"}),
+        ("Produit absent (trigrammes présents)", {"produit_nom": "chargeur modèle 1234"}),
+        ("Boutique + produit", {"boutique_id": 3, "produit_nom": "parfum modèle 399"}),
+    ]
+
+    print(f"{'Scénario':<40}{'avant (ms)':>12}{'après (ms)':>12}")
+    for nom, filtres in scenarios:
+        avant = mesurer(lambda: ancienne_requete(ancienne, **filtres))
+        apres = mesurer(lambda: journal_vente.get_ventes(limit=TAILLE_PAGE, **filtres))
+        print(f"{nom:<40}{avant:>12.1f}{apres:>12.1f}")
+
+    # Curseur tel que renvoyé par la page précédente (next_cursor)
+    curseur = journal_vente.encoder_curseur(journal_vente.get_ventes(limit=PAGE_PROFONDE * TAILLE_PAGE)[-1])
+    avant = mesurer(lambda: ancienne_requete(ancienne, offset=PAGE_PROFONDE * TAILLE_PAGE))
+    apres = mesurer(lambda: journal_vente.get_ventes(limit=TAILLE_PAGE, curseur=curseur))
+    print(f"{f'Page {PAGE_PROFONDE} (OFFSET vs curseur)':<40}{avant:>12.1f}{apres:>12.1f}")
@@ -0,0 +1,82 @@
+"""
+Benchmark du cache HTTP des pages de listes (http_cache)
+Un serveur local sert la fixture jumia_recherche.html pour une catégorie ;
+on relance NB_PASSAGES fois scraper_jumia_categorie et on compte les octets
+reçus, les pages analysées et le temps par passage, selon le serveur :
+- "page modifiée" : les produits changent à chaque passage (= comportement d'avant : tout est analysé)
+- "sans ETag" : aucun validateur, seul un jeton dans un <script> change -> empreinte identique
+- "ETag" : le serveur répond 304 aux requêtes conditionnelles
+
+Usage: python benchmarks/bench_http_cache.py [nombre_de_passages]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_cache
+import jumia_scraper
+
+NB_PASSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+FIXTURE = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jumia_recherche.html"), "rb").read()
+ETAG = '"v1"'
+etat = {"mode": None, "octets": 0, "passage": 0}
+
+
+class PageCategorie(BaseHTTPRequestHandler):
+    def do_GET(self):
+        mode = etat["mode"]
+        if mode == "ETag" and self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        corps = FIXTURE.replace(b"window.dataLayer=window.dataLayer||[];",
+                                f"window.csrf='{uuid.uuid4().hex}';".encode())
+        if mode == "page modifiée":
+            corps = corps.replace(b"FCFA</div>", f"{etat['passage']} FCFA</div>".encode(), 1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        if mode == "ETag":
+            self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(corps)
+        etat["octets"] += len(corps)
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), PageCategorie)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    jumia_scraper.JUMIA_URL = f"http://127.0.0.1:{serveur.server_address[1]}"
+
+    analyses = []
+    extraire_page = jumia_scraper._extraire_page
+    jumia_scraper._extraire_page = lambda response: analyses.append(1) or extraire_page(response)
+
+    print(f"{NB_PASSAGES} passages sur la même catégorie (40 produits)\n")
+    print(f"{'Serveur':<18}{'Ko reçus':>10}{'analyses':>10}{'ms/passage':>12}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for mode in ("page modifiée", "sans ETag", "ETag"):
+            http_cache.DB_PATH = os.path.join(dossier, f"{mode}.db")
+            http_cache.init_http_cache()
+            etat.update(mode=mode, passage=-1)
+            jumia_scraper.scraper_jumia_categorie("telephones-tablettes", 40)  # Premier passage : cache vide
+            etat["octets"] = 0
+            analyses.clear()
+            debut = time.perf_counter()
+            for passage in range(NB_PASSAGES):
+                etat["passage"] = passage
+                produits = jumia_scraper.scraper_jumia_categorie("telephones-tablettes", 40)
+                assert len(produits) == 40
+            duree = (time.perf_counter() - debut) / NB_PASSAGES
+            print(f"{mode:<18}{etat['octets'] / 1024:>10.0f}{len(analyses):>10}{duree * 1000:>12.2f}")
+    serveur.shutdown()
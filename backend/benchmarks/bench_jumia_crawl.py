@@ -0,0 +1,71 @@
+"""
+Benchmark de la lecture paginée des listes Jumia
+Un serveur local sert des pages de recherche (fixture jumia_recherche.html,
+SKU propres à chaque page) avec LATENCE secondes de délai par requête ; au-delà
+de NB_PAGES pages il renvoie la dernière page, comme Jumia. On compare :
+- avant : page 1 seulement (ancien scraper_jumia_recherche_simple)
+- pages une par une (PAGES_PARALLELES = 1)
+- après : pages téléchargées en parallèle (crawler_pages)
+
+Usage: python benchmarks/bench_jumia_crawl.py [limit]
+"""
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jumia_scraper
+
+LIMIT = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+LATENCE = 0.3  # Secondes par page (aller-retour Dakar -> Jumia + rendu)
+NB_PAGES = 6  # Pages existantes pour la recherche
+FIXTURE = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jumia_recherche.html"), "rb").read()
+requetes = []
+
+
+class PagesJumia(BaseHTTPRequestHandler):
+    def do_GET(self):
+        page = min(int(parse_qs(urlsplit(self.path).query).get("page", ["1"])[0]), NB_PAGES)
+        requetes.append(page)
+        time.sleep(LATENCE)
+        corps = re.sub(rb"NAFAMZ", f"P{page}AMZ".encode(), FIXTURE)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+
+def mesurer(nom, fonction):
+    requetes.clear()
+    debut = time.perf_counter()
+    produits = fonction()
+    duree = time.perf_counter() - debut
+    skus = {p["sku"] for p in produits}
+    assert len(skus) == len(produits), "doublons"
+    print(f"{nom:<38}{len(produits):>10}{len(requetes):>10}{duree * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), PagesJumia)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    jumia_scraper.JUMIA_URL = f"http://127.0.0.1:{serveur.server_address[1]}"
+
+    print(f"limit={LIMIT}, {NB_PAGES} pages de 40 produits, {LATENCE * 1000:.0f} ms par page\n")
+    print(f"{'Lecture':<38}{'produits':>10}{'pages':>10}{'durée (ms)':>12}")
+    mesurer("avant: page 1 seulement", lambda: jumia_scraper.crawler_pages(
+        lambda page: f"{jumia_scraper.JUMIA_URL}/catalog/?q=chargeur", LIMIT, max_pages=1))
+    jumia_scraper.PAGES_PARALLELES = 1
+    mesurer("pages une par une", lambda: jumia_scraper.scraper_jumia_recherche_simple("chargeur", LIMIT))
+    jumia_scraper.PAGES_PARALLELES = 5
+    mesurer("après: pages en parallèle", lambda: jumia_scraper.scraper_jumia_recherche_simple("chargeur", LIMIT))
+    mesurer("après: limit > pages existantes", lambda: jumia_scraper.scraper_jumia_recherche_simple("chargeur", 1000))
+    serveur.shutdown()
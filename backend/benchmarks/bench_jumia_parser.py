@@ -0,0 +1,99 @@
+"""
+Benchmark de l'analyse des pages de listes Jumia
+Compare, sur les pages de benchmarks/fixtures (balisage des listes Jumia :
+<article class="prd">, lien a.core et attributs data-ga4-*) :
+- avant : BeautifulSoup html.parser sur toute la page, puis un find() par champ
+  et par article (copie de l'ancien extraire_donnees_produit ci-dessous)
+- après : chaque parseur de jumia_parser (SoupStrainer limité aux articles, lxml)
+et vérifie que les produits extraits sont identiques.
+
+Usage: python benchmarks/bench_jumia_parser.py [repetitions]
+"""
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jumia_parser import PARSEURS, iter_produits, nettoyer_prix
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jumia_*.html")))
+REPETITIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+
+def extraire_ancien(element):
+    """extraire_donnees_produit d'origine : un find() par champ."""
+    core_link = element.find('a', class_='core')
+    nom_elem = element.find('div', class_='name')
+    nom = nom_elem.get_text(strip=True) if nom_elem else "Nom non disponible"
+    if nom == "Nom non disponible" and core_link:
+        nom = core_link.get('data-ga4-item_name', nom)
+    prix_elem = element.find('div', class_='prc')
+    prix_text = prix_elem.get_text(strip=True) if prix_elem else "0"
+    prix_usd = None
+    if core_link and core_link.get('data-ga4-price'):
+        try:
+            prix_usd = float(core_link.get('data-ga4-price'))
+        except ValueError:
+            pass
+    lien = ""
+    if core_link and core_link.get('href'):
+        lien = core_link.get('href')
+        if lien and not lien.startswith('http'):
+            lien = f"https://www.jumia.sn{lien}"
+    remise_elem = element.find('div', class_='bdg')
+    img_elem = element.find('img', class_='img')
+    image = ""
+    if img_elem:
+        image = img_elem.get('data-src') or img_elem.get('src') or ""
+        if image.startswith('data:image'):
+            image = img_elem.get('data-src') or ""
+    return {
+        "nom": nom, "prix": nettoyer_prix(prix_text), "prix_texte": prix_text, "prix_usd": prix_usd,
+        "lien": lien, "image": image, "remise": remise_elem.get_text(strip=True) if remise_elem else None,
+        "marque": core_link.get('data-ga4-item_brand') if core_link else None,
+        "categorie": core_link.get('data-ga4-item_category') if core_link else None,
+    }
+
+
+def analyse_ancienne(contenu):
+    soup = BeautifulSoup(contenu, 'html.parser')
+    return [extraire_ancien(element) for element in soup.find_all('article', class_='prd')]
+
+
+def sans_date(produits):
+    # "sku" n'existait pas dans l'ancienne extraction
+    return [{k: v for k, v in p.items() if k not in ("date_scraping", "sku")} for p in produits]
+
+
+def mesurer(fonction, contenu):
+    """Meilleur temps (s) pour analyser la page sur REPETITIONS essais."""
+    meilleur = float("inf")
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        fonction(contenu)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+if __name__ == "__main__":
+    if not FIXTURES:
+        sys.exit("❌ Aucune page dans benchmarks/fixtures")
+    candidats = [("avant: html.parser + find()", analyse_ancienne)] + [
+        (f"après: {nom}", lambda contenu, nom=nom: list(iter_produits(contenu, parseur=nom))) for nom in PARSEURS
+    ]
+    for chemin in FIXTURES:
+        contenu = open(chemin, "rb").read()
+        reference = analyse_ancienne(contenu)
+        print(f"\n{os.path.basename(chemin)} ({len(contenu) / 1024:.0f} Ko, {len(reference)} articles)")
+        print(f"{'Parseur':<32}{'ms/page':>10}{'pages/s':>10}{'gain':>8}")
+        base = None
+        for nom, fonction in candidats:
+            assert sans_date(fonction(contenu)) == reference, f"Produits différents avec {nom}"
+            duree = mesurer(fonction, contenu)
+            base = base or duree
+            print(f"{nom:<32}{duree * 1000:>10.2f}{1 / duree:>10.0f}{base / duree:>7.1f}x")
+    print("\n✅ Produits identiques pour tous les parseurs")
@@ -0,0 +1,124 @@
+"""
+Benchmark du coût des logs sur les chemins chauds
+Compare, par appel :
+- avant : traces écrites de façon synchrone sur une sortie ligne par ligne
+  (comme les print d'origine vers la console), niveau DEBUG, et pour
+  get_produit_by_id le chemin "non trouvé" d'origine (COUNT + 3 IDs d'exemple)
+- après : log_config (file + thread d'écriture), niveau INFO ; les traces
+  DEBUG ne sont ni formatées ni écrites
+
+Chemins mesurés : fuzzy_search_jumia (scraper factice), generate_product_id,
+get_produit_by_id (trouvé / non trouvé) et enregistrer_evenement.
+
+Usage: python benchmarks/bench_logging.py [nombre_de_produits_en_base]
+"""
+import contextlib
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_config
+import marketplace_db
+from fuzzy_search import fuzzy_search_jumia
+
+NB_PRODUITS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+REPETITIONS = 5
+NOMS = ["Chargeur rapide USB-C", "Écouteurs sans fil", "Montre connectée", "Coque iPhone 13", "Lampe LED solaire"]
+
+
+def scraper_factice(terme, limit):
+    """40 produits par variante, sans réseau."""
+    return [{"nom": f"{NOMS[i % len(NOMS)]} {terme} modèle {i}", "lien": f"https://jumia.sn/{terme}/{i}", "prix": 5000 + i}
+            for i in range(40)]
+
+
+def get_produit_by_id_ancien(product_id):
+    """Chemin "non trouvé" d'origine : deux requêtes de debug et quatre print."""
+    conn = sqlite3.connect(marketplace_db.DB_PATH)
+    cursor = conn.cursor()
+    try:
+        print(f"🔍 Recherche du produit {product_id} dans la base de données")
+        cursor.execute("SELECT * FROM produits_marketplace WHERE product_id = ?", (product_id,))
+        row = cursor.fetchone()
+        if not row:
+            print(f"❌ Produit {product_id} non trouvé dans la table produits_marketplace")
+            cursor.execute("SELECT COUNT(*) FROM produits_marketplace")
+            count = cursor.fetchone()[0]
+            print(f"ℹ️ Nombre total de produits dans la base: {count}")
+            if count > 0:
+                cursor.execute("SELECT product_id FROM produits_marketplace LIMIT 3")
+                print(f"ℹ️ Exemples d'IDs: {[r[0] for r in cursor.fetchall()]}")
+            return None
+    finally:
+        conn.close()
+
+
+def preparer_base(db_path):
+    marketplace_db.DB_PATH = db_path
+    marketplace_db.init_marketplace_db()
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO produits_marketplace (product_id, nom, prix) VALUES (?, ?, ?)",
+            ((f"p{i:08d}", f"{NOMS[i % len(NOMS)]} {i}", 1000 + i) for i in range(NB_PRODUITS))
+        )
+
+
+def mesurer(fonction, nombre):
+    """Meilleur temps moyen par appel (µs) sur REPETITIONS séries de `nombre` appels."""
+    meilleur = float("inf")
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        for i in range(nombre):
+            fonction(i)
+        meilleur = min(meilleur, (time.perf_counter() - debut) / nombre)
+    return meilleur * 1e6
+
+
+def scenarios():
+    produit = {"nom": "Chargeur rapide", "lien": "https://jumia.sn/chargeur", "categories": ["Téléphonie"]}
+    return [
+        ("fuzzy_search_jumia (10 variantes x 40)", lambda i: fuzzy_search_jumia("chargeurs téléphone", scraper_factice), 20),
+        ("generate_product_id", lambda i: marketplace_db.generate_product_id(produit), 5000),
+        ("get_produit_by_id (trouvé)", lambda i: marketplace_db.get_produit_by_id(f"p{i % NB_PRODUITS:08d}"), 2000),
+        ("enregistrer_evenement", lambda i: marketplace_db.enregistrer_evenement(f"p{i:08d}", "view", source="bench"), 500),
+    ]
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as dossier:
+        preparer_base(os.path.join(dossier, "marketplace.db"))
+        # Sortie ligne par ligne (un write par trace), comme une console ou un pipe de logs
+        console = open(os.path.join(dossier, "console.log"), "w", buffering=1, encoding="utf-8")
+
+        # Avant : écriture synchrone dans le thread appelant, tout en DEBUG
+        racine = logging.getLogger()
+        racine.handlers = [logging.StreamHandler(console)]
+        racine.handlers[0].setFormatter(logging.Formatter(log_config.FORMAT_TEXTE))
+        racine.setLevel(logging.DEBUG)
+        avant = {}
+        for nom, fonction, nombre in scenarios():
+            avant[nom] = mesurer(fonction, nombre)
+        with contextlib.redirect_stdout(console):
+            avant["get_produit_by_id (non trouvé)"] = mesurer(lambda i: get_produit_by_id_ancien(f"absent{i}"), 2000)
+        octets_avant = console.tell()
+
+        # Après : file + thread d'écriture, niveau INFO
+        log_config.configurer_logging(niveau="INFO", flux=console)
+        apres = {}
+        for nom, fonction, nombre in scenarios():
+            apres[nom] = mesurer(fonction, nombre)
+        apres["get_produit_by_id (non trouvé)"] = mesurer(lambda i: marketplace_db.get_produit_by_id(f"absent{i}"), 2000)
+        log_config.arreter_logging()
+        octets_apres = console.tell() - octets_avant
+        console.close()
+
+    print(f"{NB_PRODUITS} produits en base, meilleur temps moyen par appel sur {REPETITIONS} séries\n")
+    print(f"{'Chemin':<42}{'avant (µs)':>12}{'après (µs)':>12}{'gain':>8}")
+    for nom in avant:
+        print(f"{nom:<42}{avant[nom]:>12.1f}{apres[nom]:>12.1f}{avant[nom] / apres[nom]:>7.1f}x")
+    print(f"\nVolume de logs écrit : {octets_avant / 1e6:.1f} Mo avant, {octets_apres / 1e6:.2f} Mo après")
@@ -0,0 +1,82 @@
+"""
+Test de charge : routes bloquantes déclarées `async def` vs routes synchrones
+exécutées dans le pool de threads.
+L'appel OpenAI de generer_descriptif_marketing est remplacé par une attente
+de LATENCE secondes. On envoie CONCURRENCE requêtes simultanées :
+- avant : une route `async def` qui appelle la fonction bloquante (ancien schéma)
+- après : la vraie route /api/marketing/generate-description (def, pool de threads)
+et on mesure le débit ainsi que la latence de /health pendant la charge.
+
+Usage: OPENAI_API_KEY=... python benchmarks/load_test_api.py [concurrence]
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import uvicorn
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api
+
+CONCURRENCE = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+LATENCE = 0.2  # Secondes, ordre de grandeur d'un appel OpenAI rapide
+PORT = 8765
+CORPS = {"produit": {"nom": "Chargeur rapide", "prix": 5000}, "style": "attractif"}
+
+
+def descriptif_lent(produit, style="attractif"):
+    time.sleep(LATENCE)
+    return {"titre": produit["nom"], "description": "", "hashtags": [], "from_cache": False}
+
+
+api.generer_descriptif_marketing = descriptif_lent
+
+
+@api.app.post("/bench/async-bloquant")
+async def route_async_bloquante(request: api.MarketingDescriptionRequest):
+    """Ancien schéma : appel bloquant directement dans la boucle d'événements."""
+    return {"success": True, "descriptif": api.generer_descriptif_marketing(request.produit, request.style)}
+
+
+def charge(url):
+    """Débit (req/s) et latence max de /health pendant CONCURRENCE appels simultanés."""
+    latences_health = []
+    fin = threading.Event()
+
+    def sonde():
+        while not fin.is_set():
+            debut = time.perf_counter()
+            requests.get(f"http://127.0.0.1:{PORT}/health", timeout=60)
+            latences_health.append(time.perf_counter() - debut)
+            time.sleep(0.02)
+
+    thread_sonde = threading.Thread(target=sonde)
+    thread_sonde.start()
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCE) as executor:
+        reponses = list(executor.map(lambda _: requests.post(url, json=CORPS, timeout=120), range(CONCURRENCE)))
+    duree = time.perf_counter() - debut
+    fin.set()
+    thread_sonde.join()
+    assert all(r.status_code == 200 for r in reponses), [r.status_code for r in reponses]
+    return CONCURRENCE / duree, max(latences_health) * 1000
+
+
+if __name__ == "__main__":
+    serveur = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=PORT, log_level="warning"))
+    threading.Thread(target=serveur.run, daemon=True).start()
+    while not serveur.started:
+        time.sleep(0.05)
+
+    print(f"{CONCURRENCE} requêtes simultanées, {LATENCE * 1000:.0f} ms de latence simulée par appel")
+    print(f"{'Route':<45}{'req/s':>10}{'/health max (ms)':>20}")
+    for nom, chemin in [("avant: async def + appel bloquant", "/bench/async-bloquant"),
+                        ("après: def (pool de threads)", "/api/marketing/generate-description")]:
+        debit, health = charge(f"http://127.0.0.1:{PORT}{chemin}")
+        print(f"{nom:<45}{debit:>10.1f}{health:>20.0f}")
+
+    serveur.should_exit = True
@@ -0,0 +1,41 @@
+"""
+Profil du temps d'import de l'API (python -X importtime)
+Affiche la durée totale de `import api` et les imports directs les plus coûteux ;
+les modules chargés à la demande sont détaillés par GET /api/debug/chargement.
+
+Usage: python benchmarks/profil_import_api.py [nombre_de_lignes]
+"""
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NB_LIGNES = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+
+def profiler(module: str = "api"):
+    """Lance l'import dans un processus neuf et renvoie [(profondeur, module, cumul_us)]."""
+    sortie = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    ).stderr
+    lignes = []
+    for ligne in sortie.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        _, cumul, nom = ligne[len("import time:"):].split("|")
+        profondeur = (len(nom) - len(nom.lstrip())) // 2
+        lignes.append((profondeur, nom.strip(), int(cumul)))
+    return lignes
+
+
+if __name__ == "__main__":
+    lignes = profiler()
+    total = next((cumul for profondeur, nom, cumul in lignes if profondeur == 0 and nom == "api"), None)
+    if total is None:
+        sys.exit("❌ Import de api impossible (lancer depuis un environnement configuré)")
+    print(f"⏱️ import api: {total / 1000:.0f} ms\n")
+    directs = sorted((l for l in lignes if l[0] == 1), key=lambda l: -l[2])[:NB_LIGNES]
+    print(f"{'Import direct':<40}{'cumul (ms)':>12}")
+    for _, nom, cumul in directs:
+        print(f"{nom:<40}{cumul / 1000:>12.1f}")
@@ -1,30 +1,65 @@
 from datetime import datetime, date
+from functools import lru_cache
 import holidays
 
+
+@lru_cache(maxsize=4)
+def _senegal_holidays(year):
+    """Holidays table for one year (built once per year, shared by every context)."""
+    return holidays.Senegal(years=year)
+
+
+def _religious_events(year):
+    # Religious events (Approximate for the year or manually updated)
+    # In a real system, these would be calculated or fetched from an API
+    return {
+        "Tabaski": date(year, 6, 16), # Approx for 2024, needs adjustment
+        "Korité": date(year, 4, 10),
+        "Magal de Touba": date(year, 8, 23),
+        "Gamou": date(year, 9, 15)
+    }
+
+
 class SenegalContext:
+    """
+    Market context for Senegal.
+    The context and the boost factor are computed once per calendar day and
+    memoized: every call on the same day returns the cached values, and the
+    holidays / events tables are rebuilt only when the year changes.
+    """
+
     def __init__(self):
-        self.year = datetime.now().year
+        self._day = None
+        self._context = None
+        self._boost = None
+        self._set_year(datetime.now().year)
+
+    def _set_year(self, year):
+        self.year = year
         # Holidays package for Senegal
-        self.sn_holidays = holidays.Senegal(years=self.year)
-        
-        # Religious events (Approximate for the year or manually updated)
-        # In a real system, these would be calculated or fetched from an API
-        self.religious_events = {
-            "Tabaski": date(self.year, 6, 16), # Approx for 2024, needs adjustment
-            "Korité": date(self.year, 4, 10),
-            "Magal de Touba": date(self.year, 8, 23),
-            "Gamou": date(self.year, 9, 15)
-        }
+        self.sn_holidays = _senegal_holidays(year)
+        self.religious_events = _religious_events(year)
 
-    def get_current_context(self):
-        today = date.today()
+    def _refresh(self, today):
+        """Recompute the context for a new day (and the tables on year rollover)."""
+        if today.year != self.year:
+            self._set_year(today.year)
         context = {
             "is_payday_period": 25 <= today.day <= 31 or 1 <= today.day <= 5,
             "current_season": self._get_season(today),
             "upcoming_events": self._get_upcoming_events(today),
             "holiday_context": self.sn_holidays.get(today)
         }
-        return context
+        boost = self._compute_boost_factor(context)
+        # Single assignment: concurrent readers see either the old or the new day
+        self._day, self._context, self._boost = today, context, boost
+
+    def get_current_context(self):
+        """Market context of the day (cached: treat the returned dict as read-only)."""
+        today = date.today()
+        if today != self._day:
+            self._refresh(today)
+        return self._context
 
     def _get_season(self, today):
         # Senegal seasons:
@@ -47,22 +82,38 @@ class SenegalContext:
                 upcoming.append({"name": name, "days_to": delta})
         return upcoming
 
-    def get_marketing_boost_factor(self):
-        """Returns a multiplier for logic based on context (0.5 to 2.5)."""
-        ctx = self.get_current_context()
+    @staticmethod
+    def _compute_boost_factor(ctx):
         factor = 1.0
-        
+
         if ctx["is_payday_period"]:
             factor += 0.5
-        
+
         if ctx["upcoming_events"]:
             factor += 1.0 # Significant boost for religious festivals
-            
+
         if ctx["holiday_context"]:
             factor += 0.3
-            
+
         return factor
 
+    def get_marketing_boost_factor(self):
+        """Returns a multiplier for logic based on context (0.5 to 2.5)."""
+        self.get_current_context()
+        return self._boost
+
+
+_shared_context = None
+
+
+def get_senegal_context():
+    """Process-wide SenegalContext (avoids rebuilding it on every request)."""
+    global _shared_context
+    if _shared_context is None:
+        _shared_context = SenegalContext()
+    return _shared_context
+
+
 if __name__ == "__main__":
     sn = SenegalContext()
     print("Market Context Senegal:", sn.get_current_context())
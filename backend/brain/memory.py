@@ -1,14 +1,48 @@
 import sqlite3
 import json
-from datetime import datetime
+import queue
+import threading
+import time
+import atexit
+from datetime import datetime, timedelta
+
+BATCH_SIZE = 500         # Max decisions per INSERT transaction
+FLUSH_INTERVAL = 0.5     # Seconds a decision may wait in the buffer
+QUEUE_MAX_CHUNKS = 10000 # Backpressure: log_decision blocks when the writer falls this far behind
+RETENTION_DAYS = 90      # Default age after which decisions are compacted
+READ_FLUSH_TIMEOUT = 5.0 # Seconds a read waits for the writer before reading without the buffered decisions
+
+
+def _now():
+    # Same format as SQLite CURRENT_TIMESTAMP (UTC), taken when the decision is made
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
 
 class DecisionMemory:
-    def __init__(self, db_path="brain_memory.db"):
+    """
+    Decision log of the AI brain.
+    Writes go through a buffer drained by a single long-lived writer thread,
+    which inserts them in batches (one transaction per batch). Reads flush
+    the buffer first, so a decision is visible as soon as log_decision returns
+    to the caller that then reads it. The wait is bounded: if the writer is
+    dead or stalled, reads go ahead without the buffered decisions.
+    """
+
+    def __init__(self, db_path="brain_memory.db", batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=QUEUE_MAX_CHUNKS)
+        self._writer = None
+        self._writer_lock = threading.Lock()
         self._init_db()
+        atexit.register(self.close)
 
     def _init_db(self):
         with sqlite3.connect(self.db_path) as conn:
+            # Only effective on a new database: lets compact() give pages back to the OS
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS decision_logs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -20,6 +54,21 @@ class DecisionMemory:
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # The rowid is implicitly the last column of each index: (timestamp, id) ordering is covered
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_decision_timestamp ON decision_logs(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_decision_action ON decision_logs(action, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_decision_trend ON decision_logs(trend_id, timestamp)")
+            # Daily summaries of compacted decisions
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS decision_logs_daily (
+                    day TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    decisions INTEGER NOT NULL,
+                    avg_score REAL,
+                    max_score REAL,
+                    PRIMARY KEY (day, action)
+                )
+            """)
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS niche_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -30,18 +79,172 @@ class DecisionMemory:
                 )
             """)
 
+    # --- Writes ---
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="decision-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                rows, waiters = [], []
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        rows.extend(item)
+                    if stop or waiters or len(rows) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if rows:
+                    try:
+                        with conn:
+                            conn.executemany("""
+                                INSERT INTO decision_logs (trend_id, score, reasoning, action, context_json, timestamp)
+                                VALUES (?, ?, ?, ?, ?, ?)
+                            """, rows)
+                    except sqlite3.Error as e:
+                        print(f"❌ Decision log write failed ({len(rows)} decisions dropped): {e}")
+                for waiter in waiters:
+                    waiter.set()
+        finally:
+            conn.close()
+
     def log_decision(self, trend_id, score, reasoning, action, context):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO decision_logs (trend_id, score, reasoning, action, context_json)
-                VALUES (?, ?, ?, ?, ?)
-            """, (trend_id, score, reasoning, action, json.dumps(context)))
+        """Buffers a decision; it is written by the writer thread within flush_interval."""
+        self.log_decisions([(trend_id, score, reasoning, action, context)])
+
+    def log_decisions(self, decisions):
+        """Buffers many decisions (trend_id, score, reasoning, action, context) at once."""
+        now = _now()
+        rows = [(trend_id, score, reasoning, action, json.dumps(context), now)
+                for trend_id, score, reasoning, action, context in decisions]
+        if rows:
+            self._ensure_writer()
+            self._queue.put(rows)
+
+    def log_decision_batch(self, trend_ids, scores, actions, reasoning, context_json):
+        """
+        Buffers a batch of decisions sharing the same reasoning and context
+        (already serialized): written in one go, without per-row JSON encoding.
+        """
+        now = _now()
+        rows = [(trend_id, score, reasoning, action, context_json, now)
+                for trend_id, score, action in zip(trend_ids, scores, actions)]
+        if rows:
+            self._ensure_writer()
+            self._queue.put(rows)
+
+    def flush(self, timeout=None):
+        """
+        Waits until every buffered decision is written.
+        Returns False if the writer did not get there within timeout.
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def _flush_before_read(self):
+        if not self.flush(timeout=READ_FLUSH_TIMEOUT):
+            print(f"⚠️ Decision writer did not flush within {READ_FLUSH_TIMEOUT}s, reading without buffered decisions")
 
-    def get_recent_decisions(self, limit=10):
+    def close(self):
+        """Writes the remaining decisions and stops the writer thread."""
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+        self._writer = None
+
+    # --- Reads ---
+
+    def get_recent_decisions(self, limit=10, action=None, trend_id=None, before_id=None):
+        """
+        Most recent decisions, newest first (served by the timestamp / action / trend_id indexes).
+        before_id: id of the last row of the previous page, to page through the log.
+        """
+        self._flush_before_read()
+        query = "SELECT * FROM decision_logs WHERE 1=1"
+        params = []
+        if action:
+            query += " AND action = ?"
+            params.append(action)
+        if trend_id:
+            query += " AND trend_id = ?"
+            params.append(trend_id)
+        if before_id:
+            query += """ AND (timestamp, id) < (SELECT timestamp, id FROM decision_logs WHERE id = ?)"""
+            params.append(before_id)
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
         with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT * FROM decision_logs ORDER BY timestamp DESC LIMIT ?", (limit,))
+            cursor = conn.execute(query, params)
             return cursor.fetchall()
 
+    # --- Retention ---
+
+    def compact(self, retention_days=RETENTION_DAYS, chunk_size=50000):
+        """
+        Rolls decisions older than retention_days into decision_logs_daily
+        (count, average and max score per day and action), then deletes them
+        in chunks so the writer is never blocked for long.
+
+        Returns:
+            Number of decisions removed from decision_logs
+        """
+        self._flush_before_read()
+        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+        removed = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            while True:
+                with conn:
+                    last = conn.execute("""
+                        SELECT max(id) FROM (SELECT id FROM decision_logs WHERE timestamp < ?
+                                             ORDER BY timestamp, id LIMIT ?)
+                    """, (cutoff, chunk_size)).fetchone()[0]
+                    if last is None:
+                        break
+                    bound = (cutoff, last)
+                    conn.execute("""
+                        INSERT INTO decision_logs_daily (day, action, decisions, avg_score, max_score)
+                        SELECT date(timestamp), coalesce(action, ''), COUNT(*), AVG(score), MAX(score)
+                        FROM decision_logs WHERE timestamp < ? AND id <= ?
+                        GROUP BY 1, 2
+                        ON CONFLICT(day, action) DO UPDATE SET
+                            avg_score = (avg_score * decisions + excluded.avg_score * excluded.decisions)
+                                        / (decisions + excluded.decisions),
+                            max_score = max(max_score, excluded.max_score),
+                            decisions = decisions + excluded.decisions
+                    """, bound)
+                    removed += conn.execute(
+                        "DELETE FROM decision_logs WHERE timestamp < ? AND id <= ?", bound
+                    ).rowcount
+            conn.execute("PRAGMA incremental_vacuum")
+        finally:
+            conn.close()
+        return removed
+
 if __name__ == "__main__":
     mem = DecisionMemory()
     mem.log_decision("test_trend", 85.5, "High potential", "publish", {"payday": True})
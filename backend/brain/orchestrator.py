@@ -1,43 +1,134 @@
 import os
 import json
-from .calendar import SenegalContext
+from collections import deque
+from .calendar import get_senegal_context
 from connectors.wp_connector import WooCommerceConnector
 from dotenv import load_dotenv
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("⚠️ numpy non installé. Installez-le avec: pip install numpy")
+
 load_dotenv()
 
+DECISION_LOG_SIZE = 1000  # Decisions kept in memory (oldest are dropped)
+PUBLISH_THRESHOLD = 80
+
+if NUMPY_AVAILABLE:
+    # Compact batch result: one row per trend, reasoning/context are shared by the batch
+    DECISION_DTYPE = np.dtype([
+        ("trend_id", object),
+        ("final_score", np.float64),
+        ("publish", np.bool_),
+    ])
+
 class AIOrchestrator:
-    def __init__(self):
-        self.context = SenegalContext()
+    def __init__(self, log_size=DECISION_LOG_SIZE):
+        self.context = get_senegal_context()
         self.wc = WooCommerceConnector()
-        self.decision_logs = []
+        # Ring buffer: a long-lived API process keeps only the latest decisions
+        self.decision_logs = deque(maxlen=log_size)
 
-    def evaluate_trend(self, trend_data):
-        """
-        Analyzes a trend against the current context.
-        Returns a relevance score and automated action suggestions.
-        """
+    def _context_snapshot(self):
+        """Boost, reasoning and serialized context of the day (shared by a whole batch)."""
         boost = self.context.get_marketing_boost_factor()
         market_ctx = self.context.get_current_context()
-        
-        score = trend_data.get("base_score", 50) * boost
-        
+
         reasoning = f"Trend evaluated with boost factor {boost}. "
         if market_ctx['is_payday_period']:
             reasoning += "Context: Payday period detected. "
         if market_ctx['upcoming_events']:
             reasoning += f"Context: Upcoming events: {market_ctx['upcoming_events']}. "
 
-        decision = {
-            "trend_id": trend_data.get("id"),
-            "final_score": min(score, 100),
-            "reasoning": reasoning,
-            "recommended_action": "publish" if score > 80 else "review",
-            "timestamp": json.dumps(market_ctx, default=str)
-        }
-        
-        self.decision_logs.append(decision)
-        return decision
+        return boost, reasoning, json.dumps(market_ctx, default=str)
+
+    def evaluate_trend(self, trend_data):
+        """
+        Analyzes a trend against the current context.
+        Returns a relevance score and automated action suggestions.
+        """
+        return self.evaluate_trends([trend_data])[0]
+
+    def evaluate_trends(self, trends):
+        """
+        Evaluates many trends at once: the market context is read once for
+        the whole batch instead of once per trend.
+        """
+        boost, reasoning, timestamp = self._context_snapshot()
+
+        decisions = []
+        for trend_data in trends:
+            score = trend_data.get("base_score", 50) * boost
+            decisions.append({
+                "trend_id": trend_data.get("id"),
+                "final_score": min(score, 100),
+                "reasoning": reasoning,
+                "recommended_action": "publish" if score > PUBLISH_THRESHOLD else "review",
+                "timestamp": timestamp
+            })
+
+        self.decision_logs.extend(decisions)
+        return decisions
+
+    def evaluate_batch(self, trend_ids, base_scores, memory=None, as_dataframe=False):
+        """
+        Vectorized evaluation of many trends (NumPy).
+
+        Args:
+            trend_ids: Sequence of trend ids
+            base_scores: Sequence / array of base scores (same length)
+            memory: DecisionMemory in which to persist the batch (one bulk write)
+            as_dataframe: Return a pandas DataFrame instead of a structured array
+
+        Returns:
+            (decisions, reasoning, context): structured array (trend_id, final_score,
+            publish) or DataFrame, plus the reasoning and serialized context shared
+            by every decision of the batch
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy n'est pas installé. Installez-le avec: pip install numpy")
+        scores = np.asarray(base_scores, dtype=np.float64)
+        if len(trend_ids) != len(scores):
+            raise ValueError("trend_ids and base_scores must have the same length")
+
+        boost, reasoning, timestamp = self._context_snapshot()
+        scores = scores * boost
+
+        decisions = np.empty(len(scores), dtype=DECISION_DTYPE)
+        decisions["trend_id"] = list(trend_ids)
+        decisions["final_score"] = np.minimum(scores, 100)
+        decisions["publish"] = scores > PUBLISH_THRESHOLD
+
+        if memory is not None:
+            memory.log_decision_batch(
+                decisions["trend_id"].tolist(),
+                decisions["final_score"].tolist(),
+                np.where(decisions["publish"], "publish", "review").tolist(),
+                reasoning,
+                timestamp,
+            )
+
+        # Only the tail that fits in the ring buffer is materialized as dicts
+        maxlen = self.decision_logs.maxlen
+        tail = decisions if maxlen is None else decisions[max(0, len(decisions) - maxlen):]
+        self.decision_logs.extend(
+            {
+                "trend_id": trend_id,
+                "final_score": final_score,
+                "reasoning": reasoning,
+                "recommended_action": "publish" if publish else "review",
+                "timestamp": timestamp,
+            }
+            for trend_id, final_score, publish in tail.tolist()
+        )
+
+        if as_dataframe:
+            import pandas as pd
+            decisions = pd.DataFrame(decisions)
+        return decisions, reasoning, timestamp
 
     def suggest_niche(self, products):
         """Analyzes a list of products to find an emerging niche."""
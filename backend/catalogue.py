@@ -0,0 +1,470 @@
+"""
+Catalogue canonique des produits (Jumia, Alibaba, marketplace)
+Un même produit physique apparaît plusieurs fois : dans produits_alibaba (une copie par
+recherche), dans chaque scraping Jumia et dans produits_marketplace (product_id md5 du nom,
+du lien et des catégories : changer de catégorie crée un « nouveau » produit).
+Le catalogue donne à chaque produit un identifiant stable (canonical_id) et garde le lien
+vers chacune de ses copies (source, clé dans la source) :
+- copie déjà vue (même source + clé) ou même lien -> même produit canonique
+- sinon détection des quasi-doublons par blocage : seuls les produits qui partagent un mot
+  significatif du nom, dans la même bande de prix ou une bande voisine, sont comparés
+  (mots du nom normalisés, marque compatible, écart de prix borné)
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from fuzzy_search import remove_accents
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "catalogue.db")
+
+FCFA_PAR_USD = float(os.getenv("FCFA_PAR_USD", "600"))  # Prix Jumia/marketplace en FCFA, Alibaba en USD
+SEUIL_SIMILARITE = 0.6  # Part minimale de mots communs (Jaccard) pour deux copies d'un même produit
+ECART_PRIX_MAX = 1.5  # Rapport de prix maximal entre deux copies (c'est aussi la largeur d'une bande)
+MOTS_SIGNATURE = 3  # Mots du nom utilisés pour chercher les candidats (références puis les plus longs)
+
+SOURCES = ("jumia", "alibaba", "marketplace")
+
+# Mots sans valeur pour reconnaître un produit
+MOTS_VIDES = {
+    "de", "du", "des", "la", "le", "les", "un", "une", "et", "en", "au", "aux", "pour", "avec", "sans",
+    "the", "for", "with", "and", "of", "a", "an", "in", "on", "to",
+    "new", "nouveau", "nouvelle", "original", "hot", "sale", "promo", "pcs", "piece", "pieces",
+}
+# Marques qui n'en sont pas
+MARQUES_GENERIQUES = {"", "oem", "odm", "generic", "generique", "no brand", "sans marque", "autre", "other"}
+
+# "128 Go" -> "128gb", "5000 mAh" -> "5000mah" : une capacité reste un seul mot
+_RE_UNITES = re.compile(r"(\d+(?:[.,]\d+)?)\s*(go|gb|to|tb|mo|mb|mah|w|v|l|ml|cm|mm|m|kg|g|pouces|inch|hz)\b")
+_UNITES = {"go": "gb", "to": "tb", "mo": "mb", "pouces": "inch"}
+_RE_MOTS = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)?")
+
+# Une seule écriture à la fois : deux copies d'un même produit indexées en parallèle
+# (pages Jumia lues en parallèle) ne doivent pas créer deux produits canoniques
+_verrou = threading.Lock()
+
+
+def init_catalogue():
+    """Initialise les tables du catalogue."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS produits_canoniques (
+            canonical_id TEXT PRIMARY KEY,
+            nom TEXT NOT NULL,
+            marque TEXT,
+            prix_usd REAL,
+            image TEXT,
+            categorie TEXT,
+            mots TEXT NOT NULL,  -- Mots normalisés du nom, séparés par des espaces
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Une ligne par copie du produit dans une source
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS liens_sources (
+            source TEXT NOT NULL,  -- jumia, alibaba, marketplace
+            cle_source TEXT NOT NULL,  -- SKU Jumia, productId Alibaba, product_id marketplace (sinon lien ou nom)
+            canonical_id TEXT NOT NULL,
+            nom TEXT,
+            prix REAL,
+            lien TEXT,
+            similarite REAL,  -- 1 : copie exacte (même clé ou même lien)
+            seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, cle_source),
+            FOREIGN KEY (canonical_id) REFERENCES produits_canoniques(canonical_id)
+        )
+    """)
+
+    # Index de blocage : (mot du nom, bande de prix) -> produits canoniques
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS blocs_catalogue (
+            mot TEXT NOT NULL,
+            bande INTEGER,  -- NULL : prix inconnu
+            canonical_id TEXT NOT NULL
+        )
+    """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_liens_canonical ON liens_sources(canonical_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_liens_lien ON liens_sources(lien)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_blocs_mot ON blocs_catalogue(mot, bande)")
+
+    conn.commit()
+    conn.close()
+
+
+# =========================
+# NORMALISATION
+# =========================
+
+def mots_nom(nom: Optional[str]) -> Set[str]:
+    """
+    Mots significatifs d'un nom de produit : minuscules sans accents, unités collées
+    aux nombres (128 Go -> 128gb), mots vides et lettres isolées retirés.
+    """
+    texte = _RE_UNITES.sub(lambda m: m.group(1) + _UNITES.get(m.group(2), m.group(2)),
+                           remove_accents(nom or "").lower())
+    return {mot for mot in _RE_MOTS.findall(texte) if mot not in MOTS_VIDES and (len(mot) > 1 or mot.isdigit())}
+
+
+def marque_normalisee(marque: Optional[str]) -> str:
+    """Marque en minuscules sans accents ("" si absente ou générique)."""
+    marque = remove_accents(str(marque or "")).lower().strip()
+    return "" if marque in MARQUES_GENERIQUES else marque
+
+
+def prix_en_usd(produit: Dict, source: str) -> Optional[float]:
+    """Prix du produit en USD (None si inconnu) : Alibaba est en USD, Jumia et le marketplace en FCFA."""
+    if produit.get("prix_usd"):
+        return float(produit["prix_usd"])
+    try:
+        prix = float(produit.get("prix") or 0)
+    except (TypeError, ValueError):
+        return None
+    if prix <= 0:
+        return None
+    origine = str(produit.get("source") or source).lower()
+    return prix if origine.startswith("alibaba") else prix / FCFA_PAR_USD
+
+
+def bande_prix(prix_usd: Optional[float]) -> Optional[int]:
+    """Bande de prix logarithmique de largeur ECART_PRIX_MAX (deux prix proches : même bande ou voisines)."""
+    if not prix_usd or prix_usd <= 0:
+        return None
+    return math.floor(math.log(prix_usd) / math.log(ECART_PRIX_MAX))
+
+
+def cle_source(produit: Dict, source: str) -> str:
+    """Identifiant de la copie dans sa source."""
+    if source == "marketplace" and produit.get("product_id"):
+        return str(produit["product_id"])
+    return str(produit.get("sku") or produit.get("product_id") or produit.get("lien") or produit.get("nom") or "")
+
+
+def signature(mots: Set[str]) -> List[str]:
+    """
+    Mots du nom utilisés pour chercher les candidats, les plus discriminants d'abord :
+    les références (mots avec chiffres : a15, 128gb), puis les mots les plus longs.
+    """
+    return sorted(mots, key=lambda mot: (not any(c.isdigit() for c in mot), -len(mot), mot))[:MOTS_SIGNATURE]
+
+
+def similarite(mots_a: Set[str], mots_b: Set[str]) -> float:
+    """
+    Part de mots communs (Jaccard), 0 si les références ne concordent pas : les mots avec
+    chiffres (modèle, capacité : a15, 128gb) de l'un doivent tous se retrouver dans l'autre
+    (Galaxy A15 128 Go et Galaxy A25 128 Go sont deux produits).
+    """
+    if not mots_a or not mots_b:
+        return 0.0
+    codes_a = {mot for mot in mots_a if any(c.isdigit() for c in mot)}
+    codes_b = {mot for mot in mots_b if any(c.isdigit() for c in mot)}
+    if not (codes_a <= codes_b or codes_b <= codes_a):
+        return 0.0
+    return len(mots_a & mots_b) / len(mots_a | mots_b)
+
+
+# =========================
+# INDEXATION
+# =========================
+
+def _trouver_doublon(cursor, mots: Set[str], marque: str, prix_usd: Optional[float]):
+    # Candidats : produits canoniques qui partagent un mot de la signature dans une bande de prix voisine
+    sig = signature(mots)
+    if not sig:
+        return None, 0.0
+    bande = bande_prix(prix_usd)
+    places = ",".join("?" * len(sig))
+    if bande is None:
+        cursor.execute(f"SELECT DISTINCT canonical_id FROM blocs_catalogue WHERE mot IN ({places})", sig)
+    else:
+        cursor.execute(f"""
+            SELECT DISTINCT canonical_id FROM blocs_catalogue
+            WHERE mot IN ({places}) AND (bande BETWEEN ? AND ? OR bande IS NULL)
+        """, (*sig, bande - 1, bande + 1))
+    ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        return None, 0.0
+
+    meilleur, meilleur_score = None, 0.0
+    cursor.execute(f"""
+        SELECT canonical_id, mots, marque, prix_usd FROM produits_canoniques
+        WHERE canonical_id IN ({",".join("?" * len(ids))})
+    """, ids)
+    for canonical_id, mots_candidat, marque_candidat, prix_candidat in cursor.fetchall():
+        marque_candidat = marque_normalisee(marque_candidat)
+        if marque and marque_candidat and marque != marque_candidat:
+            continue
+        if prix_usd and prix_candidat and max(prix_usd, prix_candidat) / min(prix_usd, prix_candidat) > ECART_PRIX_MAX:
+            continue
+        score = similarite(mots, set(mots_candidat.split()))
+        if score >= SEUIL_SIMILARITE and (score > meilleur_score or (score == meilleur_score and canonical_id < meilleur)):
+            meilleur, meilleur_score = canonical_id, score
+    return meilleur, meilleur_score
+
+
+def _indexer(cursor, produit: Dict, source: str) -> Optional[str]:
+    cle = cle_source(produit, source)
+    if not cle:
+        return None  # Ni identifiant, ni lien, ni nom
+    lien = produit.get("lien") or None
+    prix_usd = prix_en_usd(produit, source)
+
+    # 1. Copie déjà connue
+    cursor.execute("SELECT canonical_id FROM liens_sources WHERE source = ? AND cle_source = ?", (source, cle))
+    row = cursor.fetchone()
+    score = 1.0
+    # 2. Même lien dans une autre copie (ex: produit marketplace dont les catégories ont changé)
+    if not row and lien:
+        cursor.execute("SELECT canonical_id FROM liens_sources WHERE lien = ? LIMIT 1", (lien,))
+        row = cursor.fetchone()
+    canonical_id = row[0] if row else None
+
+    # 3. Quasi-doublon
+    mots = mots_nom(produit.get("nom"))
+    if not canonical_id:
+        canonical_id, score = _trouver_doublon(cursor, mots, marque_normalisee(produit.get("marque")), prix_usd)
+
+    if canonical_id:
+        # Compléter le produit canonique avec ce qui lui manque
+        cursor.execute("""
+            UPDATE produits_canoniques
+            SET marque = COALESCE(NULLIF(marque, ''), ?), prix_usd = COALESCE(prix_usd, ?),
+                image = COALESCE(NULLIF(image, ''), ?), categorie = COALESCE(NULLIF(categorie, ''), ?),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE canonical_id = ?
+        """, (produit.get("marque") or None, prix_usd, produit.get("image") or None,
+              produit.get("categorie") or None, canonical_id))
+    else:
+        # Nouveau produit : identifiant stable tiré de sa première copie
+        canonical_id = "prd_" + hashlib.sha1(f"{source}:{cle}".encode()).hexdigest()[:16]
+        cursor.execute("""
+            INSERT OR IGNORE INTO produits_canoniques (canonical_id, nom, marque, prix_usd, image, categorie, mots)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (canonical_id, produit.get("nom") or "", produit.get("marque") or "", prix_usd,
+              produit.get("image") or "", produit.get("categorie") or "", " ".join(sorted(mots))))
+        bande = bande_prix(prix_usd)
+        cursor.executemany("INSERT INTO blocs_catalogue (mot, bande, canonical_id) VALUES (?, ?, ?)",
+                           [(mot, bande, canonical_id) for mot in mots])
+
+    cursor.execute("""
+        INSERT INTO liens_sources (source, cle_source, canonical_id, nom, prix, lien, similarite)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(source, cle_source) DO UPDATE SET
+            nom = excluded.nom, prix = excluded.prix, lien = excluded.lien, seen_at = CURRENT_TIMESTAMP
+    """, (source, cle, canonical_id, produit.get("nom"), produit.get("prix"), lien, round(score, 3)))
+    return canonical_id
+
+
+def indexer_produits(produits: Iterable[Dict], source: str) -> List[str]:
+    """
+    Rattache des produits scrapés ou publiés au catalogue (création des produits canoniques
+    manquants) et ajoute à chacun sa clé "canonical_id".
+
+    Args:
+        produits: Produits d'une source
+        source: 'jumia', 'alibaba' ou 'marketplace'
+
+    Returns:
+        canonical_id de chaque produit, dans l'ordre (None pour un produit sans nom ni identifiant)
+
+    Raises:
+        ValueError: Source inconnue
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Source inconnue: {source} (attendu: {', '.join(SOURCES)})")
+    produits = list(produits)
+    if not produits:
+        return []
+
+    with _verrou:
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        cursor = conn.cursor()
+        try:
+            ids = []
+            for produit in produits:
+                canonical_id = _indexer(cursor, produit, source)
+                if canonical_id:
+                    produit["canonical_id"] = canonical_id
+                ids.append(canonical_id)
+            conn.commit()
+            return ids
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def indexer_sans_erreur(produits: List[Dict], source: str) -> List[Dict]:
+    """
+    indexer_produits pour les scrapers et sauvegardes : une erreur du catalogue est
+    journalisée sans interrompre l'appelant. Retourne les produits.
+    """
+    try:
+        indexer_produits(produits, source)
+    except Exception as e:
+        logger.warning("Catalogue non mis à jour (%s, %s produits): %s", source, len(produits), e)
+    return produits
+
+
+def regrouper_par_produit(produits: List[Dict], source: str) -> Dict[str, List[Dict]]:
+    """
+    Regroupe les copies d'un même produit : canonical_id -> copies, dans l'ordre de
+    première apparition. Les agents traitent un groupe une fois au lieu de chaque copie.
+
+    Args:
+        produits: Produits d'une source (indexés au passage si besoin)
+        source: 'jumia', 'alibaba' ou 'marketplace'
+
+    Returns:
+        Dictionnaire ordonné canonical_id -> liste de produits
+    """
+    a_indexer = [produit for produit in produits if not produit.get("canonical_id")]
+    indexer_sans_erreur(a_indexer, source)
+    groupes: Dict[str, List[Dict]] = {}
+    for i, produit in enumerate(produits):
+        # Sans catalogue (erreur), chaque produit reste seul dans son groupe
+        groupes.setdefault(produit.get("canonical_id") or f"copie_{i}", []).append(produit)
+    return groupes
+
+
+# =========================
+# LECTURE
+# =========================
+
+def _canonique(row, sources: List[Dict]) -> Dict:
+    return {
+        "canonical_id": row[0], "nom": row[1], "marque": row[2], "prix_usd": row[3], "image": row[4],
+        "categorie": row[5], "created_at": row[6], "updated_at": row[7],
+        "nombre_copies": len(sources), "sources": sources,
+    }
+
+
+def _sources(cursor, ids: List[str]) -> Dict[str, List[Dict]]:
+    par_id: Dict[str, List[Dict]] = {canonical_id: [] for canonical_id in ids}
+    if not ids:
+        return par_id
+    cursor.execute(f"""
+        SELECT canonical_id, source, cle_source, nom, prix, lien, similarite, seen_at
+        FROM liens_sources WHERE canonical_id IN ({",".join("?" * len(ids))})
+        ORDER BY source, seen_at DESC
+    """, ids)
+    for row in cursor.fetchall():
+        par_id[row[0]].append({"source": row[1], "cle_source": row[2], "nom": row[3], "prix": row[4],
+                               "lien": row[5], "similarite": row[6], "seen_at": row[7]})
+    return par_id
+
+
+def get_produit_canonique(canonical_id: str) -> Optional[Dict]:
+    """Produit canonique avec toutes ses copies, ou None."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT canonical_id, nom, marque, prix_usd, image, categorie, created_at, updated_at
+            FROM produits_canoniques WHERE canonical_id = ?
+        """, (canonical_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return _canonique(row, _sources(cursor, [canonical_id])[canonical_id])
+    finally:
+        conn.close()
+
+
+def get_catalogue(limit: int = 50, offset: int = 0, source: Optional[str] = None,
+                  multi_sources: bool = False) -> Dict:
+    """
+    Page du catalogue dédoublonné.
+
+    Args:
+        limit: Nombre de produits canoniques
+        offset: Décalage (pagination)
+        source: Seulement les produits présents dans cette source
+        multi_sources: Seulement les produits vus dans au moins deux sources
+
+    Returns:
+        Dict avec produits (chacun avec ses copies), total et count
+    """
+    conditions, params = [], []
+    if source:
+        conditions.append("canonical_id IN (SELECT canonical_id FROM liens_sources WHERE source = ?)")
+        params.append(source)
+    if multi_sources:
+        conditions.append("""canonical_id IN (
+            SELECT canonical_id FROM liens_sources GROUP BY canonical_id HAVING COUNT(DISTINCT source) > 1
+        )""")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM produits_canoniques {where}", params)
+        total = cursor.fetchone()[0]
+        cursor.execute(f"""
+            SELECT canonical_id, nom, marque, prix_usd, image, categorie, created_at, updated_at
+            FROM produits_canoniques {where}
+            ORDER BY updated_at DESC, canonical_id
+            LIMIT ? OFFSET ?
+        """, (*params, limit, offset))
+        rows = cursor.fetchall()
+        sources = _sources(cursor, [row[0] for row in rows])
+        produits = [_canonique(row, sources[row[0]]) for row in rows]
+        return {"produits": produits, "count": len(produits), "total": total}
+    finally:
+        conn.close()
+
+
+def reindexer_sources_existantes() -> Dict[str, int]:
+    """
+    Rattache au catalogue les produits déjà stockés : cache Alibaba (database)
+    et produits du marketplace (marketplace_db).
+
+    Returns:
+        Nombre de copies indexées par source
+    """
+    import database
+    import marketplace_db
+
+    comptes = {}
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        produits = [dict(row) for row in conn.execute("""
+            SELECT nom, prix, lien, image, marque, categorie, source, product_id
+            FROM produits_alibaba ORDER BY id
+        """)]
+    finally:
+        conn.close()
+    comptes["alibaba"] = len(indexer_produits(produits, "alibaba"))
+
+    conn = sqlite3.connect(marketplace_db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        produits = [dict(row) for row in conn.execute("""
+            SELECT product_id, nom, prix, lien, image, marque, categorie, source
+            FROM produits_marketplace ORDER BY id
+        """)]
+    finally:
+        conn.close()
+    comptes["marketplace"] = len(indexer_produits(produits, "marketplace"))
+    return comptes
+
+
+# Initialiser le catalogue au chargement du module
+init_catalogue()
+
+
+if __name__ == "__main__":
+    print(reindexer_sources_existantes())
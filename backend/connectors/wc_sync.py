@@ -0,0 +1,169 @@
+"""
+Synchronisation incrémentale produits_marketplace -> WooCommerce
+Chaque produit garde son id WooCommerce (wc_id) et l'empreinte des données
+envoyées (wc_hash). Une synchro ne pousse que le delta depuis le dernier run :
+- create: produits actifs jamais publiés
+- update: produits publiés dont l'empreinte a changé
+- delete: produits publiés désactivés, ou supprimés localement (wc_suppressions)
+"""
+import os
+import sys
+import json
+import hashlib
+import sqlite3
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from marketplace_db import DB_PATH, SQL_WC_A_SYNCHRONISER
+
+_COLONNES = "product_id, nom, prix, image, description_seo, meta_description, status, wc_id, wc_hash"
+
+
+def construire_produit_wc(produit: Dict) -> Dict:
+    """Convertit une ligne produits_marketplace en données produit WooCommerce."""
+    return {
+        "name": produit["nom"],
+        "type": "simple",
+        "sku": produit["product_id"],
+        "regular_price": str(produit["prix"]),
+        "description": produit.get("description_seo") or "",
+        "short_description": produit.get("meta_description") or "",
+        "images": [{"src": produit["image"]}] if produit.get("image") else []
+    }
+
+
+def hash_produit_wc(donnees_wc: Dict) -> str:
+    """Empreinte stable des données WooCommerce (clés triées)."""
+    contenu = json.dumps(donnees_wc, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(contenu.encode("utf-8")).hexdigest()
+
+
+def get_dernier_watermark(conn: sqlite3.Connection) -> Optional[str]:
+    """Début du dernier run terminé sans échec (None si jamais synchronisé)."""
+    row = conn.execute("""
+        SELECT started_at FROM wc_sync_runs WHERE failed = 0
+        ORDER BY id DESC LIMIT 1
+    """).fetchone()
+    return row[0] if row else None
+
+
+def calculer_delta(conn: sqlite3.Connection, watermark: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Calcule les créations / mises à jour / suppressions à envoyer.
+    Seules les lignes modifiées depuis le watermark (index sur updated_at) ou
+    en attente de synchronisation (index partiel idx_wc_a_synchroniser) sont
+    relues ; l'empreinte écarte celles dont le contenu n'a pas changé.
+
+    Returns:
+        {"create": {product_id: données}, "update": {product_id: données},
+         "delete": {product_id: wc_id}, "hashes": {product_id: hash}}
+    """
+    conn.row_factory = sqlite3.Row
+    if watermark:
+        # Un OR entre les deux conditions forcerait un parcours complet de la table
+        rows = conn.execute(f"""
+            SELECT {_COLONNES} FROM produits_marketplace WHERE updated_at >= ?
+            UNION
+            SELECT {_COLONNES} FROM produits_marketplace WHERE {SQL_WC_A_SYNCHRONISER}
+        """, (watermark,))
+    else:
+        rows = conn.execute(f"""
+            SELECT {_COLONNES} FROM produits_marketplace
+            WHERE status = 'active' OR wc_id IS NOT NULL
+        """)
+
+    delta = {"create": {}, "update": {}, "delete": {}, "hashes": {}}
+    for row in rows:
+        produit = dict(row)
+        product_id = produit["product_id"]
+        if produit["status"] != "active":
+            if produit["wc_id"] is not None:
+                delta["delete"][product_id] = produit["wc_id"]
+            continue
+
+        donnees = construire_produit_wc(produit)
+        empreinte = hash_produit_wc(donnees)
+        if produit["wc_id"] is None:
+            delta["create"][product_id] = donnees
+        elif empreinte != produit["wc_hash"]:
+            delta["update"][product_id] = dict(donnees, id=produit["wc_id"])
+        else:
+            continue
+        delta["hashes"][product_id] = empreinte
+
+    for product_id, wc_id in conn.execute("SELECT product_id, wc_id FROM wc_suppressions"):
+        delta["delete"][product_id] = wc_id
+
+    conn.row_factory = None
+    return delta
+
+
+def _enregistrer_resultat(conn: sqlite3.Connection, debut: str, delta: Dict, resultat: Dict):
+    """Écrit wc_id / wc_hash et l'historique du run en une seule transaction."""
+    hashes = delta["hashes"]
+    synchronises = {**resultat["created"], **resultat["updated"]}
+    conn.executemany("""
+        UPDATE produits_marketplace
+        SET wc_id = ?, wc_hash = ?, wc_synced_at = CURRENT_TIMESTAMP
+        WHERE product_id = ?
+    """, [(wc_id, hashes[pid], pid) for pid, wc_id in synchronises.items()])
+    supprimes = [(pid,) for pid in resultat["deleted"]]
+    conn.executemany("""
+        UPDATE produits_marketplace
+        SET wc_id = NULL, wc_hash = NULL, wc_synced_at = CURRENT_TIMESTAMP
+        WHERE product_id = ?
+    """, supprimes)
+    conn.executemany("DELETE FROM wc_suppressions WHERE product_id = ?", supprimes)
+    conn.execute("""
+        INSERT INTO wc_sync_runs (started_at, created, updated, deleted, failed)
+        VALUES (?, ?, ?, ?, ?)
+    """, (debut, len(resultat["created"]), len(resultat["updated"]),
+          len(resultat["deleted"]), len(resultat["failed"])))
+
+
+def synchroniser_woocommerce(connector, dry_run: bool = False, full: bool = False, **batch_kwargs) -> Dict:
+    """
+    Envoie à WooCommerce uniquement le delta depuis la dernière synchronisation.
+
+    Args:
+        connector: WooCommerceConnector (batch_products)
+        dry_run: Calculer le delta sans rien envoyer
+        full: Ignorer le watermark et comparer tout le catalogue
+        **batch_kwargs: batch_size / max_workers transmis à batch_products
+
+    Returns:
+        Compteurs du run et produits en échec
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        # Horloge SQLite: même format que updated_at (CURRENT_TIMESTAMP)
+        debut = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+        watermark = None if full else get_dernier_watermark(conn)
+        delta = calculer_delta(conn, watermark)
+        compteurs = {op: len(delta[op]) for op in ("create", "update", "delete")}
+        print(f"🔄 Synchro WooCommerce depuis {watermark or 'le début'}: {compteurs}")
+
+        if dry_run:
+            return {"status": "dry_run", "watermark": watermark, **compteurs}
+
+        if any(compteurs.values()):
+            resultat = connector.batch_products(
+                create=delta["create"], update=delta["update"], delete=delta["delete"], **batch_kwargs
+            )
+        else:
+            resultat = {"created": {}, "updated": {}, "deleted": {}, "failed": {}}
+
+        with conn:
+            _enregistrer_resultat(conn, debut, delta, resultat)
+
+        return {
+            "status": "success" if not resultat["failed"] else "partial",
+            "watermark": watermark,
+            "created": len(resultat["created"]),
+            "updated": len(resultat["updated"]),
+            "deleted": len(resultat["deleted"]),
+            "failed": resultat["failed"]
+        }
+    finally:
+        conn.close()
@@ -1,17 +1,46 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 from woocommerce import API
 from dotenv import load_dotenv
 
 load_dotenv()
 
+WC_BATCH_LIMIT = 100  # Objets max par requête products/batch (create + update + delete)
+WC_BATCH_WORKERS = 4  # Requêtes batch envoyées en parallèle
+
+# Opération batch -> (méthode HTTP, clé de résultat) pour les reprises unitaires
+_OPERATIONS = {
+    "create": ("post", "created"),
+    "update": ("put", "updated"),
+    "delete": ("delete", "deleted"),
+}
+
+
+def _requete_non_envoyee(erreur: Exception) -> bool:
+    """
+    Vrai si la connexion n'a jamais été établie (serveur injoignable, DNS, délai de connexion) :
+    le serveur n'a rien reçu. Un délai de lecture ou une connexion coupée en cours de
+    réponse ne garantit pas cela, le lot a pu être traité.
+    """
+    if not isinstance(erreur, RequestsConnectionError) or not erreur.args:
+        return False
+    raison = getattr(erreur.args[0], "reason", None)  # MaxRetryError de urllib3
+    return isinstance(raison, (NewConnectionError, ConnectTimeoutError))
+
+
 class WooCommerceConnector:
-    def __init__(self):
+    def __init__(self, url: Optional[str] = None, consumer_key: Optional[str] = None,
+                 consumer_secret: Optional[str] = None, timeout: int = 30):
+        # Les paramètres explicites permettent de viser un serveur WooCommerce local (tests)
         self.wcapi = API(
-            url=os.getenv("WC_URL"),
-            consumer_key=os.getenv("WC_CONSUMER_KEY"),
-            consumer_secret=os.getenv("WC_CONSUMER_SECRET"),
+            url=url or os.getenv("WC_URL"),
+            consumer_key=consumer_key or os.getenv("WC_CONSUMER_KEY"),
+            consumer_secret=consumer_secret or os.getenv("WC_CONSUMER_SECRET"),
             version="wc/v3",
-            timeout=30,
+            timeout=timeout,
             query_string_auth=True,
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         )
@@ -49,6 +78,116 @@ class WooCommerceConnector:
             print(f"❌ Exception lors de la publication : {str(e)}")
             return None
 
+    def _retry_item(self, operation: str, ref: str, payload) -> Tuple[str, str, object]:
+        """Rejoue une opération refusée dans un batch, produit par produit."""
+        method, key = _OPERATIONS[operation]
+        try:
+            if operation == "create":
+                response = self.wcapi.post("products", payload)
+            elif operation == "update":
+                response = self.wcapi.put(f"products/{payload['id']}", payload)
+            else:
+                response = self.wcapi.delete(f"products/{payload}", params={"force": True})
+            if response.status_code in [200, 201]:
+                return key, ref, response.json().get("id")
+            if operation == "delete" and response.status_code == 404:
+                return key, ref, payload  # Déjà absent de WooCommerce
+            return "failed", ref, f"{method.upper()} {response.status_code}: {response.text[:200]}"
+        except Exception as e:
+            return "failed", ref, str(e)
+
+    def _send_batch(self, chunk: List[Tuple[str, str, object]]) -> List[Tuple[str, str, object]]:
+        """
+        Envoie un lot products/batch puis reprend individuellement les éléments en échec.
+        WooCommerce renvoie les résultats dans l'ordre des éléments envoyés.
+        Le lot entier n'est rejoué que s'il n'a sûrement pas été traité (connexion impossible, 4xx) ;
+        sinon (délai de lecture, 5xx) ses éléments sont rapportés en échec.
+        """
+        body = {}
+        for operation, _, payload in chunk:
+            body.setdefault(operation, []).append(payload)
+
+        try:
+            response = self.wcapi.post("products/batch", body)
+        except Exception as e:
+            print(f"❌ Exception lors du batch WooCommerce : {str(e)}")
+            if _requete_non_envoyee(e):
+                # Rien n'a atteint le serveur : reprise élément par élément
+                return [self._retry_item(op, ref, payload) for op, ref, payload in chunk]
+            # Issue inconnue (délai de lecture...) : le lot a pu être appliqué, une reprise
+            # recréerait les produits en double
+            return [("failed", ref, f"Lot non confirmé: {e}") for _, ref, _ in chunk]
+
+        if 400 <= response.status_code < 500:
+            # Lot refusé en entier par WooCommerce (aucun élément traité) : reprise élément par élément
+            return [self._retry_item(op, ref, payload) for op, ref, payload in chunk]
+        try:
+            data = response.json() if response.status_code in [200, 201] else None
+        except ValueError:
+            data = None
+        if data is None:
+            erreur = f"Lot non confirmé: HTTP {response.status_code}: {response.text[:200]}"
+            return [("failed", ref, erreur) for _, ref, _ in chunk]
+
+        results = []
+        positions = {operation: 0 for operation in body}
+        for operation, ref, payload in chunk:
+            items = data.get(operation) or []
+            index = positions[operation]
+            positions[operation] += 1
+            item = items[index] if index < len(items) else None
+            if not item or item.get("error"):
+                results.append(self._retry_item(operation, ref, payload))
+            else:
+                results.append((_OPERATIONS[operation][1], ref, item.get("id")))
+        return results
+
+    def batch_products(self, create: Optional[Dict[str, Dict]] = None,
+                       update: Optional[Dict[str, Dict]] = None,
+                       delete: Optional[Dict[str, int]] = None,
+                       batch_size: int = WC_BATCH_LIMIT,
+                       max_workers: int = WC_BATCH_WORKERS) -> Dict[str, Dict]:
+        """
+        Crée / met à jour / supprime des produits via l'endpoint products/batch.
+        Les opérations sont découpées en lots de `batch_size` objets envoyés en parallèle.
+
+        Args:
+            create: {référence locale: données produit WooCommerce}
+            update: {référence locale: données produit WooCommerce (avec "id")}
+            delete: {référence locale: id WooCommerce}
+            batch_size: Objets par requête (limite WooCommerce: 100)
+            max_workers: Nombre de requêtes batch simultanées
+
+        Returns:
+            {"created": {ref: wc_id}, "updated": {ref: wc_id}, "deleted": {ref: wc_id}, "failed": {ref: erreur}}
+        """
+        batch_size = max(1, min(batch_size, WC_BATCH_LIMIT))
+        operations = []
+        for operation, items in (("create", create), ("update", update), ("delete", delete)):
+            operations.extend((operation, ref, payload) for ref, payload in (items or {}).items())
+
+        results = {"created": {}, "updated": {}, "deleted": {}, "failed": {}}
+        if not operations:
+            return results
+
+        chunks = [operations[i:i + batch_size] for i in range(0, len(operations), batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            for chunk_results in executor.map(self._send_batch, chunks):
+                for key, ref, value in chunk_results:
+                    results[key][ref] = value
+
+        if results["failed"]:
+            print(f"⚠️ {len(results['failed'])} produit(s) non synchronisé(s) avec WooCommerce")
+        return results
+
+    def publish_products(self, products: Dict[str, Dict], **kwargs) -> Dict[str, Dict]:
+        """
+        Publie plusieurs produits en masse (voir batch_products).
+        products: {référence locale (product_id): données produit WooCommerce}
+        """
+        return self.batch_products(create=products, **kwargs)
+
+
 if __name__ == "__main__":
     connector = WooCommerceConnector()
     connector.test_connection()
@@ -2,6 +2,29 @@
 import csv
 from datetime import datetime
 
+from csv_stream import iter_csv
+
+HEADERS = [
+    "Name",
+    "Description",
+    "Regular price",
+]
+
+
+def ligne_produit(p):
+    return [
+        p.get("nom", ""),
+        p.get("description", ""),
+        p.get("prix_recommande", 0),
+    ]
+
+
+def iter_csv_produits(produits, gzip=False):
+    """
+    Génère le même CSV que generate_csv, en flux d'octets (sans fichier)
+    """
+    return iter_csv(HEADERS, (ligne_produit(p) for p in produits), gzip=gzip)
+
 
 def generate_csv(produits):
     """
@@ -10,21 +33,11 @@ def generate_csv(produits):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"produits_wordpress_{timestamp}.csv"
 
-    headers = [
-        "Name",
-        "Description",
-        "Regular price",
-    ]
-
     with open(filename, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
-        writer.writerow(headers)
+        writer.writerow(HEADERS)
 
         for p in produits:
-            writer.writerow([
-                p.get("nom", ""),
-                p.get("description", ""),
-                p.get("prix_recommande", 0),
-            ])
+            writer.writerow(ligne_produit(p))
 
     return filename
@@ -0,0 +1,78 @@
+"""
+Écriture CSV en flux (générateurs) pour les exports de boutique
+Les lignes sont encodées au fil de l'eau et envoyées par blocs à une
+StreamingResponse FastAPI, avec compression gzip optionnelle à la volée.
+"""
+import re
+import zlib
+from typing import Iterable, Iterator, List, Sequence
+
+TAILLE_BLOC = 64 * 1024  # Taille des blocs envoyés au client (octets)
+
+# Caractères qui imposent des guillemets avec le dialecte "excel" de csv.writer
+_NECESSITE_GUILLEMETS = re.compile(r'[",\r\n]')
+
+
+def _encoder_champ(valeur) -> str:
+    if valeur is None:
+        return ""
+    texte = valeur if isinstance(valeur, str) else str(valeur)
+    if _NECESSITE_GUILLEMETS.search(texte):
+        return '"' + texte.replace('"', '""') + '"'
+    return texte
+
+
+def encoder_ligne_csv(valeurs: Sequence) -> str:
+    """
+    Encode une ligne CSV exactement comme csv.writer (dialecte excel, QUOTE_MINIMAL),
+    sans passer par un objet fichier intermédiaire.
+
+    Args:
+        valeurs: Valeurs de la ligne
+
+    Returns:
+        Ligne encodée, terminée par \\r\\n
+    """
+    if len(valeurs) == 1 and (valeurs[0] is None or valeurs[0] == ""):
+        # csv.writer écrit "" pour une ligne composée d'un seul champ vide
+        return '""\r\n'
+    return ",".join([_encoder_champ(v) for v in valeurs]) + "\r\n"
+
+
+def iter_csv(headers: List[str], lignes: Iterable[Sequence], gzip: bool = False,
+             taille_bloc: int = TAILLE_BLOC) -> Iterator[bytes]:
+    """
+    Produit un fichier CSV (UTF-8) par blocs d'octets, en mémoire constante.
+
+    Args:
+        headers: Ligne d'en-tête
+        lignes: Itérable de lignes (consommé une seule fois)
+        gzip: Compresser le flux au format gzip à la volée
+        taille_bloc: Taille approximative des blocs produits
+
+    Yields:
+        Blocs d'octets prêts à être envoyés
+    """
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits=31: en-tête gzip
+    tampon: List[str] = [encoder_ligne_csv(headers)]
+    taille = len(tampon[0])
+
+    for ligne in lignes:
+        texte = encoder_ligne_csv(ligne)
+        tampon.append(texte)
+        taille += len(texte)
+        if taille >= taille_bloc:
+            bloc = "".join(tampon).encode("utf-8")
+            tampon.clear()
+            taille = 0
+            if compresseur:
+                bloc = compresseur.compress(bloc)
+                if not bloc:
+                    continue
+            yield bloc
+
+    bloc = "".join(tampon).encode("utf-8")
+    if compresseur:
+        bloc = compresseur.compress(bloc) + compresseur.flush()
+    if bloc:
+        yield bloc
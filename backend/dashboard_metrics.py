@@ -0,0 +1,174 @@
+"""
+Compteurs du tableau de bord (produits par statut, alertes prix, campagnes)
+Les compteurs vivent en mémoire et sont ajustés par les chemins d'écriture
+(publication, changement de statut, suppression, agents). /api/dashboard/stats
+les lit sans requête SQL ; une réconciliation périodique les recalcule depuis
+les bases pour corriger toute dérive (écritures hors API, autre processus...).
+"""
+import logging
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_INTERVAL = 300  # Secondes entre deux recalculs complets
+CAMPAGNE_ACTIVE_JOURS = 30  # Une campagne est "active" pendant 30 jours après sa création
+
+# = marketing.DB_PATH (importer marketing exige la clé OpenAI)
+MARKETING_DB_PATH = os.path.join(os.path.dirname(__file__), "marketing_cache.db")
+
+# Produit plus cher que le concurrent Jumia (analyse de l'Agent Price Watch)
+SQL_ALERTE_PRIX = """
+    CASE WHEN json_valid(features_json)
+         THEN coalesce(json_extract(features_json, '$.competitor_analysis.status') = 'expensive', 0)
+         ELSE 0 END
+"""
+
+
+class DashboardMetrics:
+    """Compteurs en mémoire, protégés par un verrou (routes servies par un pool de threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statuts = Counter()
+        self._alertes_prix = 0
+        self._campagnes = []  # Dates de création des campagnes encore actives
+        self._reconcilie_le: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._arret = threading.Event()
+
+    # --- Chemins d'écriture ---
+
+    def produits_ajoutes(self, status: str, n: int = 1, alertes: int = 0):
+        """Nouveaux produits (publication, drafts du Sourcing Agent)."""
+        if n <= 0 and not alertes:
+            return
+        with self._lock:
+            self._statuts[status] += n
+            self._alertes_prix += alertes
+
+    def produit_supprime(self, status: str, alerte: bool = False):
+        """Produit supprimé (rejet d'un draft, suppression admin)."""
+        with self._lock:
+            self._statuts[status] -= 1
+            self._alertes_prix -= int(bool(alerte))
+
+    def statut_modifie(self, ancien: str, nouveau: str, n: int = 1):
+        """Changement de statut de n produits (validation, archivage, publication WooCommerce)."""
+        if ancien == nouveau or n <= 0:
+            return
+        with self._lock:
+            self._statuts[ancien] -= n
+            self._statuts[nouveau] += n
+
+    def alertes_modifiees(self, delta: int):
+        """Alertes prix ouvertes (+1) ou levées (-1) par l'Agent Price Watch."""
+        if delta:
+            with self._lock:
+                self._alertes_prix += delta
+
+    def campagne_creee(self, created_at: Optional[datetime] = None):
+        with self._lock:
+            self._campagnes.append(created_at or datetime.utcnow())
+
+    # --- Lecture ---
+
+    def snapshot(self) -> Dict:
+        """Valeurs courantes des compteurs (aucun accès disque)."""
+        limite = datetime.utcnow() - timedelta(days=CAMPAGNE_ACTIVE_JOURS)
+        with self._lock:
+            # Les campagnes sont ajoutées dans l'ordre : les expirées sont en tête
+            while self._campagnes and self._campagnes[0] < limite:
+                self._campagnes.pop(0)
+            statuts = {s: n for s, n in self._statuts.items() if n}
+            return {
+                "products_total": sum(statuts.values()),
+                "products_by_status": statuts,
+                "products_draft": statuts.get("draft", 0),
+                "jumia_alerts": self._alertes_prix,
+                "campaigns_active": len(self._campagnes),
+                "reconciled_at": self._reconcilie_le,
+            }
+
+    # --- Réconciliation ---
+
+    def reconcilier(self) -> Dict:
+        """
+        Recalcule les compteurs depuis les bases et remplace les valeurs en mémoire.
+
+        Returns:
+            Écarts corrigés {compteur: valeur_db - valeur_memoire} (vide si aucune dérive)
+        """
+        # Import différé : marketplace_db appelle ce module
+        import marketplace_db
+
+        conn = sqlite3.connect(marketplace_db.DB_PATH)
+        try:
+            rows = conn.execute(f"""
+                SELECT coalesce(status, 'active'), COUNT(*), SUM({SQL_ALERTE_PRIX})
+                FROM produits_marketplace GROUP BY 1
+            """).fetchall()
+        finally:
+            conn.close()
+        statuts = Counter({status: n for status, n, _ in rows})
+        alertes = sum(a or 0 for _, _, a in rows)
+
+        limite = datetime.utcnow() - timedelta(days=CAMPAGNE_ACTIVE_JOURS)
+        conn = sqlite3.connect(MARKETING_DB_PATH)
+        try:
+            campagnes = [
+                datetime.fromisoformat(row[0]) for row in conn.execute(
+                    "SELECT created_at FROM campagnes_facebook WHERE created_at >= ? ORDER BY created_at",
+                    (limite.strftime("%Y-%m-%d %H:%M:%S"),)
+                )
+            ]
+        except sqlite3.OperationalError:
+            campagnes = []  # Base marketing pas encore initialisée
+        finally:
+            conn.close()
+
+        with self._lock:
+            premiere = self._reconcilie_le is None
+            ecarts = {f"status:{s}": statuts[s] - self._statuts[s]
+                      for s in set(statuts) | set(self._statuts) if statuts[s] != self._statuts[s]}
+            if alertes != self._alertes_prix:
+                ecarts["jumia_alerts"] = alertes - self._alertes_prix
+            if len(campagnes) != len(self._campagnes):
+                ecarts["campaigns_active"] = len(campagnes) - len(self._campagnes)
+            self._statuts = statuts
+            self._alertes_prix = alertes
+            self._campagnes = campagnes
+            self._reconcilie_le = datetime.utcnow().isoformat(timespec="seconds")
+
+        if ecarts and not premiere:
+            logger.warning("Dérive des compteurs du tableau de bord corrigée: %s", ecarts)
+        return ecarts
+
+    def demarrer_reconciliation(self, intervalle: int = RECONCILIATION_INTERVAL):
+        """Réconcilie immédiatement puis toutes les `intervalle` secondes (thread démon)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.reconcilier()
+        self._arret.clear()
+
+        def boucle():
+            while not self._arret.wait(intervalle):
+                try:
+                    self.reconcilier()
+                except Exception as e:
+                    logger.error("Erreur réconciliation des compteurs: %s", e)
+
+        self._thread = threading.Thread(target=boucle, name="dashboard-metrics", daemon=True)
+        self._thread.start()
+
+    def arreter_reconciliation(self):
+        self._arret.set()
+        self._thread = None
+
+
+# Instance partagée par l'API et les chemins d'écriture
+metrics = DashboardMetrics()
@@ -9,6 +9,8 @@ from typing import List, Dict, Optional
 import os
 import sys
 
+from catalogue import indexer_sans_erreur
+
 # Configurer l'encodage UTF-8 pour Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -39,10 +41,16 @@ def init_database():
             discount TEXT,
             source TEXT,
             product_id TEXT,
+            recherche_id INTEGER,  -- Recherche qui a produit ce produit
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
     
+    # Bases créées avant la colonne recherche_id
+    cursor.execute("PRAGMA table_info(produits_alibaba)")
+    if "recherche_id" not in [colonne[1] for colonne in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE produits_alibaba ADD COLUMN recherche_id INTEGER")
+    
     # Table pour stocker les recherches/catégories
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS recherches_alibaba (
@@ -67,11 +75,41 @@ def init_database():
         ON recherches_alibaba(expires_at)
     """)
     
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_produits_recherche 
+        ON produits_alibaba(recherche_id)
+    """)
+    
     conn.commit()
     conn.close()
     print(f"✅ Base de données initialisée: {DB_PATH}")
 
 
+def _inserer_produits(cursor, produits: List[Dict], recherche_id: int):
+    """Insère les produits d'une recherche dans produits_alibaba (sans commit)."""
+    for produit in produits:
+        cursor.execute("""
+            INSERT INTO produits_alibaba 
+            (nom, prix, prix_texte, lien, image, marque, categorie, note, moq, supplier, discount, source, product_id, recherche_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            produit.get("nom", ""),
+            produit.get("prix", 0),
+            produit.get("prix_texte", ""),
+            produit.get("lien", ""),
+            produit.get("image", ""),
+            produit.get("marque", ""),
+            produit.get("categorie", ""),
+            produit.get("note", "N/A"),
+            produit.get("moq", ""),
+            produit.get("supplier", ""),
+            produit.get("discount", ""),
+            produit.get("source", "Alibaba (Cache)"),
+            produit.get("product_id", ""),
+            recherche_id
+        ))
+
+
 def save_products_to_db(produits: List[Dict], recherche_type: str, recherche_valeur: str = ""):
     """
     Sauvegarde les produits dans la base de données.
@@ -107,26 +145,7 @@ def save_products_to_db(produits: List[Dict], recherche_type: str, recherche_val
         # (on garde les produits dans la table pour référence, mais on les marque)
         
         # Insérer les nouveaux produits
-        for produit in produits:
-            cursor.execute("""
-                INSERT INTO produits_alibaba 
-                (nom, prix, prix_texte, lien, image, marque, categorie, note, moq, supplier, discount, source, product_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                produit.get("nom", ""),
-                produit.get("prix", 0),
-                produit.get("prix_texte", ""),
-                produit.get("lien", ""),
-                produit.get("image", ""),
-                produit.get("marque", ""),
-                produit.get("categorie", ""),
-                produit.get("note", "N/A"),
-                produit.get("moq", ""),
-                produit.get("supplier", ""),
-                produit.get("discount", ""),
-                produit.get("source", "Alibaba (Cache)"),
-                produit.get("product_id", "")
-            ))
+        _inserer_produits(cursor, produits, recherche_id)
         
         conn.commit()
         print(f"✅ {len(produits)} produits sauvegardés dans la DB (recherche: {recherche_type}={recherche_valeur})")
@@ -137,6 +156,53 @@ def save_products_to_db(produits: List[Dict], recherche_type: str, recherche_val
         raise
     finally:
         conn.close()
+    
+    # Une copie par recherche dans produits_alibaba, un seul produit dans le catalogue
+    indexer_sans_erreur(produits, "alibaba")
+
+
+def append_products_to_db(produits: List[Dict], recherche_type: str, recherche_valeur: str = ""):
+    """
+    Ajoute des produits à une recherche déjà enregistrée par save_products_to_db
+    (pages suivantes d'un même résultat, sauvegardées au fur et à mesure).
+    
+    Args:
+        produits: Liste de produits à ajouter
+        recherche_type: Type de recherche ('keyword', 'category', 'general')
+        recherche_valeur: Valeur de la recherche (terme ou catégorie)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            SELECT id FROM recherches_alibaba 
+            WHERE type_recherche = ? AND valeur = ?
+        """, (recherche_type, recherche_valeur))
+        
+        result = cursor.fetchone()
+        if not result:
+            raise ValueError(f"Recherche non enregistrée: {recherche_type}={recherche_valeur}")
+        
+        cursor.execute("""
+            UPDATE recherches_alibaba 
+            SET nombre_produits = nombre_produits + ?
+            WHERE id = ?
+        """, (len(produits), result[0]))
+        
+        _inserer_produits(cursor, produits, result[0])
+        
+        conn.commit()
+        print(f"✅ {len(produits)} produits ajoutés dans la DB (recherche: {recherche_type}={recherche_valeur})")
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erreur sauvegarde DB: {e}")
+        raise
+    finally:
+        conn.close()
+    
+    indexer_sans_erreur(produits, "alibaba")
 
 
 def get_products_from_db(
@@ -186,15 +252,12 @@ def get_products_from_db(
             conn.commit()
             return None
         
-        # Récupérer les produits associés à cette recherche
-        # On récupère les produits les plus récents
+        # Récupérer les produits associés à cette recherche, dans l'ordre du scraping
         cursor.execute("""
             SELECT nom, prix, prix_texte, lien, image, marque, categorie, note, moq, supplier, discount, source, product_id
             FROM produits_alibaba
-            WHERE created_at >= (
-                SELECT scraped_at FROM recherches_alibaba WHERE id = ?
-            )
-            ORDER BY created_at DESC
+            WHERE recherche_id = ?
+            ORDER BY id
             LIMIT ?
         """, (recherche_id, limit))
         
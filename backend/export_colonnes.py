@@ -0,0 +1,168 @@
+"""
+Export colonnaire (Parquet / Arrow IPC) de l'historique pour l'analyse
+Les tables `ventes` (journal des ventes) et `product_events` (marketplace)
+sont écrites par lots en fichiers compressés partitionnés par mois :
+data/analytics/ventes/mois=2025-01/part-0.parquet
+Les rapports (rapports_ventes) lisent ensuite ces fichiers sans repasser par SQLite.
+"""
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterator, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    print("⚠️ pyarrow non installé. Installez-le avec: pip install pyarrow")
+
+import journal_vente
+import marketplace_db
+
+# Configurer l'encodage UTF-8 pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+ANALYTICS_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "analytics")
+TAILLE_LOT = 50_000  # Lignes lues par lot depuis SQLite
+
+FORMATS = ("parquet", "ipc")  # ipc = Arrow IPC (feather v2), lisible en memory-map
+
+if PYARROW_AVAILABLE:
+    SCHEMA_VENTES = pa.schema([
+        ("id", pa.int64()),
+        ("boutique_id", pa.int32()),
+        ("date_vente", pa.string()),
+        ("produit_nom", pa.string()),
+        ("prix", pa.float64()),
+        ("quantite", pa.int32()),
+        ("localisation", pa.string()),
+        ("mois", pa.string()),
+    ])
+    SCHEMA_EVENEMENTS = pa.schema([
+        ("id", pa.int64()),
+        ("product_id", pa.string()),
+        ("event_type", pa.string()),
+        ("device_type", pa.string()),
+        ("source", pa.string()),
+        ("timestamp", pa.string()),
+        ("mois", pa.string()),
+    ])
+
+# Requêtes d'export : la colonne "mois" (YYYY-MM) sert de partition
+_REQUETES = {
+    "ventes": (
+        lambda: journal_vente.DB_PATH,
+        """SELECT id, boutique_id, date_vente, produit_nom, prix, quantite, localisation,
+                  substr(date_vente, 1, 7) AS mois
+           FROM ventes {where} ORDER BY date_vente""",
+        "date_vente",
+    ),
+    "product_events": (
+        lambda: marketplace_db.DB_PATH,
+        """SELECT id, product_id, event_type, device_type, source, timestamp,
+                  substr(timestamp, 1, 7) AS mois
+           FROM product_events {where} ORDER BY timestamp""",
+        "timestamp",
+    ),
+}
+
+
+def _iter_lots(table: str, depuis: Optional[str]) -> Iterator["pa.RecordBatch"]:
+    """Lit une table SQLite par lots et les convertit en RecordBatch Arrow (colonne par colonne)."""
+    get_db_path, requete, colonne_date = _REQUETES[table]
+    schema = SCHEMA_VENTES if table == "ventes" else SCHEMA_EVENEMENTS
+    where, params = ("", [])
+    if depuis:
+        where, params = (f"WHERE {colonne_date} >= ?", [f"{depuis}-01" if len(depuis) == 7 else depuis])
+
+    conn = sqlite3.connect(get_db_path())
+    try:
+        cursor = conn.execute(requete.format(where=where), params)
+        while True:
+            rows = cursor.fetchmany(TAILLE_LOT)
+            if not rows:
+                break
+            colonnes = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(col, type=champ.type) for col, champ in zip(colonnes, schema)],
+                schema=schema
+            )
+    finally:
+        conn.close()
+
+
+def exporter_table(table: str, destination: Optional[str] = None, format: str = "parquet",
+                   depuis: Optional[str] = None) -> Dict:
+    """
+    Exporte une table en fichiers colonnaires partitionnés par mois.
+    Seules les partitions (mois) présentes dans l'export sont remplacées.
+
+    Args:
+        table: "ventes" ou "product_events"
+        destination: Dossier racine (défaut: data/analytics/<table>)
+        format: "parquet" (zstd) ou "ipc" (Arrow IPC compressé lz4)
+        depuis: Mois "YYYY-MM" à partir duquel réexporter (défaut: tout l'historique)
+
+    Returns:
+        Résumé de l'export (lignes, partitions, dossier)
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow n'est pas installé. Installez-le avec: pip install pyarrow")
+    if table not in _REQUETES:
+        raise ValueError(f"Table inconnue: {table}")
+    if format not in FORMATS:
+        raise ValueError(f"Format inconnu: {format}. Utilisez {FORMATS}")
+
+    destination = destination or os.path.join(ANALYTICS_DIR, table)
+    schema = SCHEMA_VENTES if table == "ventes" else SCHEMA_EVENEMENTS
+
+    compteur = {"lignes": 0, "mois": set()}
+
+    def lots_comptes():
+        for lot in _iter_lots(table, depuis):
+            compteur["lignes"] += lot.num_rows
+            compteur["mois"].update(lot.column(lot.schema.get_field_index("mois")).unique().to_pylist())
+            yield lot
+
+    if format == "parquet":
+        file_options = ds.ParquetFileFormat().make_write_options(compression="zstd")
+    else:
+        file_options = ds.IpcFileFormat().make_write_options(compression="lz4")
+
+    ds.write_dataset(
+        lots_comptes(),
+        destination,
+        schema=schema,
+        format=format,
+        file_options=file_options,
+        partitioning=ds.partitioning(pa.schema([("mois", pa.string())]), flavor="hive"),
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=TAILLE_LOT * 4,
+    )
+
+    print(f"✅ Export {table}: {compteur['lignes']} ligne(s), {len(compteur['mois'])} mois -> {destination}")
+    return {
+        "table": table,
+        "format": format,
+        "lignes": compteur["lignes"],
+        "partitions": sorted(m for m in compteur["mois"] if m),
+        "destination": os.path.abspath(destination),
+    }
+
+
+def exporter_historique(format: str = "parquet", depuis: Optional[str] = None) -> Dict:
+    """Exporte les ventes et les événements produits (voir exporter_table)."""
+    return {
+        "ventes": exporter_table("ventes", format=format, depuis=depuis),
+        "product_events": exporter_table("product_events", format=format, depuis=depuis),
+    }
+
+
+if __name__ == "__main__":
+    # python export_colonnes.py [parquet|ipc] [YYYY-MM]
+    fmt = sys.argv[1] if len(sys.argv) > 1 else "parquet"
+    mois = sys.argv[2] if len(sys.argv) > 2 else None
+    print(exporter_historique(format=fmt, depuis=mois))
@@ -2,8 +2,12 @@
 Logique de fuzzy search pour améliorer les résultats de recherche
 Gère les variantes, pluriels, accents, etc.
 """
+import logging
 import re
-from typing import List, Dict, Callable
+from functools import lru_cache
+from typing import List, Dict, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 def generate_search_variants(terme: str) -> List[str]:
@@ -116,6 +120,24 @@ def generate_search_variants(terme: str) -> List[str]:
     return variantes_uniques[:10]  # Limiter à 10 variantes
 
 
+# Repli de remove_accents si unicodedata échoue : une table str.translate (minuscules et majuscules)
+_ACCENTS = {
+    'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a', 'å': 'a',
+    'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
+    'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
+    'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o',
+    'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
+    'ç': 'c', 'ñ': 'n'
+}
+_TABLE_ACCENTS = str.maketrans({**_ACCENTS, **{a.upper(): s.upper() for a, s in _ACCENTS.items()}})
+
+# Mots signalant un produit hors sujet (recherchés comme sous-chaînes du nom)
+MOTS_NON_PERTINENTS = ['telephone', 'smartphone', 'laptop', 'ordinateur', 'tv', 'television',
+                       'casque', 'ecouteur', 'sony', 'samsung', 'apple', 'iphone', 'ipad',
+                       'enceinte', 'bluetooth', 'ecran', 'moniteur', 'clavier', 'souris']
+_RE_NON_PERTINENTS = re.compile('|'.join(map(re.escape, MOTS_NON_PERTINENTS)))
+
+
 def remove_accents(text: str) -> str:
     """
     Retire les accents d'un texte.
@@ -133,25 +155,113 @@ def remove_accents(text: str) -> str:
         return ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
     except:
         # Fallback simple
-        replacements = {
-            'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a', 'å': 'a',
-            'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-            'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-            'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o',
-            'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-            'ç': 'c', 'ñ': 'n'
-        }
-        result = text
-        for accented, unaccented in replacements.items():
-            result = result.replace(accented, unaccented)
-            result = result.replace(accented.upper(), unaccented.upper())
-        return result
+        return text.translate(_TABLE_ACCENTS)
+
+
+class ScoreurPertinence:
+    """
+    Score de pertinence précompilé pour une recherche (terme + variantes).
+    Tout ce qui ne dépend que de la requête est calculé une seule fois :
+    minuscules du terme et des variantes, mots du terme, variantes utiles.
+    score() donne exactement le même résultat que l'ancien calcul produit par produit.
+    """
+
+    def __init__(self, terme: str, variantes: List[str]):
+        self.terme_lower = terme.lower()
+        self.terme_mots = self.terme_lower.split()
+        # Le terme ne peut être un mot complet du nom que s'il ne contient pas d'espace
+        self._terme_mot_possible = len(self.terme_mots) == 1 and self.terme_mots[0] == self.terme_lower
+
+        # Seule la première variante (dans l'ordre) présente dans le nom compte :
+        # une variante qui contient une variante précédente ne peut jamais être la première
+        variantes_lower = [v.lower() for v in variantes[:10]]  # Top 10 variantes
+        self.variantes: List[str] = []
+        for v in variantes_lower:
+            if not any(u in v for u in self.variantes):
+                self.variantes.append(v)
+        # Couverture minimale : si aucune de ces variantes n'est dans le nom, aucune ne l'est
+        self._couverture = [v for v in self.variantes
+                            if not any(u != v and u in v for u in self.variantes)]
+
+    def _premiere_variante(self, nom: str) -> Optional[str]:
+        for v in self._couverture:
+            if v in nom:
+                break
+        else:
+            return None
+        for v in self.variantes:
+            if v in nom:
+                return v
+        return None
+
+    def score(self, produit: Dict) -> float:
+        """Score de pertinence (0-100) d'un produit (voir calculer_pertinence)."""
+        nom = (produit.get('nom') or '').lower()
+        terme_lower = self.terme_lower
+        terme_mots = self.terme_mots
+
+        terme_present = terme_lower in nom
+        variante_utilisee = self._premiere_variante(nom)
+        variante_presente = variante_utilisee is not None
+
+        score = 0.0
+        if not terme_present and not variante_presente:
+            # Vérifier si au moins un mot du terme est présent
+            mots_presents = sum(1 for mot in terme_mots if mot in nom)
+            if mots_presents == 0:
+                return 0.0  # Aucun lien, score 0
+            elif mots_presents < len(terme_mots):
+                score += 5.0  # Score très bas si seulement quelques mots
+        else:
+            # Présence du terme dans le nom (poids fort)
+            score += 60.0 if terme_present else 50.0
+
+            # Position dans le nom (au début = plus pertinent)
+            if nom.startswith(terme_lower):
+                score += 25.0
+            elif variante_utilisee and nom.startswith(variante_utilisee):
+                score += 20.0
+            elif terme_lower in nom[:30]:  # Dans les 30 premiers caractères
+                score += 15.0
+
+            # Catégorie
+            categorie = (produit.get('categorie') or '').lower()
+            if terme_lower in categorie or (variante_utilisee and variante_utilisee in categorie):
+                score += 10.0
+
+            # Bonus si le terme exact est présent comme mot complet
+            if self._terme_mot_possible and terme_lower in nom.split():
+                score += 15.0
+
+        # Pénalité FORTE si le produit contient des mots non liés (téléphone, ordinateur, etc.)
+        if _RE_NON_PERTINENTS.search(nom):
+            if not terme_present and not variante_presente:
+                return 0.0  # Score 0 si produit non pertinent ET terme absent
+            score -= 40.0  # Pénalité forte même si terme présent
+
+        # Bonus si tous les mots du terme sont présents
+        if terme_present or variante_presente:
+            if all(mot in nom for mot in terme_mots):
+                score += 10.0
+
+        return max(0.0, min(100.0, score))
+
+    def score_many(self, produits: Iterable[Dict]) -> List[float]:
+        """Scores d'un lot de produits, dans l'ordre."""
+        score = self.score
+        return [score(produit) for produit in produits]
+
+
+@lru_cache(maxsize=32)
+def _scoreur(terme: str, variantes: Tuple[str, ...]) -> ScoreurPertinence:
+    return ScoreurPertinence(terme, list(variantes))
 
 
 def calculer_pertinence(produit: Dict, terme: str, variantes: List[str]) -> float:
     """
     Calcule un score de pertinence pour un produit.
     Version stricte : nécessite que le terme ou une variante soit présent.
+    Pour un lot de produits, préférer ScoreurPertinence(terme, variantes).score_many().
     
     Args:
         produit: Dictionnaire du produit
@@ -161,77 +271,7 @@ def calculer_pertinence(produit: Dict, terme: str, variantes: List[str]) -> floa
     Returns:
         Score de pertinence (0-100)
     """
-    score = 0.0
-    nom = (produit.get('nom') or '').lower()
-    categorie = (produit.get('categorie') or '').lower()
-    marque = (produit.get('marque') or '').lower()
-    
-    terme_lower = terme.lower()
-    terme_mots = terme_lower.split()
-    
-    # Vérifier si le terme ou une variante pertinente est présente
-    terme_present = terme_lower in nom
-    variante_presente = False
-    variante_utilisee = None
-    
-    # Vérifier les variantes pertinentes (pas toutes, seulement les principales)
-    variantes_principales = variantes[:10]  # Top 10 variantes
-    for v in variantes_principales:
-        v_lower = v.lower()
-        if v_lower in nom:
-            variante_presente = True
-            variante_utilisee = v_lower
-            break
-    
-    # Si ni le terme ni une variante n'est présente, score très bas
-    if not terme_present and not variante_presente:
-        # Vérifier si au moins un mot du terme est présent
-        mots_presents = sum(1 for mot in terme_mots if mot in nom)
-        if mots_presents == 0:
-            return 0.0  # Aucun lien, score 0
-        elif mots_presents < len(terme_mots):
-            score += 5.0  # Score très bas si seulement quelques mots
-    else:
-        # Score basé sur la présence du terme dans le nom (poids fort)
-        if terme_present:
-            score += 60.0
-        elif variante_presente:
-            score += 50.0
-        
-        # Score basé sur la position dans le nom (au début = plus pertinent)
-        if nom.startswith(terme_lower):
-            score += 25.0
-        elif variante_utilisee and nom.startswith(variante_utilisee):
-            score += 20.0
-        elif terme_lower in nom[:30]:  # Dans les 30 premiers caractères
-            score += 15.0
-        
-        # Score basé sur la catégorie
-        if terme_lower in categorie or (variante_utilisee and variante_utilisee in categorie):
-            score += 10.0
-        
-        # Bonus si le terme exact est présent comme mot complet
-        if terme_lower in nom.split():
-            score += 15.0
-    
-    # Pénalité FORTE si le produit contient des mots non liés (téléphone, ordinateur, etc.)
-    mots_non_pertinents = ['telephone', 'smartphone', 'laptop', 'ordinateur', 'tv', 'television', 
-                           'casque', 'ecouteur', 'sony', 'samsung', 'apple', 'iphone', 'ipad',
-                           'enceinte', 'bluetooth', 'ecran', 'moniteur', 'clavier', 'souris']
-    
-    mots_non_pertinents_trouves = [mot for mot in mots_non_pertinents if mot in nom]
-    if mots_non_pertinents_trouves and not terme_present and not variante_presente:
-        score = 0.0  # Score 0 si produit non pertinent ET terme absent
-    elif mots_non_pertinents_trouves:
-        score -= 40.0  # Pénalité forte même si terme présent
-    
-    # Bonus si plusieurs mots du terme sont présents
-    if terme_present or variante_presente:
-        mots_terme_presents = sum(1 for mot in terme_mots if mot in nom)
-        if mots_terme_presents == len(terme_mots):
-            score += 10.0
-    
-    return max(0.0, min(100.0, score))
+    return _scoreur(terme, tuple(variantes)).score(produit)
 
 
 def fuzzy_search_jumia(terme: str, scraper_func: Callable[[str, int], List[Dict]], limit: int = 20) -> List[Dict]:
@@ -248,48 +288,51 @@ def fuzzy_search_jumia(terme: str, scraper_func: Callable[[str, int], List[Dict]
         Liste de produits trouvés, triés par pertinence
     """
     variantes = generate_search_variants(terme)
-    print(f"🔍 Recherche fuzzy pour '{terme}'")
-    print(f"   Variantes à essayer: {len(variantes)}")
+    scoreur = ScoreurPertinence(terme, variantes)  # Compilé une fois pour toute la recherche
+    logger.debug("Recherche fuzzy pour '%s' (%d variantes)", terme, len(variantes))
+    debug = logger.isEnabledFor(logging.DEBUG)  # Traces par produit uniquement en DEBUG
     
     tous_produits = []
     produits_vus = set()  # Pour éviter les doublons
     
     for i, variante in enumerate(variantes, 1):
-        print(f"   [{i}/{len(variantes)}] Essai: '{variante}'")
+        logger.debug("[%d/%d] Essai: '%s'", i, len(variantes), variante)
         
         try:
             produits = scraper_func(variante, limit)
             
             if produits:
-                print(f"      ✅ {len(produits)} produits trouvés")
+                logger.debug("%d produits trouvés pour '%s'", len(produits), variante)
+                
+                # Scorer d'un coup les produits non déjà vus (identifiant unique par lien ou nom)
+                candidats = [(produit, produit.get('lien') or produit.get('nom', '')) for produit in produits]
+                candidats = [(produit, identifiant) for produit, identifiant in candidats
+                             if identifiant and identifiant not in produits_vus]
+                scores = scoreur.score_many([produit for produit, _ in candidats])
                 
-                # Ajouter les produits non déjà vus avec calcul de pertinence
-                for produit in produits:
-                    # Identifier unique par lien ou nom
-                    identifiant = produit.get('lien') or produit.get('nom', '')
-                    if identifiant and identifiant not in produits_vus:
-                        # Calculer le score de pertinence
-                        score = calculer_pertinence(produit, terme, variantes)
+                for (produit, identifiant), score in zip(candidats, scores):
+                    if identifiant not in produits_vus:  # Doublon dans le même lot
                         produit['_pertinence'] = score
                         
                         # Ne garder que les produits avec un score minimum (seuil plus élevé)
                         if score >= 30.0:  # Seuil minimum de pertinence plus strict
                             tous_produits.append(produit)
                             produits_vus.add(identifiant)
-                            print(f"         ✓ '{produit.get('nom', '')[:50]}...' (score: {score:.1f})")
-                        else:
-                            print(f"         ✗ '{produit.get('nom', '')[:50]}...' (score trop bas: {score:.1f})")
+                            if debug:
+                                logger.debug("✓ '%.50s...' (score: %.1f)", produit.get('nom', ''), score)
+                        elif debug:
+                            logger.debug("✗ '%.50s...' (score trop bas: %.1f)", produit.get('nom', ''), score)
                 
                 # Si on a assez de résultats pertinents, on peut s'arrêter
                 produits_pertinents = [p for p in tous_produits if p.get('_pertinence', 0) >= 40.0]
                 if len(produits_pertinents) >= limit:
-                    print(f"      🎯 Assez de résultats pertinents ({len(produits_pertinents)}), arrêt de la recherche")
+                    logger.debug("Assez de résultats pertinents (%d), arrêt de la recherche", len(produits_pertinents))
                     break
             else:
-                print(f"      ❌ Aucun résultat")
+                logger.debug("Aucun résultat pour '%s'", variante)
                 
         except Exception as e:
-            print(f"      ⚠️ Erreur: {e}")
+            logger.warning("Erreur recherche variante '%s': %s", variante, e)
             continue
     
     # Trier par pertinence (score décroissant)
@@ -299,6 +342,7 @@ def fuzzy_search_jumia(terme: str, scraper_func: Callable[[str, int], List[Dict]
     for produit in tous_produits:
         produit.pop('_pertinence', None)
     
-    print(f"📊 Total produits pertinents trouvés: {len(tous_produits)}")
+    logger.info("Recherche fuzzy '%s': %d produits pertinents (%d variantes)",
+                terme, len(tous_produits), len(variantes))
     return tous_produits[:limit]  # Limiter au nombre demandé
 
@@ -6,6 +6,7 @@ import sys
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import json
+import time
 
 try:
     from pytrends.request import TrendReq
@@ -342,3 +343,82 @@ def get_related_topics(keyword: str, geo: str = 'SN') -> Dict:
             "topics": {}
         }
 
+
+MAX_KEYWORDS_PAR_REQUETE = 5  # Limite imposée par Google Trends
+PAUSE_ENTRE_REQUETES = 1.0  # Secondes, pour limiter les erreurs 429
+# Mot-clé de référence ajouté à chaque paquet : recherché de façon stable au Sénégal,
+# il sert d'étalon commun pour rendre comparables des paquets différents
+MOT_CLE_ANCRE = "jumia"
+
+
+def get_keyword_scores(
+    keywords: List[str],
+    timeframe: str = 'today 3-m',
+    geo: str = 'SN',
+    ancre: str = MOT_CLE_ANCRE
+) -> Dict[str, Optional[int]]:
+    """
+    Calcule un score d'intérêt par mot-clé, en lot, sur une échelle commune.
+    Les scores déjà connus sont lus dans le cache partagé (trends_cache),
+    les autres sont demandés à Google Trends par paquets de 4 mots-clés + l'ancre.
+    
+    Note: Google Trends normalise les valeurs au sein d'une même requête.
+    Chaque paquet contient donc le mot-clé d'ancrage, et les scores sont
+    ramenés à son intérêt : 100 = autant recherché que l'ancre, 20 = cinq
+    fois moins. Les scores de paquets différents (et du cache) sont ainsi
+    comparables entre eux et à un seuil fixe.
+    
+    Args:
+        keywords: Liste de mots-clés (sans limite de taille)
+        timeframe: Période de recherche
+        geo: Code pays
+        ancre: Mot-clé de référence commun à tous les paquets
+        
+    Returns:
+        Dictionnaire {keyword: score}, score à None si indisponible
+    """
+    from trends_cache import get_cached_scores, save_scores
+    
+    ancre = ancre.strip().lower()
+    # Normaliser et dédoublonner en gardant l'ordre
+    uniques = list(dict.fromkeys(kw.strip().lower() for kw in keywords if kw and kw.strip()))
+    scores: Dict[str, Optional[int]] = dict.fromkeys(uniques)
+    if ancre in scores:
+        scores[ancre] = 100
+    
+    scores.update(get_cached_scores(uniques, timeframe, geo, ancre))
+    manquants = [kw for kw in uniques if scores[kw] is None]
+    
+    if not manquants or not PYTRENDS_AVAILABLE:
+        return scores
+    
+    pytrends = init_trends()
+    taille_paquet = MAX_KEYWORDS_PAR_REQUETE - 1
+    
+    for i in range(0, len(manquants), taille_paquet):
+        paquet = manquants[i:i + taille_paquet]
+        if i > 0:
+            time.sleep(PAUSE_ENTRE_REQUETES)
+        
+        try:
+            pytrends.build_payload(kw_list=[ancre] + paquet, timeframe=timeframe, geo=geo)
+            interest_over_time = pytrends.interest_over_time()
+        except Exception as e:
+            print(f"Erreur récupération scores trends {paquet}: {e}")
+            continue
+        
+        moyenne_ancre = interest_over_time[ancre].mean() if ancre in interest_over_time.columns else 0
+        if not moyenne_ancre > 0:
+            # Sans intérêt mesuré pour l'ancre, le paquet n'a pas d'échelle : rien n'est mis en cache
+            print(f"⚠️ Ancre '{ancre}' sans données pour {paquet}, scores indisponibles")
+            continue
+        
+        nouveaux = {}
+        for keyword in paquet:
+            moyenne = interest_over_time[keyword].mean() if keyword in interest_over_time.columns else 0
+            nouveaux[keyword] = int(round(moyenne / moyenne_ancre * 100)) if moyenne == moyenne else 0  # Gérer NaN
+        
+        save_scores(nouveaux, timeframe, geo, ancre)
+        scores.update(nouveaux)
+    
+    return scores
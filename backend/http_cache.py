@@ -0,0 +1,193 @@
+"""
+Cache HTTP des pages de listes scrapées (Jumia, Alibaba)
+Pour chaque URL on conserve ETag / Last-Modified, l'empreinte du fragment
+qui contient les produits et la liste de produits déjà extraite :
+- la requête suivante est conditionnelle (If-None-Match / If-Modified-Since) :
+  un 304 renvoie directement les produits en cache, sans téléchargement
+- si le serveur renvoie la page, on compare l'empreinte du fragment produits :
+  identique -> pas d'analyse HTML, on renvoie les produits en cache
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "http_cache.db")
+CACHE_DURATION_DAYS = 30  # Pages non revues depuis plus longtemps : purgées
+
+
+def init_http_cache():
+    """Initialise la table du cache des pages."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pages_http (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            empreinte TEXT NOT NULL,
+            produits_json TEXT NOT NULL,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- Dernière analyse de la page
+            checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP   -- Dernière vérification (304 ou empreinte identique)
+        )
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def get_page(url: str) -> Optional[Dict]:
+    """
+    Entrée du cache pour une URL.
+
+    Returns:
+        Dict avec etag, last_modified, empreinte et produits, ou None
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(
+            "SELECT etag, last_modified, empreinte, produits_json FROM pages_http WHERE url = ?", (url,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "empreinte": row[2], "produits": json.loads(row[3])}
+    except Exception as e:
+        logger.error("Erreur lecture cache HTTP: %s", e)
+        return None
+    finally:
+        conn.close()
+
+
+def save_page(url: str, etag: Optional[str], last_modified: Optional[str], empreinte: str,
+              produits: Optional[List[Dict]] = None):
+    """
+    Enregistre (ou rafraîchit) l'entrée d'une URL.
+
+    Args:
+        url: URL de la page
+        etag: En-tête ETag de la réponse
+        last_modified: En-tête Last-Modified de la réponse
+        empreinte: Empreinte du fragment produits
+        produits: Produits extraits (None : page vérifiée inchangée, les produits en cache sont gardés)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    maintenant = datetime.now().isoformat()
+
+    try:
+        if produits is None:
+            cursor.execute("""
+                UPDATE pages_http SET etag = ?, last_modified = ?, checked_at = ? WHERE url = ?
+            """, (etag, last_modified, maintenant, url))
+        else:
+            cursor.execute("""
+                INSERT OR REPLACE INTO pages_http
+                (url, etag, last_modified, empreinte, produits_json, fetched_at, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (url, etag, last_modified, empreinte, json.dumps(produits, ensure_ascii=False), maintenant, maintenant))
+        conn.commit()
+    except Exception as e:
+        logger.error("Erreur sauvegarde cache HTTP: %s", e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def clear_old_pages(days: int = CACHE_DURATION_DAYS) -> int:
+    """Supprime les pages non vérifiées depuis `days` jours. Retourne le nombre de lignes supprimées."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("DELETE FROM pages_http WHERE checked_at < ?",
+                       ((datetime.now() - timedelta(days=days)).isoformat(),))
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        logger.error("Erreur nettoyage cache HTTP: %s", e)
+        return 0
+    finally:
+        conn.close()
+
+
+_RE_VOLATILS = re.compile(rb'<script\b.*?</script>|<style\b.*?</style>|<!--.*?-->', re.DOTALL | re.IGNORECASE)
+
+
+def fragment_sans_scripts(contenu: bytes) -> bytes:
+    """Fragment par défaut d'une page HTML : sans scripts, styles ni commentaires (jetons, horodatages)."""
+    return _RE_VOLATILS.sub(b"", contenu)
+
+
+def _produits_verifies(produits: List[Dict]) -> List[Dict]:
+    # Les produits sont ceux de la page telle qu'elle est maintenant
+    maintenant = datetime.now().isoformat()
+    for produit in produits:
+        if "date_scraping" in produit:
+            produit["date_scraping"] = maintenant
+    return produits
+
+
+def get_produits(url: str, extraire: Callable[[requests.Response], List[Dict]],
+                 fragment: Optional[Callable[[bytes], bytes]] = None,
+                 session=None, headers: Optional[Dict] = None, timeout: int = 10) -> List[Dict]:
+    """
+    Produits d'une page de liste, en évitant téléchargement et analyse si elle n'a pas changé.
+
+    Args:
+        url: URL de la page
+        extraire: Fonction réponse -> produits (analyse HTML), appelée seulement si la page a changé
+        fragment: Fonction contenu -> partie de la page qui porte les produits (défaut: page entière)
+        session: Session requests à utiliser (défaut: module requests)
+        headers: En-têtes HTTP de base
+        timeout: Timeout de la requête
+
+    Returns:
+        Liste de produits
+
+    Raises:
+        requests.RequestException: Erreur HTTP (statut >= 400 ou réseau)
+    """
+    entree = get_page(url)
+    en_tetes = dict(headers or {})
+    if entree:
+        if entree["etag"]:
+            en_tetes["If-None-Match"] = entree["etag"]
+        if entree["last_modified"]:
+            en_tetes["If-Modified-Since"] = entree["last_modified"]
+
+    response = (session or requests).get(url, headers=en_tetes, timeout=timeout)
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+
+    if response.status_code == 304 and entree:
+        logger.debug("Page inchangée (304): %s", url)
+        save_page(url, etag or entree["etag"], last_modified or entree["last_modified"], entree["empreinte"])
+        return _produits_verifies(entree["produits"])
+    response.raise_for_status()
+
+    contenu = response.content
+    empreinte = hashlib.sha256(fragment(contenu) if fragment else contenu).hexdigest()
+    if entree and entree["empreinte"] == empreinte:
+        logger.debug("Fragment produits inchangé, analyse évitée: %s", url)
+        save_page(url, etag, last_modified, empreinte)
+        return _produits_verifies(entree["produits"])
+
+    produits = extraire(response)
+    save_page(url, etag, last_modified, empreinte, produits)
+    return produits
+
+
+# Initialiser le cache au chargement du module
+init_http_cache()
@@ -1,20 +1,229 @@
 """
 Module pour télécharger et sauvegarder les images des produits
+
+Stockage adressé par contenu : chaque image est rangée sous le SHA-256 de ses
+octets (objets/ab/abcd....jpg), une seule fois quel que soit le nombre de
+produits ou d'URLs qui la référencent. Un manifeste SQLite associe chaque URL
+à son empreinte et à ses en-têtes ETag / Last-Modified pour les re-téléchargements
+conditionnels.
 """
 import os
+import shutil
+import sqlite3
+import tempfile
+import threading
 import requests
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, Optional, Tuple
 
 # Dossier pour stocker les images du marketplace
 MARKETPLACE_IMAGES_DIR = Path("data/marketplace_images")
 MARKETPLACE_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 
+# Objets adressés par contenu et manifeste URL -> empreinte
+OBJECTS_DIR = MARKETPLACE_IMAGES_DIR / "objets"
+MANIFEST_PATH = MARKETPLACE_IMAGES_DIR / "manifest.db"
+
 # URL de base pour servir les images (relatif au dossier public Next.js)
 PUBLIC_IMAGES_URL = "/images/products"
 
+MAX_DOWNLOAD_WORKERS = 8  # Téléchargements simultanés
+DOWNLOAD_TIMEOUT = 10
+EXTENSIONS_IMAGES = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg'}
+
+_session_locale = threading.local()
+
+
+def init_manifest():
+    """Initialise le manifeste des images téléchargées."""
+    conn = sqlite3.connect(MANIFEST_PATH)
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS images_manifest (
+            url TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            size INTEGER,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_manifest_sha ON images_manifest(sha256)")
+    conn.commit()
+    conn.close()
+
+
+def _get_session() -> requests.Session:
+    """Une session HTTP (keep-alive) par thread du pool."""
+    if not hasattr(_session_locale, "session"):
+        _session_locale.session = requests.Session()
+    return _session_locale.session
+
+
+def _extension(image_url: str) -> str:
+    ext = os.path.splitext(urlparse(image_url).path)[1].lower()
+    return ext if ext in EXTENSIONS_IMAGES else '.jpg'
+
+
+def object_path(sha256: str, ext: str) -> Path:
+    """Chemin de l'objet adressé par contenu."""
+    return OBJECTS_DIR / sha256[:2] / f"{sha256}{ext}"
+
+
+def _lire_manifest(urls: Iterable[str]) -> Dict[str, Dict]:
+    urls = list(urls)
+    if not urls:
+        return {}
+    conn = sqlite3.connect(MANIFEST_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        entrees = {}
+        for i in range(0, len(urls), 500):  # Limite de variables SQLite
+            lot = urls[i:i + 500]
+            cursor = conn.execute(
+                f"SELECT * FROM images_manifest WHERE url IN ({','.join('?' * len(lot))})", lot
+            )
+            entrees.update({row["url"]: dict(row) for row in cursor})
+        return entrees
+    finally:
+        conn.close()
+
+
+def _ecrire_manifest(entrees: Iterable[Dict]):
+    """Enregistre les nouvelles entrées du manifeste en une seule transaction."""
+    conn = sqlite3.connect(MANIFEST_PATH)
+    try:
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO images_manifest (url, sha256, ext, size, etag, last_modified, fetched_at)
+                VALUES (:url, :sha256, :ext, :size, :etag, :last_modified, CURRENT_TIMESTAMP)
+            """, list(entrees))
+    finally:
+        conn.close()
+
+
+def _fetch(image_url: str, entree: Optional[Dict]) -> Tuple[Optional[Dict], bool]:
+    """
+    Télécharge une image vers le stockage adressé par contenu.
+    Si l'URL est déjà connue, la requête est conditionnelle (ETag / Last-Modified).
+
+    Returns:
+        (entrée du manifeste ou None si erreur, True si le manifeste doit être mis à jour)
+    """
+    headers = {}
+    if entree and object_path(entree["sha256"], entree["ext"]).exists():
+        if entree.get("etag"):
+            headers["If-None-Match"] = entree["etag"]
+        if entree.get("last_modified"):
+            headers["If-Modified-Since"] = entree["last_modified"]
+
+    try:
+        response = _get_session().get(image_url, timeout=DOWNLOAD_TIMEOUT, stream=True, headers=headers)
+        if response.status_code == 304 and headers:
+            response.close()
+            return entree, False
+        response.raise_for_status()
+
+        # Hash calculé pendant l'écriture dans un fichier temporaire
+        OBJECTS_DIR.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=OBJECTS_DIR, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            sha256 = digest.hexdigest()
+            ext = _extension(image_url)
+            destination = object_path(sha256, ext)
+            if destination.exists():
+                os.remove(tmp_path)  # Même contenu déjà stocké (autre URL ou autre produit)
+            else:
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, destination)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {
+            "url": image_url,
+            "sha256": sha256,
+            "ext": ext,
+            "size": size,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }, True
+    except Exception as e:
+        print(f"❌ Erreur téléchargement image {image_url}: {e}")
+        return None, False
+
+
+def download_images(images: Iterable[Tuple[str, str]], max_workers: int = MAX_DOWNLOAD_WORKERS,
+                    refresh: bool = False, variantes: bool = True) -> Dict[str, Optional[str]]:
+    """
+    Télécharge en parallèle les images d'un lot de produits.
+    Chaque URL unique n'est récupérée qu'une fois ; les URLs déjà présentes dans le
+    manifeste ne sont pas retéléchargées (refresh=True: requête conditionnelle).
+
+    Args:
+        images: Couples (product_id, image_url)
+        max_workers: Taille du pool de téléchargement
+        refresh: Revalider les images déjà connues (ETag / Last-Modified)
+        variantes: Générer les miniatures des nouvelles images (image_variants)
+
+    Returns:
+        Dictionnaire {product_id: chemin relatif de l'image (images/products/<sha256>.ext) ou None}
+    """
+    images = [(pid, url) for pid, url in images]
+    urls = list(dict.fromkeys(
+        url for _, url in images if url and url.startswith(('http://', 'https://'))
+    ))
+    manifest = _lire_manifest(urls)
+
+    a_telecharger = []
+    for url in urls:
+        entree = manifest.get(url)
+        if entree and not refresh and object_path(entree["sha256"], entree["ext"]).exists():
+            continue
+        a_telecharger.append(url)
+
+    nouvelles_entrees = []
+    if a_telecharger:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(a_telecharger)))) as executor:
+            resultats = executor.map(lambda url: _fetch(url, manifest.get(url)), a_telecharger)
+            for url, (entree, modifiee) in zip(a_telecharger, resultats):
+                if entree is None:
+                    # Échec (souvent passager) : l'image déjà stockée reste servie ;
+                    # l'entrée n'est écartée que si son objet a disparu du disque
+                    connue = manifest.get(url)
+                    if connue and not object_path(connue["sha256"], connue["ext"]).exists():
+                        manifest.pop(url, None)
+                    continue
+                manifest[url] = entree
+                if modifiee:
+                    nouvelles_entrees.append(entree)
+    if nouvelles_entrees:
+        _ecrire_manifest(nouvelles_entrees)
+        if variantes:
+            from image_variants import generer_variantes  # Import tardif (dépendance circulaire)
+            generer_variantes((e["sha256"], e["ext"]) for e in nouvelles_entrees)
+
+    print(f"🖼️ Images: {len(urls)} URL(s) unique(s), {len(a_telecharger)} requête(s), "
+          f"{len(nouvelles_entrees)} nouvelle(s) version(s)")
+
+    chemins = {}
+    for product_id, url in images:
+        entree = manifest.get(url)
+        chemins[product_id] = f"images/products/{entree['sha256']}{entree['ext']}" if entree else None
+    return chemins
+
 
 def download_image(image_url: str, product_id: str) -> Optional[str]:
     """
@@ -22,47 +231,18 @@ def download_image(image_url: str, product_id: str) -> Optional[str]:
     
     Args:
         image_url: URL de l'image à télécharger
-        product_id: ID du produit (pour nommer le fichier)
+        product_id: ID du produit (conservé pour compatibilité, le nom dépend du contenu)
         
     Returns:
         Chemin relatif de l'image sauvegardée (pour Next.js public/) ou None si erreur
     """
-    try:
-        if not image_url or not image_url.startswith(('http://', 'https://')):
-            return None
-        
-        # Télécharger l'image
-        response = requests.get(image_url, timeout=10, stream=True)
-        response.raise_for_status()
-        
-        # Déterminer l'extension du fichier
-        parsed_url = urlparse(image_url)
-        path = parsed_url.path
-        ext = os.path.splitext(path)[1] or '.jpg'
-        
-        # Créer un nom de fichier unique basé sur product_id et hash de l'URL
-        url_hash = hashlib.md5(image_url.encode()).hexdigest()[:8]
-        filename = f"{product_id}_{url_hash}{ext}"
-        
-        # Chemin complet pour sauvegarder (dans data/marketplace_images)
-        local_path = MARKETPLACE_IMAGES_DIR / filename
-        
-        # Sauvegarder l'image
-        with open(local_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
-        # Retourner le chemin relatif pour Next.js (sera copié dans public/images/products)
-        return f"images/products/{filename}"
-        
-    except Exception as e:
-        print(f"❌ Erreur téléchargement image {image_url}: {e}")
-        return None
+    return download_images([(product_id, image_url)]).get(product_id)
 
 
 def copy_image_to_public(image_path: str, marketplace_public_dir: str) -> Optional[str]:
     """
-    Copie une image depuis data/marketplace_images vers le dossier public du marketplace.
+    Expose une image du stockage local dans le dossier public du marketplace
+    (lien physique ou symbolique plutôt qu'une copie ; une seule fois par contenu).
     
     Args:
         image_path: Chemin relatif de l'image (images/products/filename.jpg)
@@ -72,7 +252,12 @@ def copy_image_to_public(image_path: str, marketplace_public_dir: str) -> Option
         Chemin final de l'image dans public/ ou None si erreur
     """
     try:
-        source_path = MARKETPLACE_IMAGES_DIR / os.path.basename(image_path)
+        filename = os.path.basename(image_path)
+        sha256, ext = os.path.splitext(filename)
+        source_path = object_path(sha256, ext)
+        if not source_path.exists():
+            # Anciennes images nommées product_id + hash de l'URL
+            source_path = MARKETPLACE_IMAGES_DIR / filename
         if not source_path.exists():
             return None
         
@@ -80,15 +265,28 @@ def copy_image_to_public(image_path: str, marketplace_public_dir: str) -> Option
         dest_dir = Path(marketplace_public_dir) / "images" / "products"
         dest_dir.mkdir(parents=True, exist_ok=True)
         
-        # Copier le fichier
-        dest_path = dest_dir / os.path.basename(image_path)
-        import shutil
-        shutil.copy2(source_path, dest_path)
+        dest_path = dest_dir / filename
+        if not dest_path.exists():
+            _lier_fichier(source_path, dest_path)
         
         # Retourner le chemin relatif pour Next.js
-        return f"/images/products/{os.path.basename(image_path)}"
+        return f"{PUBLIC_IMAGES_URL}/{filename}"
         
     except Exception as e:
         print(f"❌ Erreur copie image vers public: {e}")
         return None
 
+
+def _lier_fichier(source_path: Path, dest_path: Path):
+    """Lien physique (même disque), sinon lien symbolique, sinon copie."""
+    try:
+        os.link(source_path, dest_path)
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(source_path), dest_path)
+        except OSError:
+            shutil.copy2(source_path, dest_path)
+
+
+# Initialiser le manifeste au chargement du module
+init_manifest()
@@ -0,0 +1,180 @@
+"""
+Génération de miniatures / variantes responsives des images produits
+Chaque image du stockage adressé par contenu (image_downloader) est déclinée
+à quelques largeurs fixes en WebP (et AVIF si Pillow le supporte), dans un
+pool de processus. Dimensions et poids sont enregistrés dans le manifeste.
+"""
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from image_downloader import MANIFEST_PATH, MARKETPLACE_IMAGES_DIR, object_path
+
+try:
+    from PIL import Image, ImageOps, features
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    print("⚠️ Pillow non installé. Installez-le avec: pip install Pillow")
+
+VARIANTS_DIR = MARKETPLACE_IMAGES_DIR / "variantes"
+VARIANT_WIDTHS = (160, 320, 640)  # Cartes produit mobile / desktop / fiche produit
+MAX_VARIANT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Format -> qualité d'encodage
+FORMATS = {"webp": 80}
+if PIL_AVAILABLE and features.check("avif"):
+    FORMATS["avif"] = 60
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def init_variants_manifest():
+    """Initialise la table des variantes dans le manifeste des images."""
+    conn = sqlite3.connect(MANIFEST_PATH)
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS images_variantes (
+            sha256 TEXT NOT NULL,
+            largeur_cible INTEGER NOT NULL,  -- 0 = image originale
+            format TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (sha256, largeur_cible, format)
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def variant_path(sha256: str, largeur: int, fmt: str) -> Path:
+    """Chemin d'une variante (adressée par l'empreinte de l'original)."""
+    return VARIANTS_DIR / sha256[:2] / f"{sha256}_{largeur}.{fmt}"
+
+
+def _generer(source: str, sha256: str) -> List[Tuple]:
+    """
+    Génère les variantes d'une image (exécuté dans un processus du pool).
+    Les largeurs supérieures à l'original ne sont pas agrandies.
+
+    Returns:
+        Lignes (sha256, largeur_cible, format, width, height, size) à enregistrer
+    """
+    lignes = []
+    with Image.open(source) as img:
+        format_original = (img.format or Path(source).suffix[1:]).lower()
+        img = ImageOps.exif_transpose(img)
+        lignes.append((sha256, 0, format_original, img.width, img.height, os.path.getsize(source)))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+
+        largeurs = [w for w in VARIANT_WIDTHS if w < img.width] or [img.width]
+        for largeur in largeurs:
+            hauteur = max(1, round(img.height * largeur / img.width))
+            redim = img.resize((largeur, hauteur), Image.LANCZOS) if largeur != img.width else img
+            for fmt, qualite in FORMATS.items():
+                destination = variant_path(sha256, largeur, fmt)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                tmp = destination.with_suffix(f".{os.getpid()}.part")
+                redim.save(tmp, format=fmt.upper(), quality=qualite)
+                os.replace(tmp, destination)
+                lignes.append((sha256, largeur, fmt, largeur, hauteur, os.path.getsize(destination)))
+    return lignes
+
+
+def _generer_sans_erreur(args: Tuple[str, str]) -> List[Tuple]:
+    source, sha256 = args
+    try:
+        return _generer(source, sha256)
+    except Exception as e:
+        print(f"❌ Erreur génération variantes {sha256[:12]}: {e}")
+        return []
+
+
+def generer_variantes(objets: Iterable[Tuple[str, str]], max_workers: int = MAX_VARIANT_WORKERS) -> int:
+    """
+    Génère en parallèle (processus) les variantes des images qui n'en ont pas encore.
+
+    Args:
+        objets: Couples (sha256, extension) du stockage adressé par contenu
+        max_workers: Taille du pool de processus
+
+    Returns:
+        Nombre d'images traitées
+    """
+    if not PIL_AVAILABLE:
+        return 0
+    objets = dict(objets)
+    if not objets:
+        return 0
+
+    conn = sqlite3.connect(MANIFEST_PATH)
+    try:
+        shas = list(objets)
+        deja_faits = set()
+        for i in range(0, len(shas), 500):  # Limite de variables SQLite
+            lot = shas[i:i + 500]
+            deja_faits.update(row[0] for row in conn.execute(f"""
+                SELECT DISTINCT sha256 FROM images_variantes
+                WHERE largeur_cible > 0 AND sha256 IN ({','.join('?' * len(lot))})
+            """, lot))
+        taches = [(str(object_path(sha, ext)), sha) for sha, ext in objets.items()
+                  if sha not in deja_faits and object_path(sha, ext).exists()]
+        if not taches:
+            return 0
+
+        if len(taches) == 1 or max_workers <= 1:
+            resultats = map(_generer_sans_erreur, taches)
+            lignes = [ligne for lot in resultats for ligne in lot]
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(taches))) as executor:
+                lignes = [ligne for lot in executor.map(_generer_sans_erreur, taches, chunksize=4) for ligne in lot]
+
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO images_variantes (sha256, largeur_cible, format, width, height, size)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, lignes)
+        print(f"🖼️ Variantes générées pour {len(taches)} image(s)")
+        return len(taches)
+    finally:
+        conn.close()
+
+
+def get_variantes(sha256: str) -> List[Dict]:
+    """Variantes connues d'une image (pour construire un srcset)."""
+    conn = sqlite3.connect(MANIFEST_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("""
+            SELECT largeur_cible, format, width, height, size FROM images_variantes
+            WHERE sha256 = ? ORDER BY largeur_cible, format
+        """, (sha256,)).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def choisir_variante(sha256: str, largeur: int, formats_acceptes: Iterable[str] = ("webp",)) -> Optional[Path]:
+    """
+    Choisit la plus petite variante au moins aussi large que demandé
+    (ou la plus large disponible), dans le format le plus léger accepté.
+    """
+    acceptes = [fmt for fmt in ("avif", "webp") if fmt in formats_acceptes]
+    variantes = [v for v in get_variantes(sha256) if v["largeur_cible"] > 0 and v["format"] in acceptes]
+    if not variantes:
+        return None
+    suffisantes = [v for v in variantes if v["width"] >= largeur]
+    cible = min(v["width"] for v in suffisantes) if suffisantes else max(v["width"] for v in variantes)
+    candidates = sorted((v for v in variantes if v["width"] == cible), key=lambda v: v["size"])
+    chemin = variant_path(sha256, candidates[0]["largeur_cible"], candidates[0]["format"])
+    return chemin if chemin.exists() else None
+
+
+# Initialiser la table au chargement du module
+init_variants_manifest()
@@ -0,0 +1,454 @@
+"""
+Instrumentation de l'API : latences par route et par dépendance externe
+- Histogrammes de latence par route (middleware FastAPI) et par dépendance :
+  hôte HTTP (requests), modèle OpenAI et rapport pytrends (httpx / requests),
+  requête SQLite (type d'instruction + table).
+- Export au format texte Prometheus (GET /metrics).
+- Profileur par échantillonnage optionnel (PROFILER_SEUIL_MS) : les piles des
+  requêtes plus lentes que le seuil sont écrites au format "folded"
+  (flamegraph.pl, speedscope) dans data/profils.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes (secondes)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROFILER_SEUIL_MS = float(os.getenv("PROFILER_SEUIL_MS", "0"))  # 0 = profileur désactivé
+PROFILER_INTERVALLE = 0.005  # Secondes entre deux échantillons
+PROFILS_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "profils")
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Endpoints pytrends -> rapport
+_RAPPORTS_PYTRENDS = {
+    "explore": "build_payload",
+    "multiline": "interest_over_time",
+    "comparedgeo": "interest_by_region",
+    "relatedsearches": "related",
+}
+_RE_TABLE_SQL = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+[\"'`]?(\w+)", re.I)
+# Threads en attente (pool inactif, boucle de réconciliation...) : ignorés par le profileur
+_FEUILLES_INACTIVES = {("threading", "wait"), ("queue", "get"), ("selectors", "select"),
+                       ("threading", "_wait_for_tstate_lock"), ("base_events", "_run_once")}
+
+
+class Histogramme:
+    """Histogramme cumulatif à bornes fixes (compatible Prometheus)."""
+
+    __slots__ = ("compteurs", "somme", "total")
+
+    def __init__(self):
+        self.compteurs = [0] * len(BUCKETS)
+        self.somme = 0.0
+        self.total = 0
+
+    def observer(self, valeur: float):
+        for i, borne in enumerate(BUCKETS):
+            if valeur <= borne:
+                self.compteurs[i] += 1
+                break
+        self.somme += valeur
+        self.total += 1
+
+
+class Registre:
+    """Histogrammes indexés par (métrique, labels), protégés par un verrou."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, Tuple], Histogramme] = {}
+        self._aide: Dict[str, str] = {}
+
+    def declarer(self, nom: str, aide: str):
+        self._aide[nom] = aide
+
+    def observer(self, nom: str, valeur: float, **labels):
+        cle = (nom, tuple(sorted(labels.items())))
+        with self._lock:
+            serie = self._series.get(cle)
+            if serie is None:
+                serie = self._series[cle] = Histogramme()
+            serie.observer(valeur)
+
+    def exporter(self) -> str:
+        """Texte au format d'exposition Prometheus 0.0.4."""
+        with self._lock:
+            series = sorted(
+                ((nom, labels, list(h.compteurs), h.somme, h.total) for (nom, labels), h in self._series.items()),
+                key=lambda s: (s[0], s[1])
+            )
+        lignes = []
+        courant = None
+        for nom, labels, compteurs, somme, total in series:
+            if nom != courant:
+                courant = nom
+                lignes.append(f"# HELP {nom} {self._aide.get(nom, nom)}")
+                lignes.append(f"# TYPE {nom} histogram")
+            base = ",".join(f'{cle}="{_echapper(valeur)}"' for cle, valeur in labels)
+            sep = "," if base else ""
+            cumul = 0
+            for borne, n in zip(BUCKETS, compteurs):
+                cumul += n
+                lignes.append(f'{nom}_bucket{{{base}{sep}le="{borne}"}} {cumul}')
+            lignes.append(f'{nom}_bucket{{{base}{sep}le="+Inf"}} {total}')
+            lignes.append(f"{nom}_sum{{{base}}} {somme:.6f}")
+            lignes.append(f"{nom}_count{{{base}}} {total}")
+        return "\n".join(lignes) + "\n"
+
+
+def _echapper(valeur) -> str:
+    return str(valeur).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+registre = Registre()
+registre.declarer("http_request_duration_seconds", "Latence des requêtes HTTP servies par l'API, par route")
+registre.declarer("dependency_duration_seconds", "Latence des appels aux dépendances externes (HTTP, OpenAI, pytrends, SQLite)")
+
+
+# --- Dépendances : décorateur / context manager ---
+
+@contextmanager
+def mesurer(dependance: str, cible: str):
+    """
+    Chronomètre un appel à une dépendance externe.
+
+        with mesurer("apify", "alibaba-scraper"):
+            ...
+    """
+    debut = time.perf_counter()
+    statut = "ok"
+    try:
+        yield
+    except Exception:
+        statut = "erreur"
+        raise
+    finally:
+        registre.observer("dependency_duration_seconds", time.perf_counter() - debut,
+                          dependency=dependance, target=cible, status=statut)
+
+
+def chronometre(dependance: str, cible: Optional[str] = None):
+    """Décorateur équivalent à mesurer() (cible par défaut : nom de la fonction)."""
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def wrapper(*args, **kwargs):
+            with mesurer(dependance, cible or fonction.__name__):
+                return fonction(*args, **kwargs)
+        return wrapper
+    return decorateur
+
+
+# --- Instrumentation automatique des clients HTTP et de SQLite ---
+
+def _cible_http(url: str, corps=None) -> Tuple[str, str]:
+    """(dépendance, cible) d'une requête sortante."""
+    parties = urlsplit(url)
+    hote = parties.hostname or "inconnu"
+    if hote.endswith("api.openai.com"):
+        modele = "inconnu"
+        if corps:
+            try:
+                modele = json.loads(corps).get("model", modele)
+            except (ValueError, AttributeError, TypeError):
+                pass
+        return "openai", modele
+    if hote.startswith("trends.google."):
+        segment = parties.path.rstrip("/").rsplit("/", 1)[-1]
+        return "pytrends", _RAPPORTS_PYTRENDS.get(segment, segment or "inconnu")
+    return "http", hote
+
+
+@functools.lru_cache(maxsize=2048)
+def _cible_sql(sql: str) -> str:
+    """Type d'instruction + table principale ("SELECT ventes")."""
+    mots = sql.split(None, 3)
+    if not mots:
+        return "?"
+    instruction = mots[0].upper()
+    if instruction in ("CREATE", "DROP", "ALTER") and len(mots) > 1:
+        # DDL : type d'objet seulement (CREATE TABLE, CREATE TRIGGER...)
+        objet = mots[2] if mots[1].upper() in ("UNIQUE", "VIRTUAL", "TEMP", "TEMPORARY") and len(mots) > 2 else mots[1]
+        return f"{instruction} {objet.upper()}"
+    table = _RE_TABLE_SQL.search(sql)
+    return f"{instruction} {table.group(1)}" if table else instruction
+
+
+def _observer_sql(sql, debut: float, statut: str):
+    registre.observer("dependency_duration_seconds", time.perf_counter() - debut,
+                      dependency="sqlite", target=_cible_sql(sql) if isinstance(sql, str) else "?", status=statut)
+
+
+class CurseurInstrumente(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        debut = time.perf_counter()
+        try:
+            resultat = super().execute(sql, *args)
+        except Exception:
+            _observer_sql(sql, debut, "erreur")
+            raise
+        _observer_sql(sql, debut, "ok")
+        return resultat
+
+    def executemany(self, sql, *args):
+        debut = time.perf_counter()
+        try:
+            resultat = super().executemany(sql, *args)
+        except Exception:
+            _observer_sql(sql, debut, "erreur")
+            raise
+        _observer_sql(sql, debut, "ok")
+        return resultat
+
+
+class ConnexionInstrumentee(sqlite3.Connection):
+    """Connexion dont les requêtes (directes ou via curseur) sont chronométrées."""
+
+    def cursor(self, factory=CurseurInstrumente):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+
+_installe = False
+
+
+def installer():
+    """
+    Active l'instrumentation automatique (idempotent) : requests, httpx
+    (client OpenAI) et sqlite3.connect sont enveloppés pour chronométrer
+    chaque appel. Les modules qui appellent `sqlite3.connect(...)` ensuite
+    sont couverts sans modification.
+    """
+    global _installe
+    if _installe:
+        return
+    _installe = True
+
+    connect_origine = sqlite3.connect
+
+    @functools.wraps(connect_origine)
+    def connect(*args, **kwargs):
+        kwargs.setdefault("factory", ConnexionInstrumentee)
+        return connect_origine(*args, **kwargs)
+
+    sqlite3.connect = connect
+
+    try:
+        import requests
+        send_origine = requests.Session.send
+
+        @functools.wraps(send_origine)
+        def send(self, request, **kwargs):
+            dependance, cible = _cible_http(request.url)
+            with mesurer(dependance, cible):
+                return send_origine(self, request, **kwargs)
+
+        requests.Session.send = send
+    except ImportError:
+        pass
+
+    try:
+        import httpx
+        httpx_send_origine = httpx.Client.send
+
+        @functools.wraps(httpx_send_origine)
+        def httpx_send(self, request, **kwargs):
+            dependance, cible = _cible_http(str(request.url), request.content)
+            with mesurer(dependance, cible):
+                return httpx_send_origine(self, request, **kwargs)
+
+        httpx.Client.send = httpx_send
+    except ImportError:
+        pass
+
+
+# --- Profileur par échantillonnage ---
+
+# Jeton de profilage de la requête en cours (copié dans le thread qui exécute l'endpoint)
+_jeton_requete: ContextVar[Optional[int]] = ContextVar("jeton_profileur", default=None)
+
+
+class ProfileurEchantillonnage:
+    """
+    Échantillonne les piles des threads pendant les requêtes en cours
+    (thread démon actif seulement s'il y a des requêtes). Chaque requête ne compte
+    que les piles du thread qui exécute son endpoint (enregistré au démarrage de
+    l'endpoint, voir thread_requete) ; seules les piles qui passent par le code du
+    backend sont retenues.
+    """
+
+    def __init__(self, seuil_ms: float, intervalle: float = PROFILER_INTERVALLE, dossier: str = PROFILS_DIR):
+        self.seuil_ms = seuil_ms
+        self.intervalle = intervalle
+        self.dossier = dossier
+        self._lock = threading.Lock()
+        self._actives: Dict[int, Counter] = {}
+        self._threads: Dict[int, Set[int]] = {}  # Thread -> jetons des requêtes qu'il exécute
+        self._thread: Optional[threading.Thread] = None
+        self._prochain_id = 0
+
+    def debut(self) -> int:
+        with self._lock:
+            self._prochain_id += 1
+            jeton = self._prochain_id
+            self._actives[jeton] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._boucle, name="profileur", daemon=True)
+                self._thread.start()
+        _jeton_requete.set(jeton)
+        return jeton
+
+    @contextmanager
+    def thread_requete(self):
+        """Rattache le thread courant à la requête en cours le temps de l'endpoint."""
+        jeton, ident = _jeton_requete.get(), threading.get_ident()
+        with self._lock:
+            actif = jeton in self._actives
+            if actif:
+                self._threads.setdefault(ident, set()).add(jeton)
+        try:
+            yield
+        finally:
+            if actif:
+                with self._lock:
+                    jetons = self._threads.get(ident, set())
+                    jetons.discard(jeton)
+                    if not jetons:
+                        self._threads.pop(ident, None)
+
+    def fin(self, jeton: int, route: str, duree_ms: float) -> Optional[str]:
+        """Termine l'échantillonnage ; écrit les piles si la requête dépasse le seuil."""
+        with self._lock:
+            piles = self._actives.pop(jeton, None)
+        if not piles or duree_ms < self.seuil_ms:
+            return None
+        os.makedirs(self.dossier, exist_ok=True)
+        nom = re.sub(r"[^\w.-]+", "_", route).strip("_") or "racine"
+        chemin = os.path.join(self.dossier, f"{datetime.now():%Y%m%d-%H%M%S}_{nom}_{duree_ms:.0f}ms.folded")
+        with open(chemin, "w", encoding="utf-8") as f:
+            for pile, n in piles.most_common():
+                f.write(f"{pile} {n}\n")
+        return chemin
+
+    def _boucle(self):
+        while True:
+            with self._lock:
+                if not self._actives:
+                    self._thread = None
+                    return
+                # Un thread partagé par plusieurs requêtes (boucle asyncio des endpoints async)
+                # ne peut être attribué à aucune : ses piles sont ignorées
+                proprietaires = {ident: next(iter(jetons)) for ident, jetons in self._threads.items()
+                                 if len(jetons) == 1}
+            piles = []
+            for ident, frame in sys._current_frames().items():
+                if ident in proprietaires:
+                    pile = _pile_repliee(frame)
+                    if pile:
+                        piles.append((proprietaires[ident], pile))
+            with self._lock:
+                for jeton, pile in piles:
+                    compteur = self._actives.get(jeton)
+                    if compteur is not None:
+                        compteur[pile] += 1
+            time.sleep(self.intervalle)
+
+
+def _pile_repliee(frame) -> Optional[str]:
+    """Pile au format folded (racine;...;feuille), ou None si elle ne passe pas par le backend."""
+    feuille = (os.path.splitext(os.path.basename(frame.f_code.co_filename))[0], frame.f_code.co_name)
+    if feuille in _FEUILLES_INACTIVES:
+        return None
+    cadres = []
+    dans_backend = False
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(BACKEND_DIR) and not code.co_filename.endswith("instrumentation.py"):
+            dans_backend = True
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        cadres.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    if not dans_backend:
+        return None
+    return ";".join(reversed(cadres))
+
+
+profileur = ProfileurEchantillonnage(PROFILER_SEUIL_MS) if PROFILER_SEUIL_MS > 0 else None
+
+
+def _endpoint_profile(endpoint):
+    """Endpoint qui rattache au profileur le thread qui l'exécute (pool de threads ou boucle asyncio)."""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def appel(*args, **kwargs):
+            with profileur.thread_requete():
+                return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def appel(*args, **kwargs):
+            with profileur.thread_requete():
+                return endpoint(*args, **kwargs)
+    return appel
+
+
+def _classe_route_profilee():
+    from fastapi.routing import APIRoute
+
+    class RouteProfilee(APIRoute):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # Lu à chaque requête par FastAPI (la signature est déjà analysée)
+            self.dependant.call = _endpoint_profile(self.dependant.call)
+
+    return RouteProfilee
+
+
+def installer_middleware(app):
+    """
+    Ajoute le middleware de latence (et de profilage optionnel) à l'application FastAPI.
+    À appeler avant la déclaration des routes : avec le profileur, elles sont créées
+    avec RouteProfilee pour que chaque requête connaisse le thread de son endpoint.
+    """
+    if profileur:
+        app.router.route_class = _classe_route_profilee()
+
+    @app.middleware("http")
+    async def mesurer_requete(request, call_next):
+        jeton = profileur.debut() if profileur else None
+        debut = time.perf_counter()
+        statut = 500
+        try:
+            reponse = await call_next(request)
+            statut = reponse.status_code
+            return reponse
+        finally:
+            duree = time.perf_counter() - debut
+            # Gabarit de route (/api/journal-vente/{vente_id}) : cardinalité bornée
+            route = request.scope.get("route")
+            gabarit = getattr(route, "path", None) or "non_routee"
+            registre.observer("http_request_duration_seconds", duree,
+                              method=request.method, route=gabarit, status=str(statut))
+            if jeton is not None:
+                chemin = profileur.fin(jeton, gabarit, duree * 1000)
+                if chemin:
+                    logger.warning("Requête lente %s %s (%.0f ms) -> %s", request.method, gabarit, duree * 1000, chemin)
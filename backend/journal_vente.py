@@ -5,8 +5,12 @@ pour analyser les tendances saisonnières
 """
 import sqlite3
 import os
+import csv
+import json
+import math
 from datetime import datetime
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, TextIO
 import sys
 
 # Chemin de la base de données
@@ -119,21 +123,31 @@ def init_journal_db():
         )
     """)
     
-    # Index pour optimiser les recherches par date
+    # Index couvrants alignés sur les filtres de get_ventes et son tri (date_vente DESC, id DESC) :
+    # (date_vente, id) puis (boutique_id, date_vente, id) donnent l'ordre du tri, les colonnes
+    # suivantes permettent d'évaluer les filtres boutique / produit sur l'index seul, sans lire
+    # la ligne de la table tant qu'elle n'est pas retenue.
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_date_vente ON ventes(date_vente)
+        CREATE INDEX IF NOT EXISTS idx_ventes_date_couvrant ON ventes(date_vente, id, boutique_id, produit_nom)
     """)
-    
-    # Index pour les recherches par produit
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_produit ON ventes(produit_nom)
+        CREATE INDEX IF NOT EXISTS idx_ventes_boutique_couvrant ON ventes(boutique_id, date_vente, id, produit_nom)
     """)
+    # Remplacés par les index couvrants
+    for index in ("idx_date_vente", "idx_boutique", "idx_ventes_date_id", "idx_ventes_boutique_date_id"):
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
     
-    # Index pour les recherches par boutique
+    # Index pour les recherches par produit (nom exact)
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_boutique ON ventes(boutique_id)
+        CREATE INDEX IF NOT EXISTS idx_produit ON ventes(produit_nom)
     """)
     
+    # Recherche plein texte sur le nom du produit (index trigramme)
+    init_recherche_produits(cursor)
+    
+    # Agrégats journaliers (maintenus par triggers, voir init_agregats)
+    init_agregats(cursor)
+    
     # Créer une boutique par défaut si aucune n'existe
     cursor.execute("SELECT COUNT(*) FROM boutiques")
     if cursor.fetchone()[0] == 0:
@@ -150,6 +164,265 @@ def init_journal_db():
     print(f"✅ Base de données journal des ventes initialisée: {DB_PATH}")
 
 
+# =========================
+# RECHERCHE PRODUITS (FTS5 TRIGRAMME)
+# =========================
+
+# Disponible si SQLite >= 3.34 (tokenizer trigram) ; sinon pas de test d'existence préalable
+FTS_PRODUITS_DISPONIBLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+_TOKENIZER_PRODUITS = "trigram"
+
+
+def init_recherche_produits(cursor: sqlite3.Cursor):
+    """
+    Crée l'index FTS5 trigramme sur ventes.produit_nom (table à contenu externe,
+    synchronisée par triggers). Il sert à savoir d'un coup si un terme apparaît
+    dans l'historique, sans parcourir la table.
+    """
+    global FTS_PRODUITS_DISPONIBLE
+    if not FTS_PRODUITS_DISPONIBLE:
+        return
+    
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ventes_fts'")
+    nouvel_index = cursor.fetchone() is None
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS ventes_fts USING fts5(
+                produit_nom, content='ventes', content_rowid='id', tokenize='{_TOKENIZER_PRODUITS}'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        FTS_PRODUITS_DISPONIBLE = False
+        print(f"⚠️ Index FTS5 indisponible, recherche produit sans test d'existence: {e}")
+        return
+    
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ventes_fts_insert AFTER INSERT ON ventes BEGIN
+            INSERT INTO ventes_fts(rowid, produit_nom) VALUES (NEW.id, NEW.produit_nom);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ventes_fts_delete AFTER DELETE ON ventes BEGIN
+            INSERT INTO ventes_fts(ventes_fts, rowid, produit_nom) VALUES ('delete', OLD.id, OLD.produit_nom);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ventes_fts_update AFTER UPDATE OF produit_nom ON ventes BEGIN
+            INSERT INTO ventes_fts(ventes_fts, rowid, produit_nom) VALUES ('delete', OLD.id, OLD.produit_nom);
+            INSERT INTO ventes_fts(rowid, produit_nom) VALUES (NEW.id, NEW.produit_nom);
+        END
+    """)
+    
+    if nouvel_index:
+        # Indexer l'historique existant
+        cursor.execute("INSERT INTO ventes_fts(ventes_fts) VALUES ('rebuild')")
+
+
+def _filtre_produit(conn: sqlite3.Connection, produit_nom: str) -> Tuple[str, List]:
+    """
+    Condition SQL de recherche produit (sous-chaîne, insensible à la casse, accents compris).
+    - LIKE sur produit_nom, évalué sur l'index couvrant pendant le parcours dans l'ordre du tri :
+      le parcours s'arrête dès que la page est remplie. LIKE ne replie que la casse ASCII,
+      les lettres accentuées y sont donc des jokers "_", vérifiés ensuite par GLOB
+      (seulement pour les lignes retenues par LIKE).
+    - Terme absent de l'historique : l'index trigramme le dit en une requête (LIMIT 1),
+      au lieu d'un parcours complet.
+    """
+    terme = produit_nom.strip()
+    motif_like, motif_glob, accents = [], [], False
+    for caractere in terme:
+        bas, haut = caractere.lower(), caractere.upper()
+        casse = bas != haut and len(bas) == len(haut) == 1
+        if casse and not caractere.isascii():
+            motif_like.append("_")
+            accents = True
+        else:
+            motif_like.append("\\" + caractere if caractere in "%_\\" else caractere)
+        if casse:
+            motif_glob.append(f"[{bas}{haut}]")
+        else:
+            motif_glob.append(f"[{caractere}]" if caractere in "*?[" else caractere)
+    
+    if FTS_PRODUITS_DISPONIBLE and len(terme) >= 3:
+        phrase = '"' + terme.replace('"', '""') + '"'
+        if conn.execute("SELECT 1 FROM ventes_fts WHERE ventes_fts MATCH ? LIMIT 1", (phrase,)).fetchone() is None:
+            return " AND 0", []
+    
+    condition = " AND v.produit_nom LIKE ? ESCAPE '\\'"
+    params = [f"%{''.join(motif_like)}%"]
+    if accents:
+        condition += " AND v.produit_nom GLOB ?"
+        params.append(f"*{''.join(motif_glob)}*")
+    return condition, params
+
+
+def encoder_curseur(vente: Dict) -> str:
+    """Curseur de pagination (keyset) pointant après cette vente."""
+    return f"{vente['date_vente']}_{vente['id']}"
+
+
+def _decoder_curseur(curseur: str) -> Tuple[str, int]:
+    try:
+        date_vente, vente_id = curseur.rsplit("_", 1)
+        return date_vente, int(vente_id)
+    except ValueError:
+        raise ValueError(f"Curseur de pagination invalide: {curseur}")
+
+
+# =========================
+# AGRÉGATS JOURNALIERS DES VENTES
+# =========================
+
+# Contribution d'une vente (NEW ou OLD) aux agrégats : (signe, alias)
+_AGREGATS_SQL = """
+    INSERT INTO ventes_jour_boutique (boutique_id, jour, nb_ventes, ca, quantite, somme_prix)
+    VALUES ({v}.boutique_id, {v}.date_vente, {s}1, {s}{v}.prix * COALESCE({v}.quantite, 0),
+            {s}COALESCE({v}.quantite, 0), {s}{v}.prix)
+    ON CONFLICT (boutique_id, jour) DO UPDATE SET
+        nb_ventes = nb_ventes + excluded.nb_ventes,
+        ca = ca + excluded.ca,
+        quantite = quantite + excluded.quantite,
+        somme_prix = somme_prix + excluded.somme_prix;
+    INSERT INTO ventes_jour_produit (boutique_id, jour, produit_nom, nb_ventes, ca, quantite)
+    VALUES ({v}.boutique_id, {v}.date_vente, {v}.produit_nom, {s}1,
+            {s}{v}.prix * COALESCE({v}.quantite, 0), {s}COALESCE({v}.quantite, 0))
+    ON CONFLICT (boutique_id, jour, produit_nom) DO UPDATE SET
+        nb_ventes = nb_ventes + excluded.nb_ventes,
+        ca = ca + excluded.ca,
+        quantite = quantite + excluded.quantite;
+    INSERT INTO ventes_jour_localisation (boutique_id, jour, localisation, nb_ventes, ca)
+    SELECT {v}.boutique_id, {v}.date_vente, {v}.localisation, {s}1, {s}{v}.prix * COALESCE({v}.quantite, 0)
+    WHERE {v}.localisation IS NOT NULL AND {v}.localisation != ''
+    ON CONFLICT (boutique_id, jour, localisation) DO UPDATE SET
+        nb_ventes = nb_ventes + excluded.nb_ventes,
+        ca = ca + excluded.ca;
+"""
+
+# Les lignes qui ne comptent plus aucune vente sont retirées
+_PURGE_AGREGATS_SQL = """
+    DELETE FROM ventes_jour_boutique WHERE boutique_id = OLD.boutique_id AND jour = OLD.date_vente AND nb_ventes <= 0;
+    DELETE FROM ventes_jour_produit WHERE boutique_id = OLD.boutique_id AND jour = OLD.date_vente
+        AND produit_nom = OLD.produit_nom AND nb_ventes <= 0;
+    DELETE FROM ventes_jour_localisation WHERE boutique_id = OLD.boutique_id AND jour = OLD.date_vente
+        AND localisation = OLD.localisation AND nb_ventes <= 0;
+"""
+
+
+def init_agregats(cursor: sqlite3.Cursor):
+    """
+    Crée les tables d'agrégats journaliers (par boutique, produit et localisation)
+    et les triggers qui les maintiennent à chaque ajout / modification / suppression.
+    Les agrégats sont reconstruits si les tables viennent d'être créées.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ventes_jour_boutique'")
+    nouvelles_tables = cursor.fetchone() is None
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ventes_jour_boutique (
+            boutique_id INTEGER NOT NULL,
+            jour TEXT NOT NULL,
+            nb_ventes INTEGER NOT NULL,
+            ca REAL NOT NULL,
+            quantite INTEGER NOT NULL,
+            somme_prix REAL NOT NULL,  -- Pour le prix moyen
+            PRIMARY KEY (boutique_id, jour)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ventes_jour_produit (
+            boutique_id INTEGER NOT NULL,
+            jour TEXT NOT NULL,
+            produit_nom TEXT NOT NULL,
+            nb_ventes INTEGER NOT NULL,
+            ca REAL NOT NULL,
+            quantite INTEGER NOT NULL,
+            PRIMARY KEY (boutique_id, jour, produit_nom)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ventes_jour_localisation (
+            boutique_id INTEGER NOT NULL,
+            jour TEXT NOT NULL,
+            localisation TEXT NOT NULL,
+            nb_ventes INTEGER NOT NULL,
+            ca REAL NOT NULL,
+            PRIMARY KEY (boutique_id, jour, localisation)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vjb_jour ON ventes_jour_boutique(jour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vjp_jour ON ventes_jour_produit(jour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vjl_jour ON ventes_jour_localisation(jour)")
+    
+    ajout = _AGREGATS_SQL.format(v="NEW", s="")
+    retrait = _AGREGATS_SQL.format(v="OLD", s="-") + _PURGE_AGREGATS_SQL
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_ventes_agregats_insert AFTER INSERT ON ventes BEGIN {ajout} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_ventes_agregats_delete AFTER DELETE ON ventes BEGIN {retrait} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_ventes_agregats_update AFTER UPDATE ON ventes BEGIN {retrait} {ajout} END")
+    
+    if nouvelles_tables:
+        _remplir_agregats(cursor)
+
+
+def _remplir_agregats(cursor: sqlite3.Cursor):
+    """Recalcule entièrement les agrégats depuis la table ventes."""
+    cursor.execute("DELETE FROM ventes_jour_boutique")
+    cursor.execute("DELETE FROM ventes_jour_produit")
+    cursor.execute("DELETE FROM ventes_jour_localisation")
+    cursor.execute("""
+        INSERT INTO ventes_jour_boutique (boutique_id, jour, nb_ventes, ca, quantite, somme_prix)
+        SELECT boutique_id, date_vente, COUNT(*), TOTAL(prix * quantite), TOTAL(quantite), TOTAL(prix)
+        FROM ventes GROUP BY boutique_id, date_vente
+    """)
+    cursor.execute("""
+        INSERT INTO ventes_jour_produit (boutique_id, jour, produit_nom, nb_ventes, ca, quantite)
+        SELECT boutique_id, date_vente, produit_nom, COUNT(*), TOTAL(prix * quantite), TOTAL(quantite)
+        FROM ventes GROUP BY boutique_id, date_vente, produit_nom
+    """)
+    cursor.execute("""
+        INSERT INTO ventes_jour_localisation (boutique_id, jour, localisation, nb_ventes, ca)
+        SELECT boutique_id, date_vente, localisation, COUNT(*), TOTAL(prix * quantite)
+        FROM ventes WHERE localisation IS NOT NULL AND localisation != ''
+        GROUP BY boutique_id, date_vente, localisation
+    """)
+
+
+def reconstruire_agregats() -> Dict:
+    """
+    Reconstruit les agrégats journaliers à partir des ventes
+    (après un import SQL direct ou pour corriger une dérive d'arrondi).
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    try:
+        _remplir_agregats(cursor)
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM ventes_jour_boutique")
+        nb_jours = cursor.fetchone()[0]
+        print(f"✅ Agrégats des ventes reconstruits ({nb_jours} jour(s) x boutique)")
+        return {"success": True, "lignes_boutique_jour": nb_jours}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _filtres_agregats(boutique_id: Optional[int], date_debut: Optional[str], date_fin: Optional[str]):
+    """Clause WHERE commune aux requêtes sur les agrégats."""
+    clause = " WHERE 1=1"
+    params = []
+    if boutique_id:
+        clause += " AND boutique_id = ?"
+        params.append(boutique_id)
+    if date_debut:
+        clause += " AND jour >= ?"
+        params.append(date_debut)
+    if date_fin:
+        clause += " AND jour <= ?"
+        params.append(date_fin)
+    return clause, params
+
+
 def ajouter_vente(
     boutique_id: int,
     date_vente: str,
@@ -187,15 +460,38 @@ def ajouter_vente(
     return vente_id
 
 
+def _vente_depuis_row(row: sqlite3.Row) -> Dict:
+    """Ligne ventes (+ boutique_nom) en dictionnaire API."""
+    return {
+        "id": row["id"],
+        "boutique_id": row["boutique_id"],
+        "boutique_nom": row["boutique_nom"] or "",
+        "date_vente": row["date_vente"],
+        "produit_nom": row["produit_nom"],
+        "prix": row["prix"],
+        "quantite": row["quantite"],
+        "localisation": row["localisation"],
+        "client_info": row["client_info"],
+        "notes": row["notes"],
+        "created_at": row["created_at"],
+        "total": row["prix"] * row["quantite"]
+    }
+
+
 def get_ventes(
     boutique_id: Optional[int] = None,
     date_debut: Optional[str] = None,
     date_fin: Optional[str] = None,
     produit_nom: Optional[str] = None,
     localisation: Optional[str] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    curseur: Optional[str] = None
 ) -> List[Dict]:
-    """Récupère les ventes avec filtres optionnels"""
+    """
+    Récupère les ventes avec filtres optionnels, les plus récentes d'abord.
+    Pagination par curseur (keyset) : passer encoder_curseur(dernière vente)
+    pour obtenir la page suivante sans parcourir les pages précédentes.
+    """
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
@@ -221,14 +517,19 @@ def get_ventes(
         params.append(date_fin)
     
     if produit_nom:
-        query += " AND v.produit_nom LIKE ?"
-        params.append(f"%{produit_nom}%")
+        condition, valeurs = _filtre_produit(conn, produit_nom)
+        query += condition
+        params.extend(valeurs)
     
     if localisation:
         query += " AND v.localisation LIKE ?"
         params.append(f"%{localisation}%")
     
-    query += " ORDER BY v.date_vente DESC"
+    if curseur:
+        query += " AND (v.date_vente, v.id) < (?, ?)"
+        params.extend(_decoder_curseur(curseur))
+    
+    query += " ORDER BY v.date_vente DESC, v.id DESC"
     
     if limit:
         query += " LIMIT ?"
@@ -238,24 +539,7 @@ def get_ventes(
     rows = cursor.fetchall()
     conn.close()
     
-    ventes = []
-    for row in rows:
-        ventes.append({
-            "id": row["id"],
-            "boutique_id": row["boutique_id"],
-            "boutique_nom": row.get("boutique_nom", ""),
-            "date_vente": row["date_vente"],
-            "produit_nom": row["produit_nom"],
-            "prix": row["prix"],
-            "quantite": row["quantite"],
-            "localisation": row["localisation"],
-            "client_info": row["client_info"],
-            "notes": row["notes"],
-            "created_at": row["created_at"],
-            "total": row["prix"] * row["quantite"]
-        })
-    
-    return ventes
+    return [_vente_depuis_row(row) for row in rows]
 
 
 def get_vente_par_id(vente_id: int) -> Optional[Dict]:
@@ -274,20 +558,7 @@ def get_vente_par_id(vente_id: int) -> Optional[Dict]:
     conn.close()
     
     if row:
-        return {
-            "id": row["id"],
-            "boutique_id": row["boutique_id"],
-            "boutique_nom": row.get("boutique_nom", ""),
-            "date_vente": row["date_vente"],
-            "produit_nom": row["produit_nom"],
-            "prix": row["prix"],
-            "quantite": row["quantite"],
-            "localisation": row["localisation"],
-            "client_info": row["client_info"],
-            "notes": row["notes"],
-            "created_at": row["created_at"],
-            "total": row["prix"] * row["quantite"]
-        }
+        return _vente_depuis_row(row)
     return None
 
 
@@ -379,77 +650,214 @@ def supprimer_vente(vente_id: int) -> bool:
     return affected > 0
 
 
+# =========================
+# IMPORT EN MASSE DES VENTES
+# =========================
+
+TAILLE_LOT_IMPORT = 5000  # Lignes par transaction
+MAX_ERREURS_RAPPORT = 1000  # Erreurs détaillées renvoyées dans le rapport
+
+_COLONNES_VENTE = ("boutique_id", "date_vente", "produit_nom", "prix", "quantite",
+                   "localisation", "client_info", "notes")
+
+
+def lire_lignes_csv(fichier: TextIO) -> Iterator[Tuple[int, Dict]]:
+    """Lit un CSV (avec en-tête) en flux. Yields: (numéro de ligne, valeurs)."""
+    reader = csv.DictReader(fichier)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def lire_lignes_jsonl(fichier: TextIO) -> Iterator[Tuple[int, Dict]]:
+    """Lit un fichier JSON Lines en flux. Yields: (numéro de ligne, valeurs)."""
+    for numero, ligne in enumerate(fichier, start=1):
+        ligne = ligne.strip()
+        if not ligne:
+            continue
+        try:
+            valeurs = json.loads(ligne)
+        except ValueError as e:
+            valeurs = {"_erreur": f"JSON invalide: {e}"}
+        yield numero, valeurs if isinstance(valeurs, dict) else {"_erreur": "Objet JSON attendu"}
+
+
+def _texte(valeur) -> str:
+    """Valeur d'import en texte (les lignes JSONL peuvent contenir des nombres)."""
+    return "" if valeur is None else str(valeur).strip()
+
+
+def _texte_optionnel(valeur) -> Optional[str]:
+    """Champ texte facultatif : None si vide, objets JSON resérialisés."""
+    if valeur in (None, ""):
+        return None
+    if isinstance(valeur, (dict, list)):
+        return json.dumps(valeur, ensure_ascii=False)
+    return str(valeur)
+
+
+def _valider_vente(valeurs: Dict, boutiques_par_nom: Dict[str, int], boutiques_ids: set) -> Tuple:
+    """
+    Valide et normalise une ligne d'import.
+    La boutique est donnée par boutique_id ou par son nom (boutique / boutique_nom).
+
+    Raises:
+        ValueError: si la ligne est invalide
+    """
+    if "_erreur" in valeurs:
+        raise ValueError(valeurs["_erreur"])
+
+    boutique_id = valeurs.get("boutique_id")
+    if boutique_id not in (None, ""):
+        try:
+            boutique_id = int(boutique_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"boutique_id invalide: {boutique_id}")
+        if boutique_id not in boutiques_ids:
+            raise ValueError(f"Boutique avec l'ID {boutique_id} n'existe pas")
+    else:
+        nom = _texte(valeurs.get("boutique") or valeurs.get("boutique_nom"))
+        if not nom:
+            raise ValueError("Boutique manquante (boutique_id ou boutique)")
+        boutique_id = boutiques_par_nom.get(nom.lower())
+        if boutique_id is None:
+            raise ValueError(f"Boutique inconnue: {nom}")
+
+    date_vente = _texte(valeurs.get("date_vente"))
+    try:
+        datetime.strptime(date_vente, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Format de date invalide: {date_vente}. Utilisez YYYY-MM-DD")
+
+    produit_nom = _texte(valeurs.get("produit_nom"))
+    if not produit_nom:
+        raise ValueError("produit_nom manquant")
+
+    try:
+        prix = float(valeurs.get("prix"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Prix invalide: {valeurs.get('prix')}")
+    if not math.isfinite(prix):
+        raise ValueError(f"Prix invalide: {valeurs.get('prix')}")
+
+    quantite = valeurs.get("quantite")
+    try:
+        quantite = 1 if quantite in (None, "") else int(quantite)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Quantité invalide: {quantite}")
+
+    return (boutique_id, date_vente, produit_nom, prix, quantite,
+            _texte_optionnel(valeurs.get("localisation")), _texte_optionnel(valeurs.get("client_info")),
+            _texte_optionnel(valeurs.get("notes")))
+
+
+def importer_ventes(
+    lignes: Iterable[Tuple[int, Dict]],
+    taille_lot: int = TAILLE_LOT_IMPORT,
+    dry_run: bool = False
+) -> Dict:
+    """
+    Importe des ventes en masse (historique de caisse, exports POS...).
+    Les lignes sont validées par lots puis insérées avec executemany,
+    une transaction par lot ; les lignes invalides sont ignorées et rapportées.
+
+    Args:
+        lignes: Couples (numéro de ligne, valeurs) — voir lire_lignes_csv / lire_lignes_jsonl
+        taille_lot: Nombre de lignes par transaction
+        dry_run: Valider sans rien insérer
+
+    Returns:
+        Rapport: lignes lues, importées, rejetées et détail des erreurs
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # Boutiques chargées une fois en mémoire (résolution par nom sans requête)
+    cursor.execute("SELECT id, nom FROM boutiques")
+    boutiques = cursor.fetchall()
+    boutiques_par_nom = {nom.lower(): bid for bid, nom in boutiques}
+    boutiques_ids = {bid for bid, _ in boutiques}
+
+    lues = importees = 0
+    erreurs = []
+    nb_erreurs = 0
+    iterateur = iter(lignes)
+
+    try:
+        while True:
+            lot = list(islice(iterateur, taille_lot))
+            if not lot:
+                break
+            lues += len(lot)
+
+            valides = []
+            for numero, valeurs in lot:
+                try:
+                    valides.append(_valider_vente(valeurs, boutiques_par_nom, boutiques_ids))
+                except Exception as e:  # Une ligne malformée ne doit pas interrompre l'import
+                    nb_erreurs += 1
+                    if len(erreurs) < MAX_ERREURS_RAPPORT:
+                        erreurs.append({"ligne": numero, "erreur": str(e)})
+
+            if valides and not dry_run:
+                cursor.executemany(f"""
+                    INSERT INTO ventes ({", ".join(_COLONNES_VENTE)})
+                    VALUES ({", ".join("?" * len(_COLONNES_VENTE))})
+                """, valides)
+                conn.commit()
+            importees += len(valides)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    action = "validée(s)" if dry_run else "importée(s)"
+    print(f"✅ Import ventes: {importees}/{lues} ligne(s) {action}, {nb_erreurs} rejetée(s)")
+    return {
+        "lues": lues,
+        "importees": importees if not dry_run else 0,
+        "valides": importees,
+        "rejetees": nb_erreurs,
+        "erreurs": erreurs,
+        "erreurs_tronquees": nb_erreurs > len(erreurs),
+        "dry_run": dry_run
+    }
+
+
 def get_statistiques(
     boutique_id: Optional[int] = None,
     date_debut: Optional[str] = None,
     date_fin: Optional[str] = None
 ) -> Dict:
-    """Récupère des statistiques sur les ventes"""
+    """
+    Récupère des statistiques sur les ventes.
+    Lit les agrégats journaliers : le coût dépend du nombre de jours, pas du nombre de ventes.
+    """
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
-    query = "SELECT COUNT(*), SUM(prix * quantite), AVG(prix), SUM(quantite) FROM ventes WHERE 1=1"
-    params = []
-    
-    if boutique_id:
-        query += " AND boutique_id = ?"
-        params.append(boutique_id)
+    where, params = _filtres_agregats(boutique_id, date_debut, date_fin)
     
-    if date_debut:
-        query += " AND date_vente >= ?"
-        params.append(date_debut)
-    
-    if date_fin:
-        query += " AND date_vente <= ?"
-        params.append(date_fin)
-    
-    cursor.execute(query, params)
+    cursor.execute(f"""
+        SELECT SUM(nb_ventes), SUM(ca), SUM(somme_prix) / SUM(nb_ventes), SUM(quantite)
+        FROM ventes_jour_boutique{where}
+    """, params)
     row = cursor.fetchone()
     
     # Statistiques par produit
-    query_produits = """
-        SELECT produit_nom, SUM(prix * quantite) as total, SUM(quantite) as qte
-        FROM ventes WHERE 1=1
-    """
-    params_produits = []
-    
-    if boutique_id:
-        query_produits += " AND boutique_id = ?"
-        params_produits.append(boutique_id)
-    
-    if date_debut:
-        query_produits += " AND date_vente >= ?"
-        params_produits.append(date_debut)
-    
-    if date_fin:
-        query_produits += " AND date_vente <= ?"
-        params_produits.append(date_fin)
-    
-    query_produits += " GROUP BY produit_nom ORDER BY total DESC LIMIT 10"
-    cursor.execute(query_produits, params_produits)
+    cursor.execute(f"""
+        SELECT produit_nom, SUM(ca) as total, SUM(quantite) as qte
+        FROM ventes_jour_produit{where}
+        GROUP BY produit_nom ORDER BY total DESC LIMIT 10
+    """, params)
     top_produits = cursor.fetchall()
     
     # Statistiques par localisation
-    query_localisation = """
-        SELECT localisation, SUM(prix * quantite) as total, COUNT(*) as nb_ventes
-        FROM ventes WHERE localisation IS NOT NULL AND localisation != ''
-    """
-    params_loc = []
-    
-    if boutique_id:
-        query_localisation += " AND boutique_id = ?"
-        params_loc.append(boutique_id)
-    
-    if date_debut:
-        query_localisation += " AND date_vente >= ?"
-        params_loc.append(date_debut)
-    
-    if date_fin:
-        query_localisation += " AND date_vente <= ?"
-        params_loc.append(date_fin)
-    
-    query_localisation += " GROUP BY localisation ORDER BY total DESC LIMIT 10"
-    cursor.execute(query_localisation, params_loc)
+    cursor.execute(f"""
+        SELECT localisation, SUM(ca) as total, SUM(nb_ventes) as nb_ventes
+        FROM ventes_jour_localisation{where}
+        GROUP BY localisation ORDER BY total DESC LIMIT 10
+    """, params)
     top_localisations = cursor.fetchall()
     
     conn.close()
@@ -470,6 +878,35 @@ def get_statistiques(
     }
 
 
+def get_statistiques_mensuelles(annee: int, boutique_id: Optional[int] = None) -> List[Dict]:
+    """
+    Totaux mois par mois d'une année (comparaisons d'une année sur l'autre)
+    en une seule requête sur les agrégats.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    where, params = _filtres_agregats(boutique_id, f"{annee}-01-01", f"{annee}-12-31")
+    cursor.execute(f"""
+        SELECT CAST(substr(jour, 6, 2) AS INTEGER) as mois,
+               SUM(nb_ventes), SUM(ca), SUM(quantite)
+        FROM ventes_jour_boutique{where}
+        GROUP BY mois
+    """, params)
+    par_mois = {r[0]: r for r in cursor.fetchall()}
+    conn.close()
+    
+    return [
+        {
+            "mois": mois,
+            "nb_ventes": par_mois[mois][1] if mois in par_mois else 0,
+            "ca": par_mois[mois][2] if mois in par_mois else 0.0,
+            "quantite": par_mois[mois][3] if mois in par_mois else 0
+        }
+        for mois in range(1, 13)
+    ]
+
+
 def get_ventes_par_periode(annee: int, mois: Optional[int] = None, boutique_id: Optional[int] = None) -> List[Dict]:
     """Récupère les ventes pour une période spécifique (utile pour comparer d'une année sur l'autre)"""
     if mois:
@@ -624,3 +1061,11 @@ def supprimer_boutique(boutique_id: int) -> bool:
     
     return affected > 0
 
+
+if __name__ == "__main__":
+    # python journal_vente.py rebuild : recalcule les agrégats journaliers
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        init_journal_db()
+        reconstruire_agregats()
+    else:
+        print("Usage: python journal_vente.py rebuild")
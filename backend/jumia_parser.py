@@ -0,0 +1,275 @@
+"""
+Analyse des pages de listes Jumia (recherche, catégories, meilleures ventes)
+Parseurs interchangeables pour extraire les produits des <article class="prd"> :
+- "lxml" : arbre libxml2 en C, parcours direct des articles (défaut si lxml est installé)
+- "bs4" : BeautifulSoup limité aux articles par un SoupStrainer (sur lxml si disponible)
+Chaque article est parcouru une seule fois pour relever tous ses champs.
+Un autre parseur peut être branché avec enregistrer_parseur().
+"""
+import logging
+import os
+import re
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from bs4.dammit import EncodingDetector
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (nom, prix, remise, attributs de a.core, attributs de img.img) ; None si l'élément est absent
+Champs = Tuple[Optional[str], Optional[str], Optional[str], Optional[Mapping], Optional[Mapping]]
+
+NOM_INDISPONIBLE = "Nom non disponible"
+
+
+def construire_produit(champs: Champs) -> Optional[Dict]:
+    """
+    Construit le produit à partir des champs relevés dans un article.
+
+    Args:
+        champs: (nom, prix, remise, attributs du lien a.core, attributs de l'image)
+
+    Returns:
+        Dictionnaire avec les données du produit ou None
+    """
+    try:
+        nom, prix_text, remise, core, img = champs
+        if nom is None:
+            nom = NOM_INDISPONIBLE
+        # Si pas de nom dans div.name, essayer data-ga4-item_name
+        if nom == NOM_INDISPONIBLE and core is not None:
+            nom = core.get('data-ga4-item_name', nom)
+
+        if prix_text is None:
+            prix_text = "0"
+        prix = nettoyer_prix(prix_text)
+
+        # Prix depuis data-ga4-price si disponible (en USD, à convertir)
+        prix_usd = None
+        if core is not None and core.get('data-ga4-price'):
+            try:
+                prix_usd = float(core.get('data-ga4-price'))
+            except:
+                pass
+
+        lien = ""
+        if core is not None and core.get('href'):
+            lien = core.get('href')
+            if not lien.startswith('http'):
+                lien = f"https://www.jumia.sn{lien}"
+
+        # Image (lazy loading avec data-src)
+        image = ""
+        if img is not None:
+            image = img.get('data-src') or img.get('src') or ""
+            # Nettoyer l'image si elle contient data:image
+            if image.startswith('data:image'):
+                image = img.get('data-src') or ""
+
+        return {
+            "sku": (core.get('data-ga4-item_id') or core.get('data-gtm-id')) if core is not None else None,
+            "nom": nom,
+            "prix": prix,
+            "prix_texte": prix_text,
+            "prix_usd": prix_usd,
+            "lien": lien,
+            "image": image,
+            "remise": remise,
+            "marque": core.get('data-ga4-item_brand') if core is not None else None,
+            "categorie": core.get('data-ga4-item_category') if core is not None else None,
+            "date_scraping": datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.warning("Erreur extraction produit: %s", e)
+        return None
+
+
+def nettoyer_prix(prix_text: str) -> float:
+    """
+    Nettoie et convertit le texte de prix en nombre.
+
+    Args:
+        prix_text: Texte contenant le prix (ex: "15 000 FCFA")
+
+    Returns:
+        Prix en nombre (float)
+    """
+    try:
+        # Enlever "FCFA", espaces, et caractères non numériques sauf point/virgule
+        prix_clean = prix_text.replace('FCFA', '').replace(' ', '').replace(',', '')
+        # Garder seulement les chiffres et le point
+        prix_clean = ''.join(c for c in prix_clean if c.isdigit() or c == '.')
+        return float(prix_clean) if prix_clean else 0.0
+    except:
+        return 0.0
+
+
+# =========================
+# BEAUTIFULSOUP
+# =========================
+
+def champs_bs4(element: Tag) -> Champs:
+    """Relève en un seul parcours le premier a.core, div.name, div.prc, div.bdg et img.img d'un élément."""
+    nom = prix = remise = core = img = None
+    for el in element.descendants:
+        if not isinstance(el, Tag):
+            continue
+        classes = el.get('class')
+        if not classes:
+            continue
+        if el.name == 'div':
+            if nom is None and 'name' in classes:
+                nom = el.get_text(strip=True)
+            if prix is None and 'prc' in classes:
+                prix = el.get_text(strip=True)
+            if remise is None and 'bdg' in classes:
+                remise = el.get_text(strip=True)
+        elif el.name == 'a':
+            if core is None and 'core' in classes:
+                core = el.attrs
+        elif el.name == 'img':
+            if img is None and 'img' in classes:
+                img = el.attrs
+    return nom, prix, remise, core, img
+
+
+# Pendant l'analyse, le SoupStrainer voit l'attribut class brut ("prd _fb col c-prd"), pas la liste
+_STRAINER_ARTICLES = SoupStrainer('article', class_=re.compile(r'(?:^|\s)prd(?:\s|$)'))
+
+
+def _articles_bs4(contenu: bytes, limit: Optional[int], encodage: Optional[str]) -> Iterator[Champs]:
+    # Seuls les <article class="prd"> sont construits, le reste de la page est ignoré
+    soup = BeautifulSoup(contenu, 'lxml' if LXML_AVAILABLE else 'html.parser',
+                         parse_only=_STRAINER_ARTICLES, from_encoding=encodage)
+    for article in soup.find_all('article', class_='prd', limit=limit):
+        yield champs_bs4(article)
+
+
+# =========================
+# LXML
+# =========================
+
+def _texte(element) -> str:
+    # Équivalent de BeautifulSoup get_text(strip=True) (les commentaires sont ignorés)
+    return ''.join(texte.strip() for texte in element.itertext())
+
+
+def champs_lxml(element) -> Champs:
+    """Équivalent de champs_bs4 pour un élément lxml."""
+    nom = prix = remise = core = img = None
+    for el in element.iterdescendants('div', 'a', 'img'):
+        classes = el.get('class')
+        if not classes:
+            continue
+        classes = classes.split()
+        if el.tag == 'div':
+            if nom is None and 'name' in classes:
+                nom = _texte(el)
+            if prix is None and 'prc' in classes:
+                prix = _texte(el)
+            if remise is None and 'bdg' in classes:
+                remise = _texte(el)
+        elif el.tag == 'a':
+            if core is None and 'core' in classes:
+                core = el.attrib
+        elif img is None and 'img' in classes:
+            img = el.attrib
+    return nom, prix, remise, core, img
+
+
+def _encodage_probable(contenu: bytes) -> str:
+    # Comme BeautifulSoup : encodage déclaré dans la page, sinon utf-8 s'il est valide, sinon windows-1252
+    # (sans indication, libxml2 lirait la page en latin-1)
+    declare = EncodingDetector.find_declared_encoding(contenu, is_html=True)
+    if declare:
+        return declare
+    try:
+        contenu.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'windows-1252'
+
+
+def _articles_lxml(contenu: bytes, limit: Optional[int], encodage: Optional[str]) -> Iterator[Champs]:
+    parser = lxml.html.HTMLParser(encoding=encodage or _encodage_probable(contenu))
+    document = lxml.html.document_fromstring(contenu, parser=parser)
+    articles = (a for a in document.iter('article') if 'prd' in (a.get('class') or '').split())
+    for article in islice(articles, limit):
+        yield champs_lxml(article)
+
+
+# =========================
+# REGISTRE DES PARSEURS
+# =========================
+
+PARSEURS: Dict[str, Callable[[bytes, Optional[int], Optional[str]], Iterator[Champs]]] = {"bs4": _articles_bs4}
+if LXML_AVAILABLE:
+    PARSEURS["lxml"] = _articles_lxml
+
+PARSEUR_PAR_DEFAUT = os.getenv("JUMIA_PARSEUR") or ("lxml" if LXML_AVAILABLE else "bs4")
+
+
+def enregistrer_parseur(nom: str, fonction: Callable[[bytes, Optional[int], Optional[str]], Iterator[Champs]]):
+    """
+    Branche un parseur supplémentaire.
+
+    Args:
+        nom: Nom du parseur (utilisable dans JUMIA_PARSEUR)
+        fonction: (contenu, limit, encodage) -> itérateur de Champs, un par <article class="prd">
+    """
+    PARSEURS[nom] = fonction
+
+
+def fragment_articles(contenu: bytes) -> bytes:
+    """
+    Fragment produits d'une page (blocs <article class="prd"> bruts, sans analyse HTML) pour en
+    calculer l'empreinte : bannières, scripts et jetons qui changent à chaque affichage sont ignorés.
+    Page entière s'il n'y a aucun <article class="prd">.
+    """
+    articles = []
+    debut = contenu.find(b'<article')
+    while debut >= 0:
+        fin = contenu.find(b'</article>', debut)
+        if fin < 0:
+            break
+        fin += len(b'</article>')
+        balise = contenu[debut:contenu.find(b'>', debut)]
+        if re.search(rb'class=["\'](?:[^"\']*\s)?prd[\s"\']', balise):
+            articles.append(contenu[debut:fin])
+        debut = contenu.find(b'<article', fin)
+    return b"".join(articles) if articles else contenu
+
+
+def encodage_reponse(content_type: Optional[str]) -> Optional[str]:
+    """Charset déclaré dans l'en-tête Content-Type (sinon None : détection par le parseur)."""
+    match = re.search(r'charset=["\']?([\w.:-]+)', content_type or '', re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def iter_produits(contenu: bytes, limit: Optional[int] = None, parseur: Optional[str] = None,
+                  encodage: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Produits des <article class="prd"> d'une page Jumia, dans l'ordre de la page.
+
+    Args:
+        contenu: HTML brut de la page
+        limit: Nombre maximum d'articles analysés
+        parseur: Nom du parseur (défaut: JUMIA_PARSEUR, sinon lxml si installé)
+        encodage: Encodage de la page s'il est connu (en-tête HTTP)
+
+    Returns:
+        Itérateur de dictionnaires produit (les articles illisibles sont ignorés)
+    """
+    analyser = PARSEURS[parseur or PARSEUR_PAR_DEFAUT]
+    for champs in analyser(contenu, limit, encodage):
+        produit = construire_produit(champs)
+        if produit:
+            yield produit
@@ -5,10 +5,17 @@ Récupère les données des meilleurs produits
 import requests
 from bs4 import BeautifulSoup
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
+from urllib.parse import quote_plus
 import time
 
+from catalogue import indexer_sans_erreur
+from http_cache import get_produits
+from jumia_parser import champs_bs4, construire_produit, encodage_reponse, fragment_articles, iter_produits
+from jumia_parser import nettoyer_prix  # Reste importable depuis jumia_scraper
+
 logger = logging.getLogger(__name__)
 
 # Headers pour éviter les blocages
@@ -21,6 +28,13 @@ HEADERS = {
     'Upgrade-Insecure-Requests': '1',
 }
 
+JUMIA_URL = "https://www.jumia.sn"
+PRODUITS_PAR_PAGE = 40  # Articles par page de liste Jumia
+MAX_PAGES = 10  # Pages lues au plus pour une recherche ou une catégorie
+PAGES_PARALLELES = 5  # Pages téléchargées simultanément
+
+_session_locale = threading.local()
+
 
 def scraper_jumia_best_sellers(categorie: Optional[str] = None, limit: int = 20) -> List[Dict]:
     """
@@ -33,38 +47,25 @@ def scraper_jumia_best_sellers(categorie: Optional[str] = None, limit: int = 20)
     Returns:
         Liste de dictionnaires contenant les données des produits
     """
+    if categorie:
+        # Liste paginée de la catégorie
+        return scraper_jumia_categorie(categorie, limit)
+    
     produits = []
     
     try:
-        # URL de base Jumia Sénégal - Meilleures ventes
-        if categorie:
-            # Nettoyer la catégorie (enlever le slash initial si présent)
-            categorie = categorie.strip('/')
-            url = f"https://www.jumia.sn/{categorie}/"
-        else:
-            # Page d'accueil avec les meilleures ventes
-            url = "https://www.jumia.sn/"
+        # Page d'accueil avec les meilleures ventes
+        url = f"{JUMIA_URL}/"
         
         logger.info(f"Scraping Jumia: {url}")
         
-        # Requête avec headers
-        response = requests.get(url, headers=HEADERS, timeout=8)
-        response.raise_for_status()
-        
-        # Parser le HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Sélecteurs pour les produits Jumia
-        produits_elements = soup.find_all('article', class_='prd', limit=limit)
-        
-        for element in produits_elements:
-            try:
-                produit = extraire_donnees_produit(element)
-                if produit:
-                    produits.append(produit)
-            except Exception as e:
-                logger.warning(f"Erreur lors de l'extraction d'un produit: {str(e)}")
-                continue
+        # Requête conditionnelle, analyse des seuls <article class="prd"> si la page a changé
+        produits = get_produits(
+            url, lambda response: indexer_sans_erreur(
+                list(iter_produits(response.content, encodage=encodage_reponse(response.headers.get('content-type')))), "jumia"
+            ),
+            fragment=fragment_articles, headers=HEADERS, timeout=8
+        )[:limit]
         
         logger.info(f"{len(produits)} produits récupérés")
         
@@ -89,100 +90,127 @@ def extraire_donnees_produit(element) -> Optional[Dict]:
         Dictionnaire avec les données du produit ou None
     """
     try:
-        # Lien principal avec toutes les données
-        core_link = element.find('a', class_='core')
-        
-        # Nom du produit
-        nom_elem = element.find('div', class_='name')
-        nom = nom_elem.get_text(strip=True) if nom_elem else "Nom non disponible"
-        
-        # Si pas de nom dans div.name, essayer data-ga4-item_name
-        if nom == "Nom non disponible" and core_link:
-            nom = core_link.get('data-ga4-item_name', nom)
-        
-        # Prix
-        prix_elem = element.find('div', class_='prc')
-        prix_text = prix_elem.get_text(strip=True) if prix_elem else "0"
-        prix = nettoyer_prix(prix_text)
-        
-        # Prix depuis data-ga4-price si disponible (en USD, à convertir)
-        prix_usd = None
-        if core_link and core_link.get('data-ga4-price'):
-            try:
-                prix_usd = float(core_link.get('data-ga4-price'))
-            except:
-                pass
-        
-        # Lien
-        lien = ""
-        if core_link and core_link.get('href'):
-            lien = core_link.get('href')
-            if lien and not lien.startswith('http'):
-                lien = f"https://www.jumia.sn{lien}"
-        
-        # Remise/promotion
-        remise_elem = element.find('div', class_='bdg')
-        remise = remise_elem.get_text(strip=True) if remise_elem else None
-        
-        # Image (lazy loading avec data-src)
-        img_elem = element.find('img', class_='img')
-        image = ""
-        if img_elem:
-            image = img_elem.get('data-src') or img_elem.get('src') or ""
-            # Nettoyer l'image si elle contient data:image
-            if image.startswith('data:image'):
-                image = img_elem.get('data-src') or ""
-        
-        # Marque depuis data-ga4-item_brand
-        marque = None
-        if core_link:
-            marque = core_link.get('data-ga4-item_brand')
-        
-        # Catégorie
-        categorie = None
-        if core_link:
-            categorie = core_link.get('data-ga4-item_category')
-        
-        return {
-            "nom": nom,
-            "prix": prix,
-            "prix_texte": prix_text,
-            "prix_usd": prix_usd,
-            "lien": lien,
-            "image": image,
-            "remise": remise,
-            "marque": marque,
-            "categorie": categorie,
-            "date_scraping": datetime.now().isoformat()
-        }
+        return construire_produit(champs_bs4(element))
     except Exception as e:
         logger.warning(f"Erreur extraction produit: {str(e)}")
         return None
 
 
-def nettoyer_prix(prix_text: str) -> float:
+def elements_produits_secours(soup: BeautifulSoup, limit: int) -> List:
     """
-    Nettoie et convertit le texte de prix en nombre.
+    Sélecteurs de secours quand la page ne contient aucun <article class="prd">.
     
     Args:
-        prix_text: Texte contenant le prix (ex: "15 000 FCFA")
+        soup: Page complète analysée par BeautifulSoup
+        limit: Nombre maximum d'éléments par sélecteur
         
     Returns:
-        Prix en nombre (float)
+        Éléments candidats (à passer à extraire_donnees_produit)
     """
-    try:
-        # Enlever "FCFA", espaces, et caractères non numériques sauf point/virgule
-        prix_clean = prix_text.replace('FCFA', '').replace(' ', '').replace(',', '')
-        # Garder seulement les chiffres et le point
-        prix_clean = ''.join(c for c in prix_clean if c.isdigit() or c == '.')
-        return float(prix_clean) if prix_clean else 0.0
-    except:
-        return 0.0
+    # Essayer les liens de produits
+    produits_elements = soup.find_all('a', {'data-name': True}, limit=limit)
+    # Prendre les parents
+    produits_elements = [elem.find_parent('article') or elem.find_parent('div') for elem in produits_elements if elem.find_parent('article') or elem.find_parent('div')]
+    
+    if not produits_elements:
+        # Essayer de trouver les produits par structure
+        produits_elements = soup.select('article.prd, .prd, [data-name]', limit=limit)
+    
+    # Essayer aussi les sélecteurs spécifiques aux pages de recherche
+    if not produits_elements:
+        produits_elements = soup.select('.sku, .product-item, .item, [data-sku]', limit=limit)
+    
+    return produits_elements
+
+
+def _get_session() -> requests.Session:
+    """Une session HTTP (keep-alive) par thread du pool."""
+    if not hasattr(_session_locale, "session"):
+        _session_locale.session = requests.Session()
+    return _session_locale.session
+
+
+def _produits_page(url: str, timeout: int = 10) -> List[Dict]:
+    """
+    Produits d'une page de liste. Requête conditionnelle ; si la page ou ses articles
+    n'ont pas changé depuis la dernière lecture, les produits viennent du cache (voir http_cache).
+    """
+    return get_produits(url, _extraire_page, fragment=fragment_articles,
+                        session=_get_session(), headers=HEADERS, timeout=timeout)
+
+
+def _extraire_page(response: requests.Response) -> List[Dict]:
+    """
+    Extrait les produits d'une page de liste (sélecteurs de secours sans article.prd)
+    et les rattache au catalogue (une fois par page analysée, pas à chaque lecture du cache).
+    """
+    encodage = encodage_reponse(response.headers.get('content-type'))
+    produits = list(iter_produits(response.content, encodage=encodage))
+    if not produits:
+        soup = BeautifulSoup(response.content, 'html.parser', from_encoding=encodage)
+        elements = elements_produits_secours(soup, PRODUITS_PAR_PAGE * 2)
+        if elements:
+            logger.info(f"Trouvé {len(elements)} éléments produits (sélecteurs de secours)")
+        produits = [produit for produit in map(extraire_donnees_produit, elements) if produit]
+    return indexer_sans_erreur(produits, "jumia")
+
+
+def crawler_pages(url_page: Callable[[int], str], limit: int, max_pages: int = MAX_PAGES) -> List[Dict]:
+    """
+    Lit les pages 1..N d'une liste Jumia jusqu'à `limit` produits distincts (dédoublonnés par SKU).
+    Toutes les pages nécessaires sont téléchargées en parallèle (une vague ≈ un aller-retour) ;
+    une vague supplémentaire n'est lancée que s'il manque encore des produits. La lecture
+    s'arrête à la première page qui n'apporte rien de nouveau (au-delà de la dernière page,
+    Jumia renvoie une page vide ou la dernière page).
+    
+    Args:
+        url_page: Fonction numéro de page -> URL
+        limit: Nombre maximum de produits
+        max_pages: Nombre maximum de pages lues
+        
+    Returns:
+        Liste de produits, dans l'ordre des pages
+        
+    Raises:
+        requests.RequestException: Si la page 1 est inaccessible (une erreur sur une page
+            suivante arrête seulement la lecture)
+    """
+    produits = []
+    vus = set()
+    page = 1
+    while len(produits) < limit and page <= max_pages:
+        manquants = limit - len(produits)
+        pages = list(range(page, min(max_pages, page - 1 + -(-manquants // PRODUITS_PAR_PAGE)) + 1))
+        with ThreadPoolExecutor(max_workers=min(PAGES_PARALLELES, len(pages))) as executor:
+            futures = [executor.submit(_produits_page, url_page(numero)) for numero in pages]
+        
+        for numero, future in zip(pages, futures):
+            try:
+                produits_page = future.result()
+            except Exception as e:
+                if numero == 1:
+                    raise
+                logger.warning(f"Page {numero} ignorée: {e}")
+                return produits[:limit]
+            
+            nouveaux = 0
+            for produit in produits_page:
+                cle = produit.get('sku') or produit.get('lien') or produit.get('nom')
+                if cle in vus:
+                    continue
+                vus.add(cle)
+                produits.append(produit)
+                nouveaux += 1
+            if not nouveaux:
+                return produits[:limit]
+        page = pages[-1] + 1
+    
+    return produits[:limit]
 
 
 def scraper_jumia_categorie(categorie: str, limit: int = 20) -> List[Dict]:
     """
-    Scrape une catégorie spécifique de Jumia.
+    Scrape une catégorie spécifique de Jumia (pages 1..N selon `limit`).
     
     Args:
         categorie: Nom de la catégorie (ex: "telephones-tablettes", "electronique")
@@ -191,7 +219,22 @@ def scraper_jumia_categorie(categorie: str, limit: int = 20) -> List[Dict]:
     Returns:
         Liste de produits
     """
-    return scraper_jumia_best_sellers(categorie=categorie, limit=limit)
+    # Nettoyer la catégorie (enlever le slash initial si présent)
+    categorie = categorie.strip('/')
+    url = f"{JUMIA_URL}/{categorie}/"
+    logger.info(f"Scraping Jumia: {url}")
+    
+    try:
+        produits = crawler_pages(lambda page: url if page == 1 else f"{url}?page={page}", limit)
+    except requests.RequestException as e:
+        logger.error(f"Erreur de requête HTTP: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors du scraping: {str(e)}")
+        raise
+    
+    logger.info(f"{len(produits)} produits récupérés")
+    return produits
 
 
 def scraper_jumia_recherche(terme: str, limit: int = 20, use_fuzzy: bool = True) -> List[Dict]:
@@ -217,7 +260,7 @@ def scraper_jumia_recherche(terme: str, limit: int = 20, use_fuzzy: bool = True)
 
 def scraper_jumia_recherche_simple(terme: str, limit: int = 20) -> List[Dict]:
     """
-    Scrape les résultats de recherche Jumia pour un terme donné (sans fuzzy).
+    Scrape les résultats de recherche Jumia pour un terme donné (sans fuzzy), pages 1..N selon `limit`.
     
     Args:
         terme: Terme de recherche
@@ -226,78 +269,14 @@ def scraper_jumia_recherche_simple(terme: str, limit: int = 20) -> List[Dict]:
     Returns:
         Liste de dictionnaires contenant les données des produits
     """
-    produits = []
+    url = f"{JUMIA_URL}/catalog/?q={quote_plus(terme.strip())}"
+    logger.info(f"Recherche Jumia: {url}")
     
     try:
-        # URL de recherche Jumia - plusieurs formats possibles
-        terme_clean = terme.strip()
-        terme_encoded = terme_clean.replace(' ', '+')
-        
-        # Essayer plusieurs formats d'URL de recherche
-        urls_a_essayer = [
-            f"https://www.jumia.sn/catalog/?q={terme_encoded}",
-            f"https://www.jumia.sn/catalog/?q={terme_clean}",
-            f"https://www.jumia.sn/catalog/?q={terme_encoded}&page=1",
-        ]
-        
-        for url in urls_a_essayer:
-            logger.info(f"Recherche Jumia: {url}")
-            
-            try:
-                # Requête avec headers
-                response = requests.get(url, headers=HEADERS, timeout=10)
-                response.raise_for_status()
-                
-                # Parser le HTML
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Sélecteurs pour les produits Jumia - plusieurs sélecteurs possibles
-                produits_elements = []
-                
-                # Sélecteur principal pour les pages de recherche
-                produits_elements = soup.find_all('article', class_='prd', limit=limit * 2)  # Prendre plus pour filtrer
-                
-                # Si pas de résultats, essayer d'autres sélecteurs
-                if not produits_elements:
-                    # Essayer les liens de produits
-                    produits_elements = soup.find_all('a', {'data-name': True}, limit=limit * 2)
-                    # Prendre les parents
-                    produits_elements = [elem.find_parent('article') or elem.find_parent('div') for elem in produits_elements if elem.find_parent('article') or elem.find_parent('div')]
-                
-                if not produits_elements:
-                    # Essayer de trouver les produits par structure
-                    produits_elements = soup.select('article.prd, .prd, [data-name]', limit=limit * 2)
-                
-                # Essayer aussi les sélecteurs spécifiques aux pages de recherche
-                if not produits_elements:
-                    produits_elements = soup.select('.sku, .product-item, .item, [data-sku]', limit=limit * 2)
-                
-                if produits_elements:
-                    logger.info(f"Trouvé {len(produits_elements)} éléments produits")
-                    
-                    for element in produits_elements:
-                        try:
-                            produit = extraire_donnees_produit(element)
-                            if produit:
-                                produits.append(produit)
-                                if len(produits) >= limit:
-                                    break
-                        except Exception as e:
-                            logger.error(f"Erreur extraction produit: {e}")
-                            continue
-                    
-                    # Si on a des résultats, on s'arrête
-                    if produits:
-                        break
-                        
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"Erreur requête pour {url}: {e}")
-                continue
-        
-        logger.info(f"Produits trouvés pour '{terme}': {len(produits)}")
-        
+        produits = crawler_pages(lambda page: url if page == 1 else f"{url}&page={page}", limit)
     except Exception as e:
         logger.error(f"Erreur scraping recherche Jumia: {e}")
+        return []
     
+    logger.info(f"Produits trouvés pour '{terme}': {len(produits)}")
     return produits
-
@@ -0,0 +1,187 @@
+"""
+Chargement paresseux des modules lourds de l'API
+Les modules qui tirent OpenAI, pyarrow/pandas, pytrends, BeautifulSoup, Pillow,
+l'API WooCommerce ou holidays ne sont importés (et leurs bases initialisées)
+qu'au premier usage, ou par le préchauffage lancé en arrière-plan une fois
+le serveur démarré. rapport_chargement() indique ce qui a été chargé, quand,
+par quoi et en combien de temps.
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_modules: Dict[str, "ModuleParesseux"] = {}
+_objets: Dict[str, "ObjetParesseux"] = {}
+_debut_processus = time.perf_counter()
+
+
+class ModuleParesseux:
+    """Proxy de module : importe le module (puis appelle `init`) au premier accès à un attribut."""
+
+    def __init__(self, nom: str, init: Optional[Callable] = None):
+        self._nom = nom
+        self._init = init
+        self._module = None
+        self._lock = threading.Lock()
+        self.duree_ms: Optional[float] = None
+        self.charge_a_ms: Optional[float] = None
+        self.declencheur: Optional[str] = None
+        self.erreur: Optional[str] = None
+
+    @property
+    def nom(self) -> str:
+        return self._nom
+
+    @property
+    def charge(self) -> bool:
+        return self._module is not None
+
+    def charger(self, declencheur: str = "accès"):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    debut = time.perf_counter()
+                    try:
+                        module = importlib.import_module(self._nom)
+                        if self._init:
+                            self._init(module)
+                    except Exception as e:
+                        self.erreur = str(e)
+                        raise
+                    self.duree_ms = (time.perf_counter() - debut) * 1000
+                    self.charge_a_ms = (debut - _debut_processus) * 1000
+                    self.declencheur = declencheur
+                    self.erreur = None
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.charger(), attr)
+
+    def __repr__(self):
+        return f"<module paresseux {self._nom} ({'chargé' if self.charge else 'non chargé'})>"
+
+
+class FonctionParesseuse:
+    """Fonction (ou classe) d'un module paresseux, résolue au premier appel."""
+
+    __slots__ = ("_module", "_attr", "_cible")
+
+    def __init__(self, module: ModuleParesseux, attr: str):
+        self._module = module
+        self._attr = attr
+        self._cible = None
+
+    def __call__(self, *args, **kwargs):
+        if self._cible is None:
+            self._cible = getattr(self._module.charger(f"{self._attr}()"), self._attr)
+        return self._cible(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<{self._module.nom}.{self._attr} paresseux>"
+
+
+class ObjetParesseux:
+    """Instance partagée construite au premier accès (orchestrateur, connecteurs...)."""
+
+    def __init__(self, nom: str, fabrique: Callable):
+        object.__setattr__(self, "_nom", nom)
+        object.__setattr__(self, "_fabrique", fabrique)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "duree_ms", None)
+
+    def instance(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    debut = time.perf_counter()
+                    instance = self._fabrique()
+                    object.__setattr__(self, "duree_ms", (time.perf_counter() - debut) * 1000)
+                    object.__setattr__(self, "_instance", instance)
+        return self._instance
+
+    def __getattr__(self, attr):
+        return getattr(self.instance(), attr)
+
+    def __setattr__(self, attr, valeur):
+        setattr(self.instance(), attr, valeur)
+
+
+def module_paresseux(nom: str, init: Optional[Callable] = None) -> ModuleParesseux:
+    """
+    Déclare un module chargé au premier usage.
+
+    Args:
+        nom: Nom du module (ex: "export_colonnes")
+        init: Fonction appelée avec le module juste après l'import (ex: initialisation de sa base)
+    """
+    if nom not in _modules:
+        _modules[nom] = ModuleParesseux(nom, init)
+    return _modules[nom]
+
+
+def fonctions_paresseuses(nom: str, *attrs: str, init: Optional[Callable] = None) -> List[FonctionParesseuse]:
+    """Équivalent paresseux de `from nom import a, b` (pour des fonctions ou des classes)."""
+    module = module_paresseux(nom, init)
+    return [FonctionParesseuse(module, attr) for attr in attrs]
+
+
+def objet_paresseux(nom: str, fabrique: Callable) -> ObjetParesseux:
+    """Instance construite par `fabrique()` au premier accès à l'un de ses attributs."""
+    if nom not in _objets:
+        _objets[nom] = ObjetParesseux(nom, fabrique)
+    return _objets[nom]
+
+
+def prechauffer(en_arriere_plan: bool = True) -> Optional[threading.Thread]:
+    """
+    Charge tous les modules et objets déclarés, dans l'ordre de déclaration,
+    pour que les premières requêtes ne paient pas l'import.
+    Les erreurs sont enregistrées (rapport_chargement) sans interrompre le préchauffage.
+    """
+    def charger_tout():
+        for module in list(_modules.values()):
+            try:
+                module.charger("préchauffage")
+            except Exception as e:
+                logger.warning("Préchauffage %s: %s", module.nom, e)
+        for nom, objet in list(_objets.items()):
+            try:
+                objet.instance()
+            except Exception as e:
+                logger.warning("Préchauffage %s: %s", nom, e)
+
+    if not en_arriere_plan:
+        charger_tout()
+        return None
+    thread = threading.Thread(target=charger_tout, name="prechauffage", daemon=True)
+    thread.start()
+    return thread
+
+
+def rapport_chargement() -> Dict:
+    """État des modules / objets paresseux, triés par durée de chargement."""
+    modules = sorted(
+        ({
+            "module": m.nom,
+            "charge": m.charge,
+            "duree_ms": round(m.duree_ms, 1) if m.duree_ms is not None else None,
+            "charge_a_ms": round(m.charge_a_ms, 1) if m.charge_a_ms is not None else None,
+            "declencheur": m.declencheur,
+            "erreur": m.erreur,
+        } for m in _modules.values()),
+        key=lambda m: -(m["duree_ms"] or 0)
+    )
+    return {
+        "modules": modules,
+        "objets": [{"objet": nom, "construit": o._instance is not None,
+                    "duree_ms": round(o.duree_ms, 1) if o.duree_ms is not None else None}
+                   for nom, o in _objets.items()],
+        "charges": sum(m["charge"] for m in modules),
+        "total": len(modules),
+    }
@@ -0,0 +1,103 @@
+"""
+Configuration des logs de l'application
+Les modules écrivent via logging (jamais print) ; le logger racine ne fait que
+déposer les enregistrements dans une file, et un thread dédié (QueueListener)
+les formate et les écrit sur la console. Les requêtes ne paient donc plus
+l'écriture sur stdout.
+
+Variables d'environnement :
+- LOG_LEVEL : DEBUG, INFO (défaut), WARNING...
+- LOG_FORMAT : "text" (défaut) ou "json" (une ligne JSON par enregistrement,
+  avec les champs passés via `extra=`)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+FORMAT_TEXTE = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributs standards d'un LogRecord : tout le reste vient de `extra=`
+_ATTRIBUTS_STANDARDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class FormateurJSON(logging.Formatter):
+    """Une ligne JSON par enregistrement : horodatage, niveau, logger, message et champs `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entree = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for cle, valeur in record.__dict__.items():
+            if cle not in _ATTRIBUTS_STANDARDS and not cle.startswith("_"):
+                entree[cle] = valeur
+        if record.exc_info:
+            entree["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entree, ensure_ascii=False, default=str)
+
+
+class _HandlerFile(logging.handlers.QueueHandler):
+    """
+    QueueHandler sans mise en forme côté appelant : l'enregistrement est déposé
+    tel quel (le message et ses arguments sont formatés par le thread d'écriture).
+    Seule la trace d'exception est figée ici, tant que exc_info est valide.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+def configurer_logging(niveau: Optional[str] = None, format_sortie: Optional[str] = None,
+                       flux=None) -> logging.handlers.QueueListener:
+    """
+    Installe la journalisation asynchrone sur le logger racine (idempotent).
+
+    Args:
+        niveau: Niveau minimal (défaut: LOG_LEVEL ou INFO)
+        format_sortie: "text" ou "json" (défaut: LOG_FORMAT ou text)
+        flux: Flux de sortie (défaut: sys.stderr)
+
+    Returns:
+        Le QueueListener démarré (arrêté automatiquement à la sortie du processus)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    niveau = (niveau or os.getenv("LOG_LEVEL", "INFO")).upper()
+    format_sortie = (format_sortie or os.getenv("LOG_FORMAT", "text")).lower()
+
+    sortie = logging.StreamHandler(flux or sys.stderr)
+    sortie.setFormatter(FormateurJSON() if format_sortie == "json" else logging.Formatter(FORMAT_TEXTE))
+
+    file_logs: queue.SimpleQueue = queue.SimpleQueue()
+    racine = logging.getLogger()
+    for handler in list(racine.handlers):
+        racine.removeHandler(handler)
+    racine.addHandler(_HandlerFile(file_logs))
+    racine.setLevel(niveau)
+
+    _listener = logging.handlers.QueueListener(file_logs, sortie, respect_handler_level=True)
+    _listener.start()
+    atexit.register(arreter_logging)
+    return _listener
+
+
+def arreter_logging():
+    """Vide la file puis arrête le thread d'écriture."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
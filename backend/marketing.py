@@ -12,6 +12,8 @@ import hashlib
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from dashboard_metrics import metrics
+
 # Configurer l'encodage UTF-8 pour Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -329,6 +331,7 @@ def sauvegarder_campagne(nom_campagne: str, produits: List[Dict], descriptifs: L
         
         conn.commit()
         campagne_id = cursor.lastrowid
+        metrics.campagne_creee()
         print(f"[OK] Campagne '{nom_campagne}' sauvegardee (ID: {campagne_id})")
         return campagne_id
         
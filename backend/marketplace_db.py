@@ -4,17 +4,33 @@ Stocke les produits publiés avec toutes leurs métadonnées pour ML-ready
 """
 import os
 import sys
+import logging
 import sqlite3
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
 from datetime import datetime
 import json
+from collections import Counter
+
+from catalogue import indexer_sans_erreur
+from dashboard_metrics import SQL_ALERTE_PRIX, metrics
 
 # Configurer l'encodage UTF-8 pour Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+logger = logging.getLogger(__name__)
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "marketplace.db")
 
+# Produits en attente de synchronisation WooCommerce quel que soit updated_at :
+# actifs jamais publiés (ou sans empreinte), désactivés encore publiés.
+# Même expression dans l'index partiel et dans wc_sync.calculer_delta,
+# sinon SQLite n'utilise pas l'index.
+SQL_WC_A_SYNCHRONISER = (
+    "(status = 'active' AND (wc_id IS NULL OR wc_hash IS NULL))"
+    " OR (status != 'active' AND wc_id IS NOT NULL)"
+)
+
 
 def init_marketplace_db():
     """Initialise la base de données du marketplace avec schéma ML-ready"""
@@ -104,11 +120,53 @@ def init_marketplace_db():
         )
     """)
     
+    # Migration: suivi de la synchronisation WooCommerce des produits
+    cursor.execute("PRAGMA table_info(produits_marketplace)")
+    colonnes = [col[1] for col in cursor.fetchall()]
+    for colonne, type_sql in (("wc_id", "INTEGER"), ("wc_hash", "TEXT"), ("wc_synced_at", "TIMESTAMP")):
+        if colonne not in colonnes:
+            cursor.execute(f"ALTER TABLE produits_marketplace ADD COLUMN {colonne} {type_sql}")
+    
+    # Historique des synchronisations WooCommerce (le dernier run complet sert de watermark)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wc_sync_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created INTEGER DEFAULT 0,
+            updated INTEGER DEFAULT 0,
+            deleted INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0
+        )
+    """)
+    
+    # Produits supprimés localement mais encore présents sur WooCommerce
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wc_suppressions (
+            product_id TEXT PRIMARY KEY,
+            wc_id INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_wc_suppression
+        AFTER DELETE ON produits_marketplace
+        WHEN OLD.wc_id IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO wc_suppressions (product_id, wc_id) VALUES (OLD.product_id, OLD.wc_id);
+        END
+    """)
+    
     # Index pour performance et requêtes ML
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_id ON produits_marketplace(product_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_status ON produits_marketplace(status)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_category ON produits_marketplace(categorie)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON produits_marketplace(created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_updated_at ON produits_marketplace(updated_at)")
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_wc_a_synchroniser ON produits_marketplace(product_id)
+        WHERE {SQL_WC_A_SYNCHRONISER}
+    """)
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_product ON product_events(product_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON product_events(event_type)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_timestamp ON product_events(timestamp)")
@@ -135,8 +193,8 @@ def init_marketplace_db():
     
     conn.commit()
     conn.close()
-    print(f"✅ Base de données marketplace initialisée: {DB_PATH}")
-    print(f"✅ Catégories par défaut créées: {len(categories_default)} catégories")
+    logger.info("Base de données marketplace initialisée: %s", DB_PATH)
+    logger.info("Catégories par défaut créées: %s catégories", len(categories_default))
 
 
 def generate_product_id(produit: Dict) -> str:
@@ -151,7 +209,7 @@ def generate_product_id(produit: Dict) -> str:
     
     key_string = f"{produit.get('nom', '')}_{produit.get('lien', '')}_{categorie_str}"
     product_id = hashlib.md5(key_string.encode()).hexdigest()
-    print(f"🔑 ID généré pour '{produit.get('nom', '')}': {product_id}")
+    logger.debug("ID généré pour '%s': %s", produit.get('nom', ''), product_id)
     return product_id
 
 
@@ -181,7 +239,7 @@ def publier_produit(produit: Dict, description_seo: Optional[Dict] = None,
         product_id = generate_product_id(produit)
         
         # Vérifier si le produit existe déjà
-        cursor.execute("SELECT id FROM produits_marketplace WHERE product_id = ?", (product_id,))
+        cursor.execute(f"SELECT id, {SQL_ALERTE_PRIX} FROM produits_marketplace WHERE product_id = ?", (product_id,))
         existing = cursor.fetchone()
         
         if existing:
@@ -235,7 +293,7 @@ def publier_produit(produit: Dict, description_seo: Optional[Dict] = None,
             if produit.get('categories') and isinstance(produit.get('categories'), list) and len(produit.get('categories')) > 0:
                 associer_categories_produit(product_id, produit.get('categories'))
             
-            print(f"✅ Produit mis à jour: {product_id}")
+            logger.info("Produit mis à jour: %s", product_id)
         else:
             # Insérer un nouveau produit
             # Préparer la catégorie (compatibilité avec l'ancien système)
@@ -284,13 +342,19 @@ def publier_produit(produit: Dict, description_seo: Optional[Dict] = None,
             if produit.get('categories') and isinstance(produit.get('categories'), list) and len(produit.get('categories')) > 0:
                 associer_categories_produit(product_id, produit.get('categories'))
             
-            print(f"✅ Produit publié: {product_id}")
+            logger.info("Produit publié: %s", product_id)
         
         conn.commit()
+        if existing:
+            metrics.alertes_modifiees(-existing[1])  # features_json remplacé : analyse concurrente effacée
+        else:
+            metrics.produits_ajoutes('active')
+        # Rattacher au catalogue : un product_id changé (catégories) retrouve le même produit canonique
+        indexer_sans_erreur([{**produit, 'product_id': product_id}], 'marketplace')
         return product_id
         
     except Exception as e:
-        print(f"❌ Erreur publication produit: {e}")
+        logger.error("Erreur publication produit: %s", e)
         conn.rollback()
         return None
     finally:
@@ -379,12 +443,58 @@ def get_produits_marketplace(
         }
         
     except Exception as e:
-        print(f"❌ Erreur récupération produits: {e}")
+        logger.error("Erreur récupération produits: %s", e)
         return {'produits': [], 'total': 0, 'count': 0}
     finally:
         conn.close()
 
 
+def iter_produits_marketplace(
+    status: Optional[str] = None,
+    categorie: Optional[str] = None,
+    taille_lot: int = 500
+) -> Iterator[Dict]:
+    """
+    Parcourt les produits du marketplace par lots (pagination sur id), sans tout charger en mémoire.
+    Utilisé pour les exports volumineux (CSV boutique en flux).
+
+    Chaque lot est lu avec sa propre connexion, fermée avant de rendre les lignes :
+    StreamingResponse fait avancer le générateur depuis le pool de threads, et une
+    connexion SQLite ne peut pas passer d'un thread à l'autre.
+
+    Args:
+        status: Filtrer par statut (None = tous)
+        categorie: Filtrer par catégorie
+        taille_lot: Nombre de lignes lues à chaque aller-retour SQLite
+
+    Yields:
+        Dictionnaires produit (colonnes de produits_marketplace)
+    """
+    query = "SELECT * FROM produits_marketplace WHERE id > ?"
+    params = []
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    if categorie:
+        query += " AND categorie = ?"
+        params.append(categorie)
+    query += " ORDER BY id LIMIT ?"
+
+    dernier_id = 0
+    while True:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(query, [dernier_id, *params, taille_lot]).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            break
+        dernier_id = rows[-1]["id"]
+        for row in rows:
+            yield dict(row)
+
+
 def enregistrer_evenement(product_id: str, event_type: str, user_id: Optional[str] = None,
                           session_id: Optional[str] = None, device_type: Optional[str] = None,
                           source: Optional[str] = None, metadata: Optional[Dict] = None):
@@ -401,10 +511,10 @@ def enregistrer_evenement(product_id: str, event_type: str, user_id: Optional[st
         """, (product_id, event_type, user_id, session_id, device_type, source, metadata_json))
         
         conn.commit()
-        print(f"✅ Événement enregistré: {event_type} pour {product_id}")
+        logger.debug("Événement enregistré: %s pour %s", event_type, product_id)
         
     except Exception as e:
-        print(f"❌ Erreur enregistrement événement: {e}")
+        logger.error("Erreur enregistrement événement: %s", e)
         conn.rollback()
     finally:
         conn.close()
@@ -457,7 +567,7 @@ def get_categories_phares(limit: int = 6) -> List[Dict]:
         return categories
         
     except Exception as e:
-        print(f"❌ Erreur récupération catégories phares: {e}")
+        logger.error("Erreur récupération catégories phares: %s", e)
         return []
     finally:
         conn.close()
@@ -494,7 +604,7 @@ def get_produits_par_categorie(categorie: str, limit: int = 4) -> List[Dict]:
         return produits
         
     except Exception as e:
-        print(f"❌ Erreur récupération produits par catégorie: {e}")
+        logger.error("Erreur récupération produits par catégorie: %s", e)
         return []
     finally:
         conn.close()
@@ -514,28 +624,16 @@ def get_produit_by_id(product_id: str) -> Optional[Dict]:
     cursor = conn.cursor()
     
     try:
-        print(f"🔍 Recherche du produit {product_id} dans la base de données")
         cursor.execute("SELECT * FROM produits_marketplace WHERE product_id = ?", (product_id,))
         row = cursor.fetchone()
         
         if not row:
-            print(f"❌ Produit {product_id} non trouvé dans la table produits_marketplace")
-            # Vérifier s'il existe des produits dans la base
-            cursor.execute("SELECT COUNT(*) FROM produits_marketplace")
-            count = cursor.fetchone()[0]
-            print(f"ℹ️ Nombre total de produits dans la base: {count}")
-            if count > 0:
-                # Afficher quelques product_id pour debug
-                cursor.execute("SELECT product_id FROM produits_marketplace LIMIT 3")
-                sample_ids = cursor.fetchall()
-                print(f"ℹ️ Exemples d'IDs: {[r[0] for r in sample_ids]}")
+            logger.debug("Produit %s non trouvé dans la table produits_marketplace", product_id)
             return None
         
         columns = [description[0] for description in cursor.description]
         produit = dict(zip(columns, row))
         
-        print(f"✅ Produit trouvé: {produit.get('nom', 'N/A')}")
-        
         # Parser les champs JSON
         if produit.get('features_json'):
             try:
@@ -557,9 +655,7 @@ def get_produit_by_id(product_id: str) -> Optional[Dict]:
         return produit
         
     except Exception as e:
-        print(f"❌ Erreur récupération produit {product_id}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur récupération produit %s", product_id)
         return None
     finally:
         conn.close()
@@ -594,7 +690,7 @@ def mettre_a_jour_produit(
         existing = cursor.fetchone()
         
         if not existing:
-            print(f"❌ Produit non trouvé: {product_id}")
+            logger.warning("Produit non trouvé: %s", product_id)
             return None
         
         # Mettre à jour le produit
@@ -635,11 +731,11 @@ def mettre_a_jour_produit(
         ))
         
         conn.commit()
-        print(f"✅ Produit modifié: {product_id}")
+        logger.info("Produit modifié: %s", product_id)
         return product_id
         
     except Exception as e:
-        print(f"❌ Erreur modification produit {product_id}: {e}")
+        logger.error("Erreur modification produit %s: %s", product_id, e)
         conn.rollback()
         return None
     finally:
@@ -662,11 +758,11 @@ def mettre_a_jour_statut_produit(product_id: str, status: str) -> bool:
     
     try:
         # Vérifier que le produit existe
-        cursor.execute("SELECT id FROM produits_marketplace WHERE product_id = ?", (product_id,))
+        cursor.execute("SELECT id, coalesce(status, 'active') FROM produits_marketplace WHERE product_id = ?", (product_id,))
         existing = cursor.fetchone()
         
         if not existing:
-            print(f"❌ Produit non trouvé: {product_id}")
+            logger.warning("Produit non trouvé: %s", product_id)
             return False
         
         # Mettre à jour le statut
@@ -677,17 +773,68 @@ def mettre_a_jour_statut_produit(product_id: str, status: str) -> bool:
         """, (status, product_id))
         
         conn.commit()
-        print(f"✅ Statut du produit {product_id} modifié: {status}")
+        metrics.statut_modifie(existing[1], status)
+        logger.info("Statut du produit %s modifié: %s", product_id, status)
         return True
         
     except Exception as e:
-        print(f"❌ Erreur modification statut produit {product_id}: {e}")
+        logger.error("Erreur modification statut produit %s: %s", product_id, e)
         conn.rollback()
         return False
     finally:
         conn.close()
 
 
+def enregistrer_publications_woocommerce(wc_ids: Dict[str, int], hashes: Optional[Dict[str, str]] = None) -> int:
+    """
+    Enregistre en une seule transaction les IDs WooCommerce des produits publiés
+    et les passe en statut actif.
+    
+    Args:
+        wc_ids: Dictionnaire {product_id: id WooCommerce}
+        hashes: Empreinte des données envoyées {product_id: hash} (évite un renvoi à la prochaine synchro)
+        
+    Returns:
+        Nombre de produits mis à jour
+    """
+    if not wc_ids:
+        return 0
+    hashes = hashes or {}
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        # Statuts avant publication (pour les compteurs du tableau de bord)
+        ids = list(wc_ids)
+        anciens_statuts = Counter()
+        for i in range(0, len(ids), 500):  # Limite de variables SQLite
+            lot = ids[i:i + 500]
+            anciens_statuts.update(dict(cursor.execute(f"""
+                SELECT coalesce(status, 'active'), COUNT(*) FROM produits_marketplace
+                WHERE product_id IN ({','.join('?' * len(lot))}) GROUP BY 1
+            """, lot).fetchall()))
+        
+        cursor.executemany("""
+            UPDATE produits_marketplace
+            SET wc_id = ?, wc_hash = ?, wc_synced_at = CURRENT_TIMESTAMP,
+                status = 'active', validated = 1,
+                published_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+            WHERE product_id = ?
+        """, [(wc_id, hashes.get(product_id), product_id) for product_id, wc_id in wc_ids.items()])
+        conn.commit()
+        for status, n in anciens_statuts.items():
+            metrics.statut_modifie(status, 'active', n)
+        logger.info("%s produit(s) liés à WooCommerce", cursor.rowcount)
+        return cursor.rowcount
+    except Exception as e:
+        logger.error("Erreur enregistrement IDs WooCommerce: %s", e)
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+
 def get_all_categories() -> List[Dict]:
     """
     Récupère toutes les catégories disponibles
@@ -714,7 +861,7 @@ def get_all_categories() -> List[Dict]:
         
         return categories
     except Exception as e:
-        print(f"❌ Erreur récupération catégories: {e}")
+        logger.error("Erreur récupération catégories: %s", e)
         return []
     finally:
         conn.close()
@@ -773,10 +920,10 @@ def associer_categories_produit(product_id: str, categories: List[str]) -> bool:
                 """, (product_id, category_id))
         
         conn.commit()
-        print(f"✅ Catégories associées au produit {product_id}: {categories}")
+        logger.debug("Catégories associées au produit %s: %s", product_id, categories)
         return True
     except Exception as e:
-        print(f"❌ Erreur association catégories produit {product_id}: {e}")
+        logger.error("Erreur association catégories produit %s: %s", product_id, e)
         conn.rollback()
         return False
     finally:
@@ -798,11 +945,14 @@ def supprimer_produit(product_id: str) -> bool:
     
     try:
         # Vérifier que le produit existe
-        cursor.execute("SELECT id FROM produits_marketplace WHERE product_id = ?", (product_id,))
+        cursor.execute(f"""
+            SELECT id, coalesce(status, 'active'), {SQL_ALERTE_PRIX}
+            FROM produits_marketplace WHERE product_id = ?
+        """, (product_id,))
         existing = cursor.fetchone()
         
         if not existing:
-            print(f"❌ Produit non trouvé: {product_id}")
+            logger.warning("Produit non trouvé: %s", product_id)
             return False
         
         # Supprimer les associations de catégories (CASCADE devrait le faire automatiquement, mais on le fait explicitement)
@@ -815,11 +965,12 @@ def supprimer_produit(product_id: str) -> bool:
         cursor.execute("DELETE FROM produits_marketplace WHERE product_id = ?", (product_id,))
         
         conn.commit()
-        print(f"✅ Produit {product_id} supprimé avec succès")
+        metrics.produit_supprime(existing[1], alerte=existing[2])
+        logger.info("Produit %s supprimé avec succès", product_id)
         return True
         
     except Exception as e:
-        print(f"❌ Erreur suppression produit {product_id}: {e}")
+        logger.error("Erreur suppression produit %s: %s", product_id, e)
         conn.rollback()
         return False
     finally:
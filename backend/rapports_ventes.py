@@ -0,0 +1,212 @@
+"""
+Rapports analytiques sur l'historique des ventes
+Travaille sur l'export colonnaire (export_colonnes) lu en memory-map avec
+pyarrow, puis calcule les indicateurs par opérations vectorisées pandas/NumPy :
+évolution d'une année sur l'autre, moyennes mobiles, localisations, cohortes.
+"""
+import os
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    import pandas as pd
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+    ANALYTICS_AVAILABLE = True
+except ImportError:
+    ANALYTICS_AVAILABLE = False
+    print("⚠️ pandas/pyarrow non installés. Installez-les avec: pip install pandas pyarrow")
+
+from export_colonnes import ANALYTICS_DIR
+
+COLONNES_RAPPORT = ["boutique_id", "date_vente", "produit_nom", "prix", "quantite", "localisation"]
+
+
+def charger_ventes(
+    annees: Optional[List[int]] = None,
+    boutique_id: Optional[int] = None,
+    source: Optional[str] = None
+) -> "pd.DataFrame":
+    """
+    Charge les ventes exportées (Parquet ou Arrow IPC) en ne lisant que les
+    colonnes et partitions (mois) nécessaires.
+
+    Args:
+        annees: Années à charger (défaut: tout l'historique)
+        boutique_id: Filtrer sur une boutique
+        source: Dossier de l'export (défaut: data/analytics/ventes)
+
+    Returns:
+        DataFrame avec date (datetime64), ca (prix * quantité) et les colonnes de vente
+    """
+    if not ANALYTICS_AVAILABLE:
+        raise ImportError("pandas/pyarrow ne sont pas installés. Installez-les avec: pip install pandas pyarrow")
+
+    source = source or os.path.join(ANALYTICS_DIR, "ventes")
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"Aucun export colonnaire trouvé ({source}). Lancez d'abord l'export.")
+
+    format = "ipc" if any(f.endswith((".arrow", ".feather", ".ipc"))
+                          for _, _, fichiers in os.walk(source) for f in fichiers) else "parquet"
+    # Fichiers lus en memory-map : pas de copie intermédiaire côté Python
+    dataset = ds.dataset(source, format=format, partitioning="hive",
+                         filesystem=fs.LocalFileSystem(use_mmap=True))
+
+    filtre = None
+    if annees:
+        # Élagage de partitions : seuls les mois des années demandées sont ouverts
+        mois = [f"{a}-{m:02d}" for a in annees for m in range(1, 13)]
+        filtre = ds.field("mois").isin(mois)
+    if boutique_id:
+        condition = ds.field("boutique_id") == boutique_id
+        filtre = condition if filtre is None else filtre & condition
+
+    table = dataset.to_table(columns=COLONNES_RAPPORT, filter=filtre)
+    # Conversion des dates côté Arrow (C++) plutôt que ligne à ligne en Python
+    dates = pc.strptime(table.column("date_vente"), format="%Y-%m-%d", unit="s", error_is_null=True)
+    table = table.append_column("date", dates)
+
+    # Textes répétitifs en catégories : groupby / factorize sur des codes entiers
+    df = table.to_pandas(split_blocks=True, self_destruct=True, strings_to_categorical=True)
+    df["quantite"] = df["quantite"].fillna(0)
+    df["ca"] = df["prix"].to_numpy() * df["quantite"].to_numpy()
+    return df
+
+
+def rapport_annuel(df: "pd.DataFrame") -> Dict:
+    """CA et volumes par mois pour chaque année, avec variation vs l'année N-1 (None si absente)."""
+    df = df[df["date"].notna()]
+    if df.empty:
+        return {"annees": [], "mois": []}
+
+    annee = df["date"].dt.year.to_numpy()
+    mois = df["date"].dt.month.to_numpy()
+    annees = np.unique(annee)
+
+    # Matrice année x mois construite par bincount (une seule passe)
+    index_annee = np.searchsorted(annees, annee)
+    cle = index_annee * 12 + (mois - 1)
+    ca = np.bincount(cle, weights=df["ca"].to_numpy(), minlength=len(annees) * 12).reshape(len(annees), 12)
+    nb = np.bincount(cle, minlength=len(annees) * 12).reshape(len(annees), 12)
+
+    # Variation vs l'année calendaire N-1 uniquement : une année absente des
+    # données (ou filtrée) ne doit pas servir de référence à la suivante
+    precedente = np.zeros(len(annees), dtype=bool)
+    precedente[1:] = np.diff(annees) == 1
+    ca_annee = ca.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yoy = np.full_like(ca, np.nan)
+        yoy[1:] = (ca[1:] - ca[:-1]) / ca[:-1] * 100
+        yoy_annee = np.full_like(ca_annee, np.nan)
+        yoy_annee[1:] = (ca_annee[1:] - ca_annee[:-1]) / ca_annee[:-1] * 100
+    yoy[~precedente] = np.nan
+    yoy[~np.isfinite(yoy)] = np.nan
+    yoy_annee[~precedente | ~np.isfinite(yoy_annee)] = np.nan
+
+    return {
+        "annees": [
+            {
+                "annee": int(a),
+                "ca": float(ca_annee[i]),
+                "nb_ventes": int(nb[i].sum()),
+                "variation_ca_pct": None if np.isnan(yoy_annee[i]) else float(yoy_annee[i]),
+            }
+            for i, a in enumerate(annees)
+        ],
+        "mois": [
+            {
+                "annee": int(a),
+                "mois": m + 1,
+                "ca": float(ca[i, m]),
+                "nb_ventes": int(nb[i, m]),
+                "variation_ca_pct": None if np.isnan(yoy[i, m]) else round(float(yoy[i, m]), 2),
+            }
+            for i, a in enumerate(annees) for m in range(12)
+        ],
+    }
+
+
+def moyennes_mobiles(df: "pd.DataFrame", fenetres: tuple = (7, 30)) -> List[Dict]:
+    """CA journalier (jours sans vente inclus) et ses moyennes mobiles."""
+    df = df[df["date"].notna()]
+    if df.empty:
+        return []
+    journalier = df.groupby("date", sort=True)["ca"].sum()
+    journalier = journalier.reindex(pd.date_range(journalier.index.min(), journalier.index.max(), freq="D"),
+                                    fill_value=0.0)
+    resultat = pd.DataFrame({"ca": journalier})
+    for fenetre in fenetres:
+        resultat[f"moyenne_{fenetre}j"] = journalier.rolling(fenetre, min_periods=1).mean().round(2)
+    resultat.index = resultat.index.strftime("%Y-%m-%d")
+    return resultat.reset_index(names="jour").to_dict(orient="records")
+
+
+def rapport_localisations(df: "pd.DataFrame", limit: int = 20) -> List[Dict]:
+    """CA, nombre de ventes, panier moyen et part du CA par localisation."""
+    ventes = df[df["localisation"].notna() & (df["localisation"] != "")]
+    if ventes.empty:
+        return []
+    agg = ventes.groupby("localisation", sort=False, observed=True).agg(
+        ca=("ca", "sum"), nb_ventes=("ca", "size"), quantite=("quantite", "sum")
+    )
+    agg["panier_moyen"] = (agg["ca"] / agg["nb_ventes"]).round(2)
+    agg["part_ca_pct"] = (agg["ca"] / agg["ca"].sum() * 100).round(2)
+    return agg.sort_values("ca", ascending=False).head(limit).reset_index().to_dict(orient="records")
+
+
+def rapport_cohortes(df: "pd.DataFrame", horizon_mois: int = 12) -> List[Dict]:
+    """
+    Cohortes de produits par mois de première vente : CA réalisé par chaque
+    cohorte N mois après son lancement (rétention des produits dans le temps).
+    """
+    ventes = df[df["date"].notna()]
+    if ventes.empty:
+        return []
+    periode = ventes["date"].dt.year.to_numpy() * 12 + ventes["date"].dt.month.to_numpy() - 1
+    codes, produits = pd.factorize(ventes["produit_nom"])
+    premiere = np.full(len(produits), np.iinfo(np.int64).max)
+    np.minimum.at(premiere, codes, periode)
+    cohorte = premiere[codes]
+    age = periode - cohorte
+
+    masque = age < horizon_mois
+    cohortes, index_cohorte = np.unique(cohorte[masque], return_inverse=True)
+    cle = index_cohorte * horizon_mois + age[masque]
+    ca = np.bincount(cle, weights=ventes["ca"].to_numpy()[masque],
+                     minlength=len(cohortes) * horizon_mois).reshape(len(cohortes), horizon_mois)
+    taille = np.bincount(np.searchsorted(cohortes, premiere), minlength=len(cohortes))
+
+    return [
+        {
+            "cohorte": f"{c // 12}-{c % 12 + 1:02d}",
+            "nb_produits": int(taille[i]),
+            "ca_par_mois": [round(float(v), 2) for v in ca[i]],
+        }
+        for i, c in enumerate(cohortes)
+    ]
+
+
+def generer_rapport(annees: Optional[List[int]] = None, boutique_id: Optional[int] = None,
+                    source: Optional[str] = None) -> Dict:
+    """
+    Rapport complet (annuel, moyennes mobiles, localisations, cohortes).
+
+    Args:
+        annees: Années à analyser (défaut: tout l'historique exporté)
+        boutique_id: Filtrer sur une boutique
+        source: Dossier de l'export des ventes
+
+    Returns:
+        Dictionnaire sérialisable en JSON
+    """
+    df = charger_ventes(annees=annees, boutique_id=boutique_id, source=source)
+    return {
+        "nb_ventes": int(len(df)),
+        "ca_total": float(df["ca"].sum()) if len(df) else 0.0,
+        "annuel": rapport_annuel(df),
+        "moyennes_mobiles": moyennes_mobiles(df),
+        "localisations": rapport_localisations(df),
+        "cohortes": rapport_cohortes(df),
+    }
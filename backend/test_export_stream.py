@@ -0,0 +1,56 @@
+"""
+Test de l'export CSV boutique en flux (/api/export-boutique-csv) sous concurrence.
+StreamingResponse fait avancer le générateur de lignes depuis le pool de threads :
+plusieurs exports simultanés ne doivent ni échouer ni être tronqués.
+
+Usage: python test_export_stream.py
+"""
+import csv
+import io
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("WC_URL", "http://127.0.0.1")
+
+from fastapi.testclient import TestClient
+
+import api
+import marketplace_db
+
+NB_PRODUITS = 1200  # Plusieurs lots de iter_produits_marketplace
+NB_EXPORTS = 20
+
+
+def test_exports_concurrents():
+    with tempfile.TemporaryDirectory() as dossier:
+        marketplace_db.DB_PATH = os.path.join(dossier, "marketplace.db")
+        marketplace_db.init_marketplace_db()
+        conn = sqlite3.connect(marketplace_db.DB_PATH)
+        conn.executemany(
+            "INSERT INTO produits_marketplace (product_id, nom, prix, categorie, status) VALUES (?, ?, ?, ?, ?)",
+            [(f"p{i}", f"Produit {i}", 1000 + i, "Électronique", "active" if i % 10 else "draft")
+             for i in range(NB_PRODUITS)]
+        )
+        conn.commit()
+        conn.close()
+        attendus = NB_PRODUITS - NB_PRODUITS // 10
+
+        with TestClient(api.app) as client:
+            def exporter(_):
+                response = client.get("/api/export-boutique-csv")
+                return response.status_code, list(csv.DictReader(io.StringIO(response.text)))
+
+            with ThreadPoolExecutor(max_workers=NB_EXPORTS) as executor:
+                resultats = list(executor.map(exporter, range(NB_EXPORTS)))
+
+        for status_code, lignes in resultats:
+            assert status_code == 200
+            assert len(lignes) == attendus, f"Export tronqué: {len(lignes)}/{attendus} lignes"
+
+
+if __name__ == "__main__":
+    test_exports_concurrents()
+    print(f"✅ {NB_EXPORTS} exports simultanés complets")
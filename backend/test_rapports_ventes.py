@@ -0,0 +1,42 @@
+"""
+Test du rapport annuel (rapports_ventes.rapport_annuel) : la variation
+d'une année sur l'autre ne compare qu'avec l'année calendaire N-1.
+
+Usage: python test_rapports_ventes.py
+"""
+import pandas as pd
+
+from rapports_ventes import rapport_annuel
+
+
+def _ventes(lignes):
+    return pd.DataFrame({
+        "date": pd.to_datetime([date for date, _ in lignes]),
+        "ca": [ca for _, ca in lignes],
+    })
+
+
+def test_annee_manquante():
+    # Ventes en 2021 et 2023 seulement : 2023 n'a pas de référence N-1
+    rapport = rapport_annuel(_ventes([("2021-03-10", 1000.0), ("2023-03-05", 3000.0)]))
+    annees = {a["annee"]: a for a in rapport["annees"]}
+    assert sorted(annees) == [2021, 2023]
+    assert annees[2023]["variation_ca_pct"] is None
+    mars_2023 = next(m for m in rapport["mois"] if m["annee"] == 2023 and m["mois"] == 3)
+    assert mars_2023["ca"] == 3000.0 and mars_2023["variation_ca_pct"] is None
+
+
+def test_annees_consecutives():
+    rapport = rapport_annuel(_ventes([("2022-03-10", 1000.0), ("2023-03-05", 1500.0), ("2023-04-01", 500.0)]))
+    annees = {a["annee"]: a for a in rapport["annees"]}
+    assert annees[2022]["variation_ca_pct"] is None
+    assert annees[2023]["variation_ca_pct"] == 100.0
+    mois_2023 = {m["mois"]: m for m in rapport["mois"] if m["annee"] == 2023}
+    assert mois_2023[3]["variation_ca_pct"] == 50.0
+    assert mois_2023[4]["variation_ca_pct"] is None  # Aucune vente en avril 2022
+
+
+if __name__ == "__main__":
+    test_annee_manquante()
+    test_annees_consecutives()
+    print("✅ Variations annuelles calculées vs N-1 uniquement")
@@ -0,0 +1,124 @@
+"""
+Test manuel de la publication en masse WooCommerce (products/batch)
+contre un faux serveur WooCommerce local (aucun accès réseau nécessaire).
+
+Usage: python test_wc_batch.py
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from connectors.wp_connector import WooCommerceConnector, _requete_non_envoyee
+
+PREFIX = "/wp-json/wc/v3/"
+
+
+class FakeWooCommerce(BaseHTTPRequestHandler):
+    """
+    Faux WooCommerce: les produits dont le nom contient "retry" sont refusés
+    dans un batch mais acceptés à l'unité, ceux contenant "reject" toujours refusés.
+    Un batch contenant "lent" est traité mais la réponse arrive après le délai du client.
+    """
+    next_id = 1000
+    lock = threading.Lock()
+    batch_calls = 0
+    single_calls = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _create(self, product):
+        with FakeWooCommerce.lock:
+            FakeWooCommerce.next_id += 1
+            return dict(product, id=FakeWooCommerce.next_id)
+
+    def do_POST(self):
+        path = urlparse(self.path).path[len(PREFIX):]
+        data = self._body()
+        if path == "products/batch":
+            with FakeWooCommerce.lock:
+                FakeWooCommerce.batch_calls += 1
+            created = []
+            for product in data.get("create", []):
+                if "retry" in product["name"] or "reject" in product["name"]:
+                    created.append({"id": 0, "error": {"code": "woocommerce_rest_error", "message": "refusé"}})
+                else:
+                    created.append(self._create(product))
+            updated = [dict(p) for p in data.get("update", [])]
+            if any("lent" in p["name"] for p in data.get("create", [])):
+                time.sleep(2)
+            deleted = [{"id": i} for i in data.get("delete", [])]
+            return self._send(200, {"create": created, "update": updated, "delete": deleted})
+        if path == "products":
+            with FakeWooCommerce.lock:
+                FakeWooCommerce.single_calls += 1
+            if "reject" in data["name"]:
+                return self._send(400, {"code": "woocommerce_rest_error", "message": "refusé"})
+            return self._send(201, self._create(data))
+        self._send(404, {"code": "rest_no_route"})
+
+    def do_PUT(self):
+        match = re.match(r"products/(\d+)", urlparse(self.path).path[len(PREFIX):])
+        self._send(200, dict(self._body(), id=int(match.group(1))))
+
+    def do_DELETE(self):
+        match = re.match(r"products/(\d+)", urlparse(self.path).path[len(PREFIX):])
+        self._send(200, {"id": int(match.group(1))})
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeWooCommerce)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    print(f"🧪 Faux WooCommerce sur {url}")
+
+    connector = WooCommerceConnector(url=url, consumer_key="ck_test", consumer_secret="cs_test", timeout=5)
+
+    products = {f"p{i}": {"name": f"Produit {i}", "regular_price": "1000"} for i in range(250)}
+    products["p7"]["name"] = "Produit retry 7"
+    products["p42"]["name"] = "Produit reject 42"
+
+    result = connector.batch_products(create=products, update={"u1": {"id": 5, "regular_price": "900"}},
+                                      delete={"d1": 6}, batch_size=100, max_workers=4)
+
+    print(f"✅ Créés: {len(result['created'])} | Mis à jour: {len(result['updated'])} | "
+          f"Supprimés: {len(result['deleted'])} | Échecs: {list(result['failed'])}")
+    print(f"📦 Requêtes batch: {FakeWooCommerce.batch_calls} | Reprises unitaires: {FakeWooCommerce.single_calls}")
+
+    assert len(result["created"]) == 249
+    assert "p7" in result["created"] and list(result["failed"]) == ["p42"]
+    assert result["updated"] == {"u1": 5} and result["deleted"] == {"d1": 6}
+    assert FakeWooCommerce.batch_calls == 3 and FakeWooCommerce.single_calls == 2
+
+    # Réponse au-delà du délai : le lot a été traité, il ne doit pas être recréé produit par produit
+    connector_lent = WooCommerceConnector(url=url, consumer_key="ck_test", consumer_secret="cs_test", timeout=1)
+    single_calls = FakeWooCommerce.single_calls
+    result = connector_lent.publish_products({"l1": {"name": "Produit lent", "regular_price": "1000"}})
+    assert list(result["failed"]) == ["l1"] and FakeWooCommerce.single_calls == single_calls
+    print("✅ Délai de lecture: lot rapporté en échec, sans doublon")
+
+    # Serveur injoignable : la requête n'est jamais partie, la reprise unitaire est sûre
+    server.shutdown()
+    server.server_close()
+    try:
+        connector.wcapi.post("products/batch", {})
+    except Exception as e:
+        assert _requete_non_envoyee(e), repr(e)
+    else:
+        raise AssertionError("Le serveur arrêté a répondu")
+    print("✅ Publication en masse OK")
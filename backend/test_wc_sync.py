@@ -0,0 +1,74 @@
+"""
+Test manuel de la synchronisation incrémentale marketplace -> WooCommerce
+sur une base temporaire et le faux serveur WooCommerce de test_wc_batch.py.
+
+Usage: python test_wc_sync.py
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import marketplace_db
+
+# Base temporaire: à définir avant l'import de wc_sync
+marketplace_db.DB_PATH = os.path.join(tempfile.mkdtemp(), "marketplace_sync_test.db")
+marketplace_db.init_marketplace_db()
+
+from connectors.wp_connector import WooCommerceConnector
+from connectors.wc_sync import synchroniser_woocommerce
+from test_wc_batch import FakeWooCommerce
+
+NB_PRODUITS = 2000
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeWooCommerce)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connector = WooCommerceConnector(url=f"http://127.0.0.1:{server.server_port}",
+                                     consumer_key="ck_test", consumer_secret="cs_test", timeout=5)
+
+    conn = sqlite3.connect(marketplace_db.DB_PATH)
+    conn.executemany("""
+        INSERT INTO produits_marketplace (product_id, nom, prix, status) VALUES (?, ?, ?, 'active')
+    """, [(f"p{i}", f"Produit {i}", 1000 + i) for i in range(NB_PRODUITS)])
+    conn.commit()
+
+    debut = time.perf_counter()
+    premier = synchroniser_woocommerce(connector)
+    print(f"📦 Synchro initiale: {premier} en {time.perf_counter() - debut:.2f}s")
+    assert premier["created"] == NB_PRODUITS
+
+    # Quelques modifications
+    conn.execute("UPDATE produits_marketplace SET prix = 5, updated_at = CURRENT_TIMESTAMP WHERE product_id IN ('p1', 'p2')")
+    conn.execute("UPDATE produits_marketplace SET status = 'archived', updated_at = CURRENT_TIMESTAMP WHERE product_id = 'p3'")
+    conn.execute("DELETE FROM produits_marketplace WHERE product_id = 'p4'")
+    conn.execute("INSERT INTO produits_marketplace (product_id, nom, prix, status) VALUES ('nouveau', 'Nouveau', 10, 'active')")
+    conn.commit()
+
+    batchs_avant = FakeWooCommerce.batch_calls
+    debut = time.perf_counter()
+    delta = synchroniser_woocommerce(connector)
+    print(f"🔄 Synchro incrémentale: {delta} en {time.perf_counter() - debut:.2f}s")
+    assert (delta["created"], delta["updated"], delta["deleted"]) == (1, 2, 2)
+    assert FakeWooCommerce.batch_calls - batchs_avant == 1
+
+    # Le delta incrémental passe par les index (updated_at + index partiel), sans parcours de table
+    from connectors.wc_sync import _COLONNES, SQL_WC_A_SYNCHRONISER
+    plan = [ligne[3] for ligne in conn.execute(f"""
+        EXPLAIN QUERY PLAN
+        SELECT {_COLONNES} FROM produits_marketplace WHERE updated_at >= ?
+        UNION
+        SELECT {_COLONNES} FROM produits_marketplace WHERE {SQL_WC_A_SYNCHRONISER}
+    """, ("2000-01-01",))]
+    assert not any(etape == "SCAN produits_marketplace" for etape in plan), plan
+
+    rien = synchroniser_woocommerce(connector)
+    assert (rien["created"], rien["updated"], rien["deleted"]) == (0, 0, 0)
+    assert conn.execute("SELECT COUNT(*) FROM wc_suppressions").fetchone()[0] == 0
+
+    conn.close()
+    server.shutdown()
+    print("✅ Synchronisation incrémentale OK")
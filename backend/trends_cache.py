@@ -0,0 +1,136 @@
+"""
+Cache partagé des scores Google Trends
+Évite de rappeler pytrends pour un mot-clé déjà évalué récemment
+(Google limite fortement le nombre de requêtes par IP)
+Un score n'a de sens que rapporté à son mot-clé d'ancrage (voir
+google_trends.get_keyword_scores) : l'ancre fait partie de la clé du cache.
+"""
+import sqlite3
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Configurer l'encodage UTF-8 pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "trends_cache.db")
+CACHE_DURATION_HOURS = 24  # Les tendances bougent peu d'un jour à l'autre
+
+
+def init_trends_cache():
+    """Initialise la table du cache des scores de tendance."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # Migration: les anciens scores, relatifs à leur seul paquet, ne sont pas réutilisables
+    cursor.execute("PRAGMA table_info(scores_trends)")
+    colonnes = [col[1] for col in cursor.fetchall()]
+    if colonnes and "ancre" not in colonnes:
+        cursor.execute("DROP TABLE scores_trends")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scores_trends (
+            keyword TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            geo TEXT NOT NULL,
+            ancre TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (keyword, timeframe, geo, ancre)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trends_expires
+        ON scores_trends(expires_at)
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def get_cached_scores(keywords: List[str], timeframe: str, geo: str, ancre: str) -> Dict[str, int]:
+    """
+    Récupère en une seule requête les scores encore valides pour une liste de mots-clés.
+
+    Args:
+        keywords: Mots-clés recherchés (normalisés en minuscules)
+        timeframe: Période Google Trends
+        geo: Code pays
+        ancre: Mot-clé d'ancrage des scores
+
+    Returns:
+        Dictionnaire {keyword: score} pour les mots-clés présents dans le cache
+    """
+    if not keywords:
+        return {}
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        placeholders = ",".join("?" * len(keywords))
+        cursor.execute(f"""
+            SELECT keyword, score FROM scores_trends
+            WHERE timeframe = ? AND geo = ? AND ancre = ? AND expires_at > ?
+            AND keyword IN ({placeholders})
+        """, (timeframe, geo, ancre, datetime.now().isoformat(), *keywords))
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    except Exception as e:
+        print(f"❌ Erreur lecture cache trends: {e}")
+        return {}
+    finally:
+        conn.close()
+
+
+def save_scores(scores: Dict[str, int], timeframe: str, geo: str, ancre: str):
+    """
+    Enregistre un lot de scores dans le cache (une seule transaction).
+
+    Args:
+        scores: Dictionnaire {keyword: score}
+        timeframe: Période Google Trends
+        geo: Code pays
+        ancre: Mot-clé d'ancrage des scores
+    """
+    if not scores:
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        expires_at = (datetime.now() + timedelta(hours=CACHE_DURATION_HOURS)).isoformat()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO scores_trends (keyword, timeframe, geo, ancre, score, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(kw, timeframe, geo, ancre, score, expires_at) for kw, score in scores.items()])
+        conn.commit()
+    except Exception as e:
+        print(f"❌ Erreur sauvegarde cache trends: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def clear_expired_scores() -> int:
+    """Supprime les scores expirés. Retourne le nombre de lignes supprimées."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("DELETE FROM scores_trends WHERE expires_at < ?", (datetime.now().isoformat(),))
+        conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        print(f"❌ Erreur nettoyage cache trends: {e}")
+        return 0
+    finally:
+        conn.close()
+
+
+# Initialiser le cache au chargement du module
+init_trends_cache()